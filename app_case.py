@@ -1,22 +1,229 @@
 
+import json
+from dataclasses import replace
+import altair as alt
 import streamlit as st
 import pandas as pd
 import numpy as np
-from simulate_case import Params, simulate
+from simulate_case import Params, PhaseProfiler, simulate, simulate_batch, batch_to_frame, params_hash
+from cache import cached_simulate
 
 st.set_page_config(page_title="Simulador Escolar – Calidad Dinámica", layout="wide")
 
+# ---- Presets: campos que sobrescriben los sliders ("cuota_rel" = cuota / precio de referencia) ----
+PRESETS = {
+    "Exitoso": dict(
+        prop_mkt=0.10, k_calidad_candidatos=1.0, cuota_rel=1.0, k_precio_cac=0.3,
+        tasa_bajas_base=0.03, k_bajas_calidad=0.10, calidad_base=0.8, k_hacinamiento=1.2,
+        gamma_hacinamiento=1.3, cupo_optimo=25, cupo_maximo=30, trigger_auto_aula=True,
+        politica_seleccion=0.7, beta_demanda_calidad=15.0, delta_demanda_saturacion=0.03,
+    ),
+    "Estable": dict(
+        prop_mkt=0.05, k_calidad_candidatos=0.8, cuota_rel=1.0, k_precio_cac=0.5,
+        tasa_bajas_base=0.04, k_bajas_calidad=0.12, calidad_base=0.7, k_hacinamiento=1.0,
+        gamma_hacinamiento=1.3, cupo_optimo=25, cupo_maximo=30, trigger_auto_aula=True,
+        politica_seleccion=0.7, beta_demanda_calidad=10.0, delta_demanda_saturacion=0.05,
+    ),
+    "Pérdida por precio alto": dict(
+        prop_mkt=0.04, k_calidad_candidatos=0.6, cuota_rel=1.4, k_precio_cac=0.8,
+        tasa_bajas_base=0.05, k_bajas_calidad=0.14, calidad_base=0.65, k_hacinamiento=0.9,
+        gamma_hacinamiento=1.3, cupo_optimo=25, cupo_maximo=30, trigger_auto_aula=False,
+        politica_seleccion=0.8, beta_demanda_calidad=8.0, delta_demanda_saturacion=0.08,
+    ),
+    "Pérdida por baja calidad": dict(
+        prop_mkt=0.03, k_calidad_candidatos=0.4, cuota_rel=0.95, k_precio_cac=0.4,
+        tasa_bajas_base=0.06, k_bajas_calidad=0.20, calidad_base=0.5, k_hacinamiento=1.4,
+        gamma_hacinamiento=1.5, cupo_optimo=22, cupo_maximo=28, trigger_auto_aula=False,
+        politica_seleccion=0.9, beta_demanda_calidad=6.0, delta_demanda_saturacion=0.10,
+    ),
+}
+
+
+def aplicar_preset(base: Params, nombre: str) -> Params:
+    if nombre not in PRESETS:
+        return base
+    campos = dict(PRESETS[nombre])
+    campos["cuota_mensual"] = base.ref_precio * campos.pop("cuota_rel")
+    return replace(base, **campos)
+
+
+# ---- Cache de la vista ----
+# Las funciones reciben una clave hashable (params_hash) y los datos con prefijo
+# "_" (Streamlit no los hashea). Devuelven DataFrames largos o specs Vega-Lite
+# ya serializados: un rerun que no cambia los params no reconstruye los gráficos
+# de Altair (validar y serializar el heatmap con etiquetas es lo más caro).
+@st.cache_data(show_spinner=False, max_entries=64)
+def comparar_escenarios(claves: tuple, _escenarios: list) -> pd.DataFrame:
+    # claves: ((nombre, hash), ...) en el mismo orden que _escenarios
+    cmp_df = batch_to_frame(simulate_batch(_escenarios))
+    cmp_df["escenario"] = np.array([nombre for nombre, _ in claves])[cmp_df["escenario"].to_numpy()]
+    return cmp_df
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def comparacion_spec(claves: tuple, columna: str, titulo: str, _cmp_df: pd.DataFrame) -> dict:
+    nombres = [nombre for nombre, _ in claves]
+    return (
+        alt.Chart(_cmp_df[["escenario", "anio", columna]])
+        .mark_line(point=True, strokeWidth=2)
+        .encode(
+            x=alt.X("anio:O", title="Año"),
+            y=alt.Y(f"{columna}:Q", title=titulo),
+            color=alt.Color("escenario:N", sort=nombres, title="Escenario"),
+            tooltip=["escenario", "anio", alt.Tooltip(f"{columna}:Q", format=",.2f")],
+        )
+        .properties(height=300)
+        .to_dict()
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def lineas_spec(h: str, nombre: str, _wide: pd.DataFrame) -> dict:
+    # Equivalente a st.line_chart(_wide) (índice = anio), sin rearmar el gráfico en cada rerun
+    long_df = _wide.reset_index().melt(id_vars="anio", var_name="Serie", value_name="Valor")
+    return (
+        alt.Chart(long_df)
+        .mark_line()
+        .encode(
+            x=alt.X("anio:Q", title="anio"),
+            y=alt.Y("Valor:Q", title=None),
+            color=alt.Color("Serie:N", title=None, sort=list(_wide.columns)),
+            tooltip=["anio", "Serie", "Valor"],
+        )
+        .properties(height=300)
+        .to_dict()
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def demanda_spec(h: str, _df: pd.DataFrame) -> dict:
+    # 1) Detectar/crear la columna de bajas con nombre estable
+    posibles_bajas = ["bajas_tot", "bajas_totales", "bajas", "egresos"]
+    col_bajas = next((c for c in posibles_bajas if c in _df.columns), None)
+    if col_bajas is None:
+        _df = _df.assign(bajas_totales=(_df["tasa_bajas"] * _df["alumnos_totales"]).round().astype(int))
+        col_bajas = "bajas_totales"
+
+    # 2) Renombrar a etiquetas EXACTAS que usaremos en la paleta
+    plot_df = _df[["anio", "Demanda", "nuevos_candidatos", "admitidos", col_bajas]].rename(
+        columns={
+            "Demanda": "Demanda potencial",
+            "nuevos_candidatos": "Candidatos",
+            "admitidos": "Aceptados",
+            col_bajas: "Bajas",
+        }
+    )
+
+    # 3) A formato largo
+    long_df = plot_df.melt(id_vars="anio", var_name="Serie", value_name="Valor")
+
+    # 4) Paleta de colores específica (celeste, azul, verde, rojo)
+    colores = alt.Scale(
+        domain=["Demanda potencial", "Candidatos", "Aceptados", "Bajas"],
+        range=["#0288D1", "#4FC3F7", "#2E7D32", "#D32F2F"]
+    )
+
+    # 5) Gráfico con líneas + puntos
+    return (
+        alt.Chart(long_df)
+        .mark_line(point=True, strokeWidth=2)
+        .encode(
+            x=alt.X("anio:O", title="Año"),
+            y=alt.Y("Valor:Q", title="Cantidad"),
+            color=alt.Color("Serie:N", scale=colores, title="Serie"),
+            tooltip=["anio", "Serie", "Valor"],
+        )
+        .properties(height=340)
+        .to_dict()
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def heatmap_spec(h: str, show_numbers: bool, _G: np.ndarray, _anios: list, _grade_names: list) -> dict:
+    # Orden deseado de cursos (de abajo a arriba)
+    ideal_grades = ["K3", "K4", "K5"] + [f"G{g}" for g in range(1, 13)]
+    # Mantener sólo los grados disponibles, en el orden correcto
+    ordered = [g for g in ideal_grades if g in _grade_names]
+
+    # Construir DataFrame largo
+    heat_df = pd.DataFrame(_G, columns=_grade_names).reindex(columns=ordered)
+    heat_df["Año"] = _anios
+    long_df = heat_df.melt(id_vars="Año", var_name="Curso", value_name="Alumnos")
+    # Forzar orden en eje Y invertido (K3 abajo, G12 arriba)
+    long_df["Curso"] = pd.Categorical(long_df["Curso"], categories=ordered, ordered=True)
+
+    # Dominio explícito de años para alinear heatmap y totalizador
+    years_domain = list(_anios)
+
+    # --- HEATMAP ---
+    heat = (
+        alt.Chart(long_df)
+        .mark_rect()
+        .encode(
+            x=alt.X("Año:O", title="Año", sort=years_domain, scale=alt.Scale(domain=years_domain)),
+            y=alt.Y("Curso:O", title="Curso", sort=ordered[::-1]),  # invertido: kinder abajo
+            color=alt.Color("Alumnos:Q", title="Alumnos"),
+            tooltip=["Año", "Curso", "Alumnos"]
+        )
+        .properties(height=420)
+    )
+
+    # Capa de etiquetas (números por celda)
+    labels = (
+        alt.Chart(long_df)
+        .mark_text(baseline="middle", align="center", fontSize=11)
+        .encode(
+            x=alt.X("Año:O", sort=years_domain),
+            y=alt.Y("Curso:O", sort=ordered[::-1]),
+            text=alt.Text("Alumnos:Q", format=".0f"),
+            # Si querés contraste dinámico, podés condicionar el color según 'Alumnos'
+            color=alt.value("black"),
+            tooltip=["Año", "Curso", "Alumnos"]
+        )
+    )
+
+    heatmap_chart = heat + labels if show_numbers else heat
+
+    # --- TOTALIZADOR POR COLUMNA (suma de todos los cursos por año) ---
+    totals_df = (
+        long_df.groupby("Año", as_index=False)["Alumnos"].sum()
+        .rename(columns={"Alumnos": "Total alumnos"})
+    )
+
+    bars = (
+        alt.Chart(totals_df)
+        .mark_bar()
+        .encode(
+            x=alt.X("Año:O", sort=years_domain, scale=alt.Scale(domain=years_domain)),
+            y=alt.Y("Total alumnos:Q", title="Total alumnos"),
+            tooltip=["Año", "Total alumnos"]
+        )
+        .properties(height=160)
+    )
+
+    bars_labels = (
+        alt.Chart(totals_df)
+        .mark_text(dy=-8, fontSize=11)
+        .encode(
+            x=alt.X("Año:O", sort=years_domain),
+            y="Total alumnos:Q",
+            text=alt.Text("Total alumnos:Q", format=".0f")
+        )
+    )
+
+    totalizer_chart = bars + bars_labels
+
+    # Heatmap arriba + totalizador abajo
+    return alt.vconcat(heatmap_chart, totalizer_chart).resolve_scale(x='shared').to_dict()
+
+
 st.title("Simulador de Sistema Escolar • Calidad, Demanda y Capacidad")
 
 with st.sidebar:
     st.markdown("### 🎛️ Presets de escenarios")
-    preset = st.selectbox("Elegí un escenario", [
-        "Personalizado",
-        "Exitoso",
-        "Estable",
-        "Pérdida por precio alto",
-        "Pérdida por baja calidad"
-    ])
+    preset = st.selectbox("Elegí un escenario", ["Personalizado"] + list(PRESETS))
+    comparar = st.checkbox("Comparar presets + personalizado", False,
+                           help="Corre los 4 presets y el escenario personalizado en un solo lote y los superpone.")
     
     st.header("Parámetros")
     with st.expander("⏳ Horizonte y Estado inicial", expanded=True):
@@ -96,77 +303,7 @@ with st.sidebar:
             extra_div_k5_per_year = st.number_input("Aulas extra por año en K5", 0, 20, 0, 1)
             extra_div_g1_per_year = st.number_input("Aulas extra por año en G1", 0, 20, 0, 1)
 
-# ---- Aplicar preset (sobrescribe variables leídas de sliders) ----
-if preset == "Exitoso":
-    prop_mkt = 0.10
-    k_calidad_candidatos = 1.0
-    cuota_mensual = ref_precio * 1.0
-    k_precio_cac = 0.3
-    tasa_bajas_base = 0.03
-    k_bajas_calidad = 0.10
-    calidad_base = 0.8
-    k_hacinamiento = 1.2
-    gamma_hacinamiento = 1.3
-    cupo_optimo = 25
-    cupo_maximo = 30
-    trigger_auto_aula = True
-    politica_seleccion = 0.7
-    beta_demanda_calidad = 15.0
-    delta_demanda_saturacion = 0.03
-
-elif preset == "Estable":
-    prop_mkt = 0.05
-    k_calidad_candidatos = 0.8
-    cuota_mensual = ref_precio * 1.0
-    k_precio_cac = 0.5
-    tasa_bajas_base = 0.04
-    k_bajas_calidad = 0.12
-    calidad_base = 0.7
-    k_hacinamiento = 1.0
-    gamma_hacinamiento = 1.3
-    cupo_optimo = 25
-    cupo_maximo = 30
-    trigger_auto_aula = True
-    politica_seleccion = 0.7
-    beta_demanda_calidad = 10.0
-    delta_demanda_saturacion = 0.05
-
-elif preset == "Pérdida por precio alto":
-    prop_mkt = 0.04
-    k_calidad_candidatos = 0.6
-    cuota_mensual = ref_precio * 1.4
-    k_precio_cac = 0.8
-    tasa_bajas_base = 0.05
-    k_bajas_calidad = 0.14
-    calidad_base = 0.65
-    k_hacinamiento = 0.9
-    gamma_hacinamiento = 1.3
-    cupo_optimo = 25
-    cupo_maximo = 30
-    trigger_auto_aula = False
-    politica_seleccion = 0.8
-    beta_demanda_calidad = 8.0
-    delta_demanda_saturacion = 0.08
-
-elif preset == "Pérdida por baja calidad":
-    prop_mkt = 0.03
-    k_calidad_candidatos = 0.4
-    cuota_mensual = ref_precio * 0.95
-    k_precio_cac = 0.4
-    tasa_bajas_base = 0.06
-    k_bajas_calidad = 0.20
-    calidad_base = 0.5
-    k_hacinamiento = 1.4
-    gamma_hacinamiento = 1.5
-    cupo_optimo = 22
-    cupo_maximo = 28
-    trigger_auto_aula = False
-    politica_seleccion = 0.9
-    beta_demanda_calidad = 6.0
-    delta_demanda_saturacion = 0.10
-
-
-p = Params(
+p_custom = Params(
     anios=anios, alumnos_inicial_por_grado=alumnos_inicial_por_grado,
     demanda_inicial=demanda_inicial, divisiones_iniciales=divisiones_iniciales,
     cupo_optimo=cupo_optimo, cupo_maximo=cupo_maximo, capex_aula=capex_aula,
@@ -191,14 +328,19 @@ p = Params(
     extra_div_k5_per_year=extra_div_k5_per_year, extra_div_g1_per_year=extra_div_g1_per_year,
 )
 
-df, extras = simulate(p)
+# ---- Aplicar preset (sobrescribe los valores leídos de sliders) ----
+p = aplicar_preset(p_custom, preset)
+h = params_hash(p)
+
+# Memoizado por hash de Params: un rerun que sólo cambia la vista no recalcula
+df, extras = cached_simulate(p)
 
 # --- BLOQUE NUEVO: pestañas de visualización ---
 tabs = st.tabs([
     "📈 Evolución general",
     "💰 Finanzas",
     "🎓 Distribución por curso"
-])
+] + (["🆚 Comparar escenarios"] if comparar else []))
 
 # --- 📈 TAB 1: Evolución general ---
 with tabs[0]:
@@ -216,59 +358,16 @@ with tabs[0]:
     c4.metric("Margen (último año)", f"{marg_fin:,.0f}", delta=f"{(marg_fin - marg_ini):+,.0f}")
 
     st.subheader("Evolución de alumnos")
-    st.line_chart(df.set_index("anio")[["alumnos_totales"]])
+    st.vega_lite_chart(lineas_spec(h, "alumnos", df.set_index("anio")[["alumnos_totales"]]),
+                       use_container_width=True)
 
     st.subheader("Calidad vs Tasa de bajas")
-    st.line_chart(df.set_index("anio")[["calidad","tasa_bajas"]])
+    st.vega_lite_chart(lineas_spec(h, "calidad_bajas", df.set_index("anio")[["calidad","tasa_bajas"]]),
+                       use_container_width=True)
     
 
-    import altair as alt
-    
     st.subheader("Demanda, candidatos, aceptados y bajas")
-    
-    # 1) Detectar/crear la columna de bajas con nombre estable
-    posibles_bajas = ["bajas_tot", "bajas_totales", "bajas", "egresos"]
-    col_bajas = next((c for c in posibles_bajas if c in df.columns), None)
-    if col_bajas is None:
-        df["bajas_totales"] = (df["tasa_bajas"] * df["alumnos_totales"]).round().astype(int)
-        col_bajas = "bajas_totales"
-    
-    # 2) Renombrar a etiquetas EXACTAS que usaremos en la paleta
-    plot_df = df[["anio", "Demanda", "nuevos_candidatos", "admitidos", col_bajas]].rename(
-        columns={
-            "Demanda": "Demanda potencial",
-            "nuevos_candidatos": "Candidatos",
-            "admitidos": "Aceptados",
-            col_bajas: "Bajas",
-        }
-    )
-    
-    # 3) A formato largo
-    long_df = plot_df.melt(id_vars="anio", var_name="Serie", value_name="Valor")
-    
-    # (Diagnóstico rápido: mostrará las series que ve Altair)
-    # st.write("Series detectadas:", long_df["Serie"].unique().tolist())
-    
-    # 4) Paleta de colores específica (celeste, azul, verde, rojo)
-    colores = alt.Scale(
-        domain=["Demanda potencial", "Candidatos", "Aceptados", "Bajas"],
-        range=["#0288D1", "#4FC3F7", "#2E7D32", "#D32F2F"]
-    )
-    
-    # 5) Gráfico con líneas + puntos
-    chart = (
-        alt.Chart(long_df)
-        .mark_line(point=True, strokeWidth=2)
-        .encode(
-            x=alt.X("anio:O", title="Año"),
-            y=alt.Y("Valor:Q", title="Cantidad"),
-            color=alt.Color("Serie:N", scale=colores, title="Serie"),
-            tooltip=["anio", "Serie", "Valor"],
-        )
-        .properties(height=340)
-    )
-    
-    st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(demanda_spec(h, df), use_container_width=True)
 
 
 # --- 💰 TAB 2: Finanzas ---
@@ -287,104 +386,58 @@ with tabs[1]:
         .set_index("anio")
     )
 
-    st.line_chart(fin_df)
+    st.vega_lite_chart(lineas_spec(h, "finanzas", fin_df), use_container_width=True)
 
 
 # --- 🎓 TAB 3: Distribución de alumnos por curso (heatmap con etiquetas + total por año) ---
 with tabs[2]:
-    import altair as alt
-
     st.subheader("Distribución de alumnos por curso")
 
-    # Orden deseado de cursos (de abajo a arriba)
-    ideal_grades = ["K3", "K4", "K5"] + [f"G{g}" for g in range(1, 13)]
-
     # Tomar nombres reales desde el modelo (si vienen) o inferir por ancho de G
     grade_names = extras.get("grade_names", None)
     if grade_names is None:
         ncols = extras["G"].shape[1]
-        grade_names = ideal_grades[:] if ncols == 15 else [f"G{g}" for g in range(1, 13)]
-
-    # Mantener sólo los grados disponibles, en el orden correcto
-    ordered = [g for g in ideal_grades if g in grade_names]
-
-    # Construir DataFrame largo
-    G = extras["G"]  # (anios x N_GRADES), ya redondeado a enteros si aplicaste el patch de modelo
-    heat_df = pd.DataFrame(G, columns=grade_names).reindex(columns=ordered)
-    heat_df["Año"] = df["anio"]
-    long_df = heat_df.melt(id_vars="Año", var_name="Curso", value_name="Alumnos")
-    # Forzar orden en eje Y invertido (K3 abajo, G12 arriba)
-    long_df["Curso"] = pd.Categorical(long_df["Curso"], categories=ordered, ordered=True)
-
-    # Dominio explícito de años para alinear heatmap y totalizador
-    years_domain = list(df["anio"].tolist())
+        grade_names = (["K3", "K4", "K5"] if ncols == 15 else []) + [f"G{g}" for g in range(1, 13)]
 
     # Toggle para mostrar/ocultar números en cada celda (por si hay muchos)
     show_numbers = st.checkbox("Mostrar números en cada celda", value=True)
 
-    # --- HEATMAP ---
-    heat = (
-        alt.Chart(long_df)
-        .mark_rect()
-        .encode(
-            x=alt.X("Año:O", title="Año", sort=years_domain, scale=alt.Scale(domain=years_domain)),
-            y=alt.Y("Curso:O", title="Curso", sort=ordered[::-1]),  # invertido: kinder abajo
-            color=alt.Color("Alumnos:Q", title="Alumnos"),
-            tooltip=["Año", "Curso", "Alumnos"]
-        )
-        .properties(height=420)
-    )
-
-    # Capa de etiquetas (números por celda)
-    labels = (
-        alt.Chart(long_df)
-        .mark_text(baseline="middle", align="center", fontSize=11)
-        .encode(
-            x=alt.X("Año:O", sort=years_domain),
-            y=alt.Y("Curso:O", sort=ordered[::-1]),
-            text=alt.Text("Alumnos:Q", format=".0f"),
-            # Si querés contraste dinámico, podés condicionar el color según 'Alumnos'
-            color=alt.value("black"),
-            tooltip=["Año", "Curso", "Alumnos"]
-        )
-    )
-
-    heatmap_chart = heat + (labels if show_numbers else alt.Chart())
+    # Spec cacheado por hash de Params (y el toggle)
+    st.vega_lite_chart(heatmap_spec(h, show_numbers, extras["G"], df["anio"].tolist(), list(grade_names)),
+                       use_container_width=True)
 
-    # --- TOTALIZADOR POR COLUMNA (suma de todos los cursos por año) ---
-    totals_df = (
-        long_df.groupby("Año", as_index=False)["Alumnos"].sum()
-        .rename(columns={"Alumnos": "Total alumnos"})
-    )
 
-    bars = (
-        alt.Chart(totals_df)
-        .mark_bar()
-        .encode(
-            x=alt.X("Año:O", sort=years_domain, scale=alt.Scale(domain=years_domain)),
-            y=alt.Y("Total alumnos:Q", title="Total alumnos"),
-            tooltip=["Año", "Total alumnos"]
-        )
-        .properties(height=160)
-    )
+# --- 🆚 TAB 4: Presets + personalizado superpuestos (un solo lote, cacheado) ---
+if comparar:
+    with tabs[3]:
+        st.subheader("Comparación de escenarios")
+        escenarios = [("Personalizado", p_custom)] + [(n, aplicar_preset(p_custom, n)) for n in PRESETS]
+        claves = tuple((nombre, params_hash(par)) for nombre, par in escenarios)
+        cmp_df = comparar_escenarios(claves, [par for _, par in escenarios])
 
-    bars_labels = (
-        alt.Chart(totals_df)
-        .mark_text(dy=-8, fontSize=11)
-        .encode(
-            x=alt.X("Año:O", sort=years_domain),
-            y="Total alumnos:Q",
-            text=alt.Text("Total alumnos:Q", format=".0f")
-        )
-    )
+        for columna, titulo in [("alumnos_totales", "Alumnos"), ("calidad", "Calidad"),
+                                ("resultado", "Resultado")]:
+            st.markdown(f"**{titulo}**")
+            st.vega_lite_chart(comparacion_spec(claves, columna, titulo, cmp_df), use_container_width=True)
 
-    totalizer_chart = bars + bars_labels
+        st.markdown("**Último año**")
+        ultimo = cmp_df[cmp_df["anio"] == cmp_df["anio"].max()].set_index("escenario")
+        st.dataframe(ultimo[["alumnos_totales", "calidad", "AulasTotales", "facturacion", "resultado"]])
 
-    # --- Mostrar verticalmente: heatmap arriba + totalizador abajo ---
-    st.altair_chart(alt.vconcat(heatmap_chart, totalizer_chart).resolve_scale(x='shared'), use_container_width=True)
-    
 
 with st.expander("📊 Ver tabla completa"):
     st.dataframe(df)
 
+with st.expander("🛠️ Debug: tiempos por fase del paso anual"):
+    if st.checkbox("Perfilar la simulación (corre sin cache)", False):
+        prof = PhaseProfiler()
+        simulate(p, profiler=prof)
+        resumen = prof.summary()
+        st.bar_chart(resumen.set_index("fase")["tiempo_s"])
+        st.dataframe(resumen)
+        por_anio = prof.to_frame()
+        st.dataframe(por_anio.pivot(index="anio", columns="fase", values="tiempo_s"))
+        st.download_button("Descargar CSV", por_anio.to_csv(index=False), "perfil_fases.csv", "text/csv")
+        st.download_button("Descargar JSON", json.dumps(prof.to_dict()), "perfil_fases.json", "application/json")
+
 st.caption("Consejo: si 'Admitidos < Admitidos deseados' y la capacidad está limitando, activa 'Construcción endógena' o sube el cupo/DivG1 para ver el efecto.")
@@ -0,0 +1,176 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import Params, simulate, simulate_batch, batch_to_frame, repeat_params, _numba_kernel
+
+# =====================================================================
+# Benchmarks de simulate / simulate_batch
+# =====================================================================
+# Uso:
+#   python bench_sim.py --out bench.json            # matriz completa
+#   python bench_sim.py --quick --out bench.json    # versión corta (CI)
+#   python bench_sim.py --compare base.json bench.json [--umbral 0.10]
+#
+# Cada caso se identifica por (tipo, backend, salida, anios, n) y registra
+# tiempo mínimo y mediano por llamada y el pico de memoria (tracemalloc) de
+# una llamada. El JSON incluye versiones y commit para comparar entre commits;
+# --compare sale con código 1 si algún caso empeoró más que el umbral.
+
+HORIZONTES = (10, 30, 100, 1000)
+LOTES = (1, 100, 1_000, 10_000, 100_000)
+MAX_CELDAS = 3_000_000       # tope de n * anios por caso de lote (memoria)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _medir(fn: Callable[[], Any], min_time: float, max_rep: int) -> Dict[str, Any]:
+    fn()   # calentamiento (compilación de numba, caches de pandas)
+    tiempos = []
+    t_total = time.perf_counter()
+    while len(tiempos) < max_rep and (not tiempos or time.perf_counter() - t_total < min_time):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "t_min": min(tiempos),
+        "t_med": statistics.median(tiempos),
+        "repeticiones": len(tiempos),
+        "pico_mem_mb": pico / 2**20,
+    }
+
+
+def casos(horizontes: Sequence[int], lotes: Sequence[int], backends: Sequence[str],
+          max_celdas: int = MAX_CELDAS) -> List[Dict[str, Any]]:
+    res = []
+    for anios in horizontes:
+        for backend in backends:
+            for salida in ("frame", "arrays"):
+                res.append({"tipo": "simulate", "backend": backend, "salida": salida, "anios": anios, "n": 1})
+    for anios in horizontes:
+        for n in lotes:
+            if n * anios > max_celdas:
+                continue
+            for salida in ("frame", "arrays"):
+                res.append({"tipo": "batch", "backend": "numpy", "salida": salida, "anios": anios, "n": n})
+    return res
+
+
+def _funcion(caso: Dict[str, Any]) -> Callable[[], Any]:
+    par = Params(anios=caso["anios"])
+    if caso["tipo"] == "simulate":
+        return lambda: simulate(par, backend=caso["backend"], output=caso["salida"])
+    cols = repeat_params(par, caso["n"])
+    if caso["salida"] == "frame":
+        return lambda: batch_to_frame(simulate_batch(cols))
+    return lambda: simulate_batch(cols)
+
+
+def clave(caso: Dict[str, Any]) -> str:
+    return f"{caso['tipo']}/{caso['backend']}/{caso['salida']}/anios={caso['anios']}/n={caso['n']}"
+
+
+def run(horizontes: Sequence[int] = HORIZONTES, lotes: Sequence[int] = LOTES,
+        backends: Optional[Sequence[str]] = None, min_time: float = 0.5, max_rep: int = 50,
+        max_celdas: int = MAX_CELDAS, verbose: bool = True) -> Dict[str, Any]:
+    """Corre la matriz de casos y devuelve {"meta": ..., "resultados": [...]}."""
+    if backends is None:
+        backends = ["python", "numpy"] + (["numba"] if _numba_kernel() is not None else [])
+    resultados = []
+    for caso in casos(horizontes, lotes, backends, max_celdas):
+        caso.update(_medir(_funcion(caso), min_time, max_rep))
+        caso["clave"] = clave(caso)
+        resultados.append(caso)
+        if verbose:
+            print(f"{caso['clave']:<45} {caso['t_min'] * 1e3:10.3f} ms  "
+                  f"{caso['pico_mem_mb']:9.1f} MB", flush=True)
+    meta = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+    }
+    return {"meta": meta, "resultados": resultados}
+
+
+def compare(base: Dict[str, Any], nuevo: Dict[str, Any], umbral: float = 0.10) -> List[Dict[str, Any]]:
+    """Compara t_min por clave. Devuelve una fila por caso en común con
+    ratio = nuevo / base y regresion=True si ratio > 1 + umbral."""
+    b = {r["clave"]: r for r in base["resultados"]}
+    filas = []
+    for r in nuevo["resultados"]:
+        if r["clave"] not in b:
+            continue
+        ratio = r["t_min"] / b[r["clave"]]["t_min"]
+        filas.append({
+            "clave": r["clave"],
+            "base_ms": b[r["clave"]]["t_min"] * 1e3,
+            "nuevo_ms": r["t_min"] * 1e3,
+            "ratio": ratio,
+            "mem_ratio": r["pico_mem_mb"] / max(b[r["clave"]]["pico_mem_mb"], 1e-9),
+            "regresion": ratio > 1.0 + umbral,
+        })
+    return filas
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks de simulate / simulate_batch")
+    ap.add_argument("--out", help="archivo JSON de salida")
+    ap.add_argument("--quick", action="store_true", help="matriz reducida (anios<=100, n<=1000)")
+    ap.add_argument("--backends", help="lista separada por comas (por defecto: todos los disponibles)")
+    ap.add_argument("--min-time", type=float, default=0.5, help="segundos mínimos por caso")
+    ap.add_argument("--max-celdas", type=int, default=MAX_CELDAS, help="tope de n*anios en lotes")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NUEVO"), help="compara dos JSON")
+    ap.add_argument("--umbral", type=float, default=0.10, help="empeoramiento tolerado en --compare")
+    args = ap.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as fh:
+            base = json.load(fh)
+        with open(args.compare[1]) as fh:
+            nuevo = json.load(fh)
+        filas = compare(base, nuevo, args.umbral)
+        print(f"base {base['meta'].get('commit')} -> nuevo {nuevo['meta'].get('commit')}")
+        for f in filas:
+            marca = "  <-- REGRESION" if f["regresion"] else ""
+            print(f"{f['clave']:<45} {f['base_ms']:10.3f} -> {f['nuevo_ms']:10.3f} ms  "
+                  f"x{f['ratio']:.2f}{marca}")
+        return 1 if any(f["regresion"] for f in filas) else 0
+
+    horizontes, lotes = (HORIZONTES[:3], LOTES[:3]) if args.quick else (HORIZONTES, LOTES)
+    backends = args.backends.split(",") if args.backends else None
+    res = run(horizontes, lotes, backends, min_time=args.min_time, max_celdas=args.max_celdas)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(res, fh, indent=2)
+        print(f"Resultados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import Params, simulate, params_hash, json_default
+
+# =====================================================================
+# Cache de resultados de `simulate`, direccionado por hash de Params
+# =====================================================================
+# Dos niveles:
+#   1) memoria: LRU con tamaño máximo (OrderedDict + lock, seguro entre threads)
+#   2) disco (opcional): un .npz por escenario en cache_dir/v<CACHE_VERSION>/,
+#      sobrevive a reinicios del proceso
+# Subir CACHE_VERSION cuando cambie el modelo, para no leer resultados viejos de disco.
+
+CACHE_VERSION = 1
+
+
+class SimCache:
+    def __init__(self, maxsize: int = 256, cache_dir: Optional[str] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize debe ser > 0")
+        self.maxsize = maxsize
+        self.cache_dir = os.path.join(cache_dir, f"v{CACHE_VERSION}") if cache_dir else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._mem: "OrderedDict[str, Tuple[pd.DataFrame, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memoria": {"hits": 0, "misses": 0},
+            "disco": {"hits": 0, "misses": 0},
+        }
+
+    # --- API ---
+    def simulate(self, par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Igual que `simulate(par)`, pero reutiliza resultados ya calculados.
+        Devuelve copias: el llamador puede modificar df/extras sin ensuciar la cache."""
+        key = params_hash(par)
+        res = self._get_mem(key)
+        if res is None:
+            res = self._get_disk(key)
+            if res is None:
+                res = simulate(par)
+                self._put_disk(key, res)
+            self._put_mem(key, res)
+        return _copy(res)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    # --- Nivel memoria ---
+    def _get_mem(self, key: str):
+        with self._lock:
+            res = self._mem.get(key)
+            if res is None:
+                self.stats["memoria"]["misses"] += 1
+                return None
+            self._mem.move_to_end(key)
+            self.stats["memoria"]["hits"] += 1
+            return res
+
+    def _put_mem(self, key: str, res) -> None:
+        with self._lock:
+            self._mem[key] = res
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.maxsize:
+                self._mem.popitem(last=False)
+
+    # --- Nivel disco ---
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _get_disk(self, key: str):
+        if not self.cache_dir:
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as z:
+                cols = [str(c) for c in z["__columns__"]]
+                df = pd.DataFrame({c: z[f"col_{c}"] for c in cols})
+                params = json.loads(str(z["__params__"]))
+                extras = {"G": z["G"], "Div": z["Div"], "params": params}
+        except (OSError, KeyError, ValueError):
+            self.stats["disco"]["misses"] += 1
+            return None
+        self.stats["disco"]["hits"] += 1
+        return df, extras
+
+    def _put_disk(self, key: str, res) -> None:
+        if not self.cache_dir:
+            return
+        df, extras = res
+        params = extras["params"]
+        arrays = {f"col_{c}": df[c].to_numpy() for c in df.columns}
+        arrays["__columns__"] = np.array(list(df.columns))
+        arrays["__params__"] = np.array(json.dumps(params, default=json_default))
+        arrays["G"] = extras["G"]
+        arrays["Div"] = extras["Div"]
+        # Escritura atómica: archivo temporal + os.replace
+        tmp = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, **arrays)
+        os.replace(tmp, self._path(key))
+
+
+def _copy(res) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    df, extras = res
+    return df.copy(), {k: (v.copy() if isinstance(v, np.ndarray) else dict(v) if isinstance(v, dict) else v)
+                       for k, v in extras.items()}
+
+
+# Cache por defecto del proceso (la usa app_case.py). Con SIM_CACHE_DIR definido
+# se activa también el nivel en disco.
+default_cache = SimCache(maxsize=256, cache_dir=os.environ.get("SIM_CACHE_DIR") or None)
+
+
+def cached_simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    return default_cache.simulate(par)
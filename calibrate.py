@@ -0,0 +1,197 @@
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from optimize import SearchSpace, coordinate_search
+from simulate_case import Params, OUTPUT_COLUMNS, N_GRADES, SCHEDULE_FIELDS, is_scheduled, simulate_batch
+
+# =====================================================================
+# Calibración de Params contra datos históricos
+# =====================================================================
+# Datos observados (T años): "G" (T, N_GRADES) como extras["G"] y series de
+# OUTPUT_COLUMNS como "admitidos" o "bajas_totales" (T,). NaN = dato faltante.
+# Pérdida ponderada, cada componente normalizada por la escala de lo observado:
+#
+#   loss = Σ_c peso_c · mean((sim_c - obs_c)²) / escala_c²,   escala_c = RMS(obs_c)
+#
+# Se simula sin redondear conteos (bajas como tasa · alumnos) para que la
+# pérdida no tenga escalones.
+#
+# Búsqueda de optimize.py (`SearchSpace` + `coordinate_search`) en el cubo [0, 1]^d:
+#   1) muestra LHS (más el punto base) evaluada en lote
+#   2) multi-start: los `n_starts` mejores puntos distintos arrancan cada uno
+#      una búsqueda por coordenadas; los pasos de todos los arranques van en el
+#      mismo lote.
+# Los lotes grandes se reparten en bloques sobre un ProcessPoolExecutor; los
+# workers devuelven sólo la pérdida de cada escenario.
+
+PESOS_DEFAULT = {"G": 1.0}       # el resto de las series observadas pesa 1.0
+
+
+def _serie(out: Dict[str, np.ndarray], c: str) -> np.ndarray:
+    if c == "G":
+        return out["G"]
+    if c == "bajas_totales":
+        return out["tasa_bajas"] * out["alumnos_totales"]
+    if c == "egresados":
+        # Igual que el motor en lote, sin redondear
+        eg = np.zeros_like(out["alumnos_totales"], dtype=float)
+        eg[:, 1:] = np.maximum(out["G"][:, :-1, -1] * (1.0 - out["tasa_bajas"][:, :-1]), 0.0)
+        return eg
+    return out[c]
+
+
+def _componentes(out: Dict[str, np.ndarray], obs: Mapping[str, np.ndarray],
+                 escalas: Mapping[str, float]) -> Dict[str, np.ndarray]:
+    # Error cuadrático medio normalizado de cada componente, por escenario (n,)
+    res = {}
+    for c, o in obs.items():
+        sim = _serie(out, c)
+        d = (sim - o) / escalas[c]
+        mask = ~np.isnan(o)
+        d = np.where(mask, d, 0.0)
+        ejes = tuple(range(1, d.ndim))
+        res[c] = (d ** 2).sum(axis=ejes) / max(int(mask.sum()), 1)
+    return res
+
+
+def _loss_chunk(cols: Dict[str, np.ndarray], obs: Mapping[str, np.ndarray],
+                pesos: Mapping[str, float], escalas: Mapping[str, float]) -> np.ndarray:
+    # Corre en el worker: devuelve sólo la pérdida total de cada escenario
+    out = simulate_batch(cols, round_counts=False)
+    comp = _componentes(out, obs, escalas)
+    return sum(pesos[c] * v for c, v in comp.items())
+
+
+@dataclass
+class CalibResult:
+    params: Params                                  # mejor ajuste
+    x: Dict[str, Any]                               # valores calibrados
+    loss: float
+    componentes: Dict[str, float]                   # aporte (ya ponderado) de cada serie
+    residuos: Dict[str, np.ndarray]                 # simulado - observado, por serie
+    starts: List[Tuple[Dict[str, Any], float]]      # (x, loss) final de cada arranque
+    n_evals: int
+    wall_time: float
+    history: List[Tuple[int, float]] = field(default_factory=list)   # (n_evals, mejor loss)
+
+
+def _observados(observed: Mapping[str, Any]) -> Tuple[Dict[str, np.ndarray], int]:
+    validas = set(OUTPUT_COLUMNS) - {"anio"} | {"G"}
+    unknown = set(observed) - validas
+    if unknown:
+        raise ValueError(f"Series observadas desconocidas: {sorted(unknown)}")
+    if not observed:
+        raise ValueError("No hay datos observados")
+    obs = {c: np.asarray(v, dtype=float) for c, v in observed.items()}
+    largos = {v.shape[0] for v in obs.values()}
+    if len(largos) != 1:
+        raise ValueError(f"Las series observadas tienen largos distintos: {sorted(largos)}")
+    if "G" in obs and obs["G"].shape[1:] != (N_GRADES,):
+        raise ValueError(f"'G' debe tener forma (anios, {N_GRADES}) (forma {obs['G'].shape})")
+    return obs, largos.pop()
+
+
+def _base_con_horizonte(base: Params, T: int) -> Params:
+    # `base` con anios = T años observados. Los calendarios en lista se recortan a
+    # los primeros T años (los dict por escalones valen para cualquier horizonte);
+    # uno más corto que los datos no alcanza para simularlos.
+    cambios: Dict[str, Any] = {"anios": T}
+    for name in SCHEDULE_FIELDS:
+        v = getattr(base, name)
+        if not is_scheduled(v) or isinstance(v, Mapping):
+            continue
+        if len(v) < T:
+            raise ValueError(f"El calendario de '{name}' en base tiene {len(v)} años y los datos "
+                             f"observados {T}: extenderlo o pasarlo como dict por escalones")
+        cambios[name] = list(v[:T]) if isinstance(v, list) else np.asarray(v)[:T]
+    return replace(base, **cambios)
+
+
+def calibrate(observed: Mapping[str, Any], space: Mapping[str, Tuple[float, float]],
+              base: Optional[Params] = None, pesos: Optional[Mapping[str, float]] = None,
+              n_starts: int = 4, n_init: int = 512, max_evals: int = 50_000, tol: float = 1e-3,
+              n_random_dirs: int = 8, seed: Optional[int] = None,
+              max_workers: Optional[int] = 1, chunk_size: int = 2048) -> CalibResult:
+    """Ajusta los campos de `space` (campo -> (min, max)) para que la simulación
+    reproduzca `observed` (dict serie -> array, ver arriba). Los campos no
+    incluidos toman el valor de `base`; `anios` se toma del largo de los datos
+    (los calendarios en lista de `base` se recortan a esos años).
+
+    pesos: serie -> peso en la pérdida (por defecto 1.0 cada una).
+    n_starts: arranques de la búsqueda local (multi-start).
+    max_workers: 1 evalúa en el proceso actual; si no, ProcessPoolExecutor por
+      bloques de `chunk_size` escenarios.
+    """
+    t0 = time.perf_counter()
+    if "anios" in space:
+        raise ValueError("'anios' se fija con el largo de los datos observados")
+    obs, T = _observados(observed)
+    base = _base_con_horizonte(base or Params(), T)
+    pesos = {c: float((pesos or {}).get(c, PESOS_DEFAULT.get(c, 1.0))) for c in obs}
+    escalas = {}
+    for c, o in obs.items():
+        rms = np.sqrt(np.nanmean(o ** 2)) if np.any(~np.isnan(o)) else 0.0
+        escalas[c] = float(rms) if rms > 0 else 1.0
+
+    def evaluar(cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray]:
+        n = len(next(iter(cols.values())))
+        bloques = [{k: v[s:s + chunk_size] for k, v in cols.items()} for s in range(0, n, chunk_size)]
+        if pool is None or len(bloques) == 1:
+            partes = [_loss_chunk(b, obs, pesos, escalas) for b in bloques]
+        else:
+            partes = list(pool.map(_loss_chunk, bloques, *([x] * len(bloques) for x in (obs, pesos, escalas))))
+        return (np.concatenate(partes),)
+
+    sp = SearchSpace(space, base, evaluar, peor=(np.inf,), max_evals=max_evals)
+    pool: Optional[Executor] = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+    try:
+        rng = np.random.default_rng(seed)
+        U0 = sp.lhs(max(min(n_init, max_evals), 1), rng)     # incluye el punto base
+        X, V, hist = coordinate_search(sp, U0, lambda v: v, rng, n_starts=n_starts, tol=tol,
+                                       n_random_dirs=n_random_dirs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    F = np.array([v[0] for v in V])
+
+    mejor = int(np.argmin(F))
+    x = sp.x(X[mejor])
+    params = replace(base, **x)
+    out = simulate_batch([params], round_counts=False)
+    comp = _componentes(out, obs, escalas)
+    starts = [(sp.x(X[s]), float(F[s])) for s in range(len(F))]
+    return CalibResult(
+        params=params,
+        x=x,
+        loss=float(F[mejor]),
+        componentes={c: float(pesos[c] * v[0]) for c, v in comp.items()},
+        residuos={c: _serie(out, c)[0] - o for c, o in obs.items()},
+        starts=starts,
+        n_evals=sp.n_evals,
+        wall_time=time.perf_counter() - t0,
+        history=[(n, v[0]) for n, v in hist],
+    )
+
+
+if __name__ == "__main__":
+    # Datos sintéticos: simulamos un escenario "real" y lo recuperamos
+    real = Params(anios=10, cuota_mensual=320, prop_mkt=0.08, calidad_base=0.75, tasa_bajas_base=0.05,
+                  k_bajas_calidad=0.2, politica_seleccion=0.6, cac_base=250, beta_demanda_calidad=14)
+    ref = simulate_batch([real], round_counts=False)
+    observed = {"G": np.round(ref["G"][0]), "admitidos": np.round(ref["admitidos"][0]),
+                "bajas_totales": np.round(ref["tasa_bajas"][0] * ref["alumnos_totales"][0])}
+    space = {
+        "prop_mkt": (0.0, 0.2), "calidad_base": (0.4, 0.95), "tasa_bajas_base": (0.0, 0.1),
+        "k_bajas_calidad": (0.0, 0.4), "politica_seleccion": (0.3, 1.0), "cac_base": (100, 500),
+        "beta_demanda_calidad": (0, 30), "k_calidad_candidatos": (0.0, 2.0), "k_saturacion": (0.0, 2.0),
+        "alpha_calidad": (0.1, 0.9), "k_hacinamiento": (0.0, 2.0), "k_bajas_precio": (0.0, 0.3),
+        "delta_demanda_saturacion": (0.0, 0.2), "tasa_cont_k_to_g1": (0.7, 1.0), "k_precio_cac": (0.0, 1.0),
+    }
+    res = calibrate(observed, space, base=Params(cuota_mensual=320), seed=0)
+    print(f"loss={res.loss:.3g} evals={res.n_evals} tiempo={res.wall_time:.1f}s")
+    print(res.componentes)
+    print({k: round(v, 3) for k, v in res.x.items()})
@@ -0,0 +1,211 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from simulate_case import Params, GRADE_NAMES, OUTPUT_COLUMNS, PARAM_FIELDS, PARAM_TYPES, simulate_batch, validate_params
+
+# =====================================================================
+# Corredor por línea de comandos (sin Streamlit ni pandas)
+# =====================================================================
+# Lee escenarios (dicts campo -> valor de Params; los campos que faltan toman el
+# valor por defecto) de archivos JSON / JSON-lines / YAML / CSV o de stdin, los
+# corre con `simulate_batch` (agrupados por `anios`) y escribe una fila por
+# escenario y año en CSV, JSON-lines o Parquet:
+#
+#   python cli.py escenarios.json -o resultados.csv
+#   cat escenarios.jsonl | python cli.py --columns anio,alumnos_totales,resultado
+#   python cli.py plan.yaml barrido.csv --grados -o resultados.parquet
+#
+# Sólo importa NumPy y el núcleo de simulate_case; PyYAML y pyarrow se cargan
+# recién si se usan (entrada YAML / salida Parquet).
+
+FORMATOS_ENTRADA = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl",
+                    ".yaml": "yaml", ".yml": "yaml", ".csv": "csv"}
+FORMATOS_SALIDA = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+G_COLUMNS = [f"G_{g}" for g in GRADE_NAMES]     # mismos nombres que store.py
+
+
+class CLIError(Exception):
+    pass
+
+
+def _valor_csv(campo: str, texto: str) -> Any:
+    # Celdas de CSV: calendarios como JSON ("[...]" o "{...}"), el resto según el tipo del campo
+    texto = texto.strip()
+    if texto[:1] in "[{":
+        return json.loads(texto)
+    tipo = PARAM_TYPES[campo]
+    if tipo is bool:
+        if texto.lower() in ("1", "true", "si", "sí", "yes"):
+            return True
+        if texto.lower() in ("0", "false", "no"):
+            return False
+        raise CLIError(f"Valor booleano inválido para '{campo}': {texto!r}")
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise CLIError(f"Valor numérico inválido para '{campo}': {texto!r}") from None
+    if tipo is int:
+        if not valor.is_integer():
+            raise CLIError(f"'{campo}' debe ser entero (llegó {texto!r})")
+        return int(valor)
+    return valor
+
+
+def parse_escenarios(texto: str, formato: str) -> List[Dict[str, Any]]:
+    """Convierte el contenido de un archivo en una lista de dicts de Params."""
+    if formato == "json":
+        datos = json.loads(texto)
+        filas = datos if isinstance(datos, list) else [datos]
+    elif formato == "jsonl":
+        filas = [json.loads(l) for l in texto.splitlines() if l.strip()]
+    elif formato == "yaml":
+        try:
+            import yaml
+        except ImportError:
+            raise CLIError("La entrada YAML requiere PyYAML (pip install pyyaml)") from None
+        filas = []
+        for doc in yaml.safe_load_all(texto):
+            filas.extend(doc if isinstance(doc, list) else [doc] if doc is not None else [])
+    elif formato == "csv":
+        filas = []
+        for fila in csv.DictReader(io.StringIO(texto)):
+            desconocidos = set(fila) - set(PARAM_FIELDS)
+            if desconocidos:
+                raise CLIError(f"Campos desconocidos en Params: {sorted(map(str, desconocidos))}")
+            filas.append({c: _valor_csv(c, v) for c, v in fila.items() if v is not None and v.strip()})
+    else:
+        raise CLIError(f"Formato de entrada desconocido: {formato!r}")
+    for fila in filas:
+        if not isinstance(fila, dict):
+            raise CLIError(f"Cada escenario debe ser un objeto campo -> valor (llegó {type(fila).__name__})")
+    return filas
+
+
+def _detectar_stdin(texto: str) -> str:
+    # JSON (objeto o lista) o JSON-lines; el resto hay que indicarlo con --in-format
+    try:
+        json.loads(texto)
+        return "json"
+    except ValueError:
+        return "jsonl"
+
+
+def leer_escenarios(entradas: Sequence[str], formato: Optional[str] = None) -> List[Params]:
+    """Lee escenarios de cada archivo (o "-" = stdin) y los valida como Params
+    con `validate_params` (los mismos tipos estrictos que service.py)."""
+    filas: List[Dict[str, Any]] = []
+    for ruta in entradas or ["-"]:
+        if ruta == "-":
+            texto = sys.stdin.read()
+            fmt = formato or _detectar_stdin(texto)
+        else:
+            fmt = formato or FORMATOS_ENTRADA.get(os.path.splitext(ruta)[1].lower())
+            if fmt is None:
+                raise CLIError(f"No se reconoce el formato de {ruta!r} (usar --in-format)")
+            with open(ruta, encoding="utf-8") as fh:
+                texto = fh.read()
+        filas.extend(parse_escenarios(texto, fmt))
+    params = []
+    for i, fila in enumerate(filas):
+        try:
+            params.append(validate_params(fila))
+        except ValueError as e:
+            raise CLIError(f"Escenario {i}: {e}") from None
+    return params
+
+
+def correr(params: Sequence[Params], columns: Optional[Sequence[str]] = None,
+           grados: bool = False) -> Dict[str, np.ndarray]:
+    """Corre los escenarios y devuelve columnas planas (una fila por escenario y
+    año, en el orden de entrada), con "escenario" como primera columna."""
+    columns = list(columns or OUTPUT_COLUMNS)
+    desconocidas = set(columns) - set(OUTPUT_COLUMNS)
+    if desconocidas:
+        raise CLIError(f"Columnas desconocidas: {sorted(desconocidas)}")
+    grupos: Dict[int, List[int]] = {}
+    for i, p in enumerate(params):
+        grupos.setdefault(p.anios, []).append(i)
+    partes = []
+    for anios, idx in grupos.items():
+        out = simulate_batch([params[i] for i in idx], columns=columns)
+        cols = {"escenario": np.repeat(np.asarray(idx), anios)}
+        cols.update((c, out[c].reshape(-1)) for c in columns)
+        if grados:
+            cols.update((g, out["G"][:, :, j].reshape(-1)) for j, g in enumerate(G_COLUMNS))
+        partes.append(cols)
+    if not partes:
+        return {}
+    plano = {c: np.concatenate([p[c] for p in partes]) for c in partes[0]}
+    orden = np.argsort(plano["escenario"], kind="stable")
+    return {c: v[orden] for c, v in plano.items()}
+
+
+def _filas(cols: Dict[str, np.ndarray]) -> Iterable[tuple]:
+    return zip(*(v.tolist() for v in cols.values()))
+
+
+def escribir(cols: Dict[str, np.ndarray], destino: Optional[str], formato: str) -> None:
+    """Escribe las columnas en CSV / JSON-lines (archivo o stdout) o Parquet."""
+    if formato == "parquet":
+        if destino is None:
+            raise CLIError("La salida Parquet requiere -o/--out")
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise CLIError("La salida Parquet requiere pyarrow (pip install pyarrow)") from None
+        pyarrow.parquet.write_table(pyarrow.table(cols), destino)
+        return
+    fh = sys.stdout if destino is None else open(destino, "w", encoding="utf-8", newline="")
+    try:
+        if formato == "csv":
+            w = csv.writer(fh, lineterminator="\n")
+            w.writerow(list(cols))
+            w.writerows(_filas(cols))
+        elif formato == "jsonl":
+            nombres = list(cols)
+            for fila in _filas(cols):
+                fh.write(json.dumps(dict(zip(nombres, fila))) + "\n")
+        else:
+            raise CLIError(f"Formato de salida desconocido: {formato!r}")
+    finally:
+        if destino is not None:
+            fh.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Corre escenarios de Params por lote (sin Streamlit)")
+    ap.add_argument("entradas", nargs="*", help="archivos .json/.jsonl/.yaml/.csv ('-' o vacío = stdin)")
+    ap.add_argument("--in-format", choices=sorted(set(FORMATOS_ENTRADA.values())),
+                    help="formato de entrada (por defecto según extensión; stdin: JSON o JSON-lines)")
+    ap.add_argument("-o", "--out", help="archivo de salida (por defecto stdout)")
+    ap.add_argument("--out-format", choices=sorted(set(FORMATOS_SALIDA.values())),
+                    help="formato de salida (por defecto según extensión; stdout: csv)")
+    ap.add_argument("--columns", help="columnas de salida separadas por comas (por defecto: todas)")
+    ap.add_argument("--grados", action="store_true", help="agrega la matrícula por grado (G_K3 ... G_G12)")
+    args = ap.parse_args(argv)
+
+    formato = args.out_format
+    if formato is None:
+        formato = FORMATOS_SALIDA.get(os.path.splitext(args.out)[1].lower(), "csv") if args.out else "csv"
+    try:
+        params = leer_escenarios(args.entradas, args.in_format)
+        if not params:
+            raise CLIError("No hay escenarios en la entrada")
+        columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+        escribir(correr(params, columns, args.grados), args.out, formato)
+    except (CLIError, ValueError, TypeError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
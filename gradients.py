@@ -0,0 +1,366 @@
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from simulate_case import (Params, PARAM_FIELDS, PARAM_TYPES, N_GRADES, GRADE_INDEX, ENTRY_INDEX,
+                           TRANSITION, SCHEDULE_FIELDS, is_scheduled, resolve_schedules)
+
+# =====================================================================
+# Derivadas en modo directo (forward) de las salidas respecto de Params
+# =====================================================================
+# Cada cantidad del paso anual viaja como Dual(v, d): el valor v y su tangente
+# d, con un eje extra de largo p (uno por campo elegido), así que una sola
+# pasada por los años da el Jacobiano entero (en vez de 2·p simulaciones por
+# diferencias finitas). Es el mismo paso que `simulate` / `simulate_batch`
+# con round_counts=False, para un escenario; test_gradients.py lo compara con
+# el motor en lote y con diferencias centradas (si cambia el paso anual, cambia acá).
+#
+# Política en puntos no diferenciables (subgradiente de la rama activa):
+#   - max(a, b) / min(a, b): derivada del argumento que gana; en empate, la del
+#     primero (a). clip(x, lo, hi) = min(max(x, lo), hi): dentro del rango
+#     (bordes incluidos) pasa la derivada de x, afuera es 0.
+#   - decisiones discretas (disparo de aula `build`, ramas "si alumnos <= 0",
+#     tope admitidos_max_abs, aulas manuales): quedan fijas en el valor
+#     realizado; el salto no se deriva (derivada a.e. de la rama tomada).
+#   - campos enteros (cupo_maximo, divisiones_iniciales, meses_cobro, ...) se
+#     tratan como continuos donde entran a las fórmulas.
+# `empates` cuenta cuántas veces un max/min se decidió por empate exacto: ahí
+# la derivada depende de la política y una diferencia finita puede no coincidir.
+# Campos booleanos o con calendario no se pueden elegir.
+
+SALIDAS_DEFAULT = ("resultado", "alumnos_totales", "calidad")
+OUTPUTS_DIFERENCIABLES = ("alumnos_totales", "calidad", "tasa_bajas", "admitidos", "Demanda", "Marketing",
+                          "facturacion", "costos_totales", "resultado")
+
+
+class Dual:
+    __slots__ = ("v", "d")
+    __array_ufunc__ = None      # que NumPy delegue en los operadores de Dual
+
+    def __init__(self, v: Any, d: Any):
+        self.v = np.asarray(v, dtype=float)
+        self.d = np.asarray(d, dtype=float)
+
+    def __add__(a, b):
+        if isinstance(b, Dual):
+            return Dual(a.v + b.v, a.d + b.d)
+        return Dual(a.v + b, a.d + np.zeros(np.shape(b) + (1,)))
+
+    __radd__ = __add__
+
+    def __neg__(a):
+        return Dual(-a.v, -a.d)
+
+    def __sub__(a, b):
+        return a + (-b)
+
+    def __rsub__(a, b):
+        return (-a) + b
+
+    def __mul__(a, b):
+        if isinstance(b, Dual):
+            return Dual(a.v * b.v, a.d * b.v[..., None] + a.v[..., None] * b.d)
+        b = np.asarray(b, dtype=float)
+        return Dual(a.v * b, a.d * b[..., None])
+
+    __rmul__ = __mul__
+
+    def __truediv__(a, b):
+        if isinstance(b, Dual):
+            q = a.v / b.v
+            return Dual(q, (a.d - q[..., None] * b.d) / b.v[..., None])
+        b = np.asarray(b, dtype=float)
+        return Dual(a.v / b, a.d / b[..., None])
+
+    def __rtruediv__(a, b):
+        q = np.asarray(b, dtype=float) / a.v
+        return Dual(q, -(q / a.v)[..., None] * a.d)
+
+    def __pow__(a, g):
+        # a > 0 (se usa con el hacinamiento, ya positivo)
+        if isinstance(g, Dual):
+            v = a.v ** g.v
+            return Dual(v, (g.v * a.v ** (g.v - 1.0))[..., None] * a.d + (v * np.log(a.v))[..., None] * g.d)
+        return Dual(a.v ** g, (g * a.v ** (g - 1.0))[..., None] * a.d)
+
+    def __getitem__(a, idx):
+        return Dual(a.v[idx], a.d[idx])
+
+    def sum(a) -> "Dual":
+        return Dual(a.v.sum(), a.d.sum(axis=-2))
+
+    def mean(a) -> "Dual":
+        return Dual(a.v.mean(), a.d.mean(axis=-2))
+
+
+def _v(x):
+    return x.v if isinstance(x, Dual) else np.asarray(x, dtype=float)
+
+
+def _d(x):
+    return x.d if isinstance(x, Dual) else 0.0
+
+
+class _Politica:
+    # max / min / clip con la política de subgradiente; cuenta empates
+    def __init__(self, p: int):
+        self.p = p
+        self.empates = 0
+
+    def _elegir(self, sel: np.ndarray, a, b) -> Dual:
+        v = np.where(sel, _v(a), _v(b))
+        d = np.where(sel[..., None], _d(a), _d(b))
+        return Dual(v, np.broadcast_to(d, v.shape + (self.p,)))
+
+    def max(self, a, b) -> Dual:
+        av, bv = _v(a), _v(b)
+        self.empates += int(np.count_nonzero(av == bv) if isinstance(a, Dual) or isinstance(b, Dual) else 0)
+        return self._elegir(av >= bv, a, b)
+
+    def min(self, a, b) -> Dual:
+        av, bv = _v(a), _v(b)
+        self.empates += int(np.count_nonzero(av == bv) if isinstance(a, Dual) or isinstance(b, Dual) else 0)
+        return self._elegir(av <= bv, a, b)
+
+    def clip(self, x, lo, hi) -> Dual:
+        return self.min(self.max(x, lo), hi)
+
+
+@dataclass
+class JacobianResult:
+    fields: List[str]
+    valores: Dict[str, np.ndarray]      # salida -> (anios,)
+    jacobiano: Dict[str, np.ndarray]    # salida -> (anios, p): d salida[año] / d campo
+    empates: int                        # max/min decididos por empate exacto
+    wall_time: float
+
+    def to_frame(self, salida: str):
+        """Jacobiano de `salida` como DataFrame (anio x campo)."""
+        import pandas as pd
+        return pd.DataFrame(self.jacobiano[salida], columns=self.fields).rename_axis("anio")
+
+
+def jacobian(par: Params, fields: Sequence[str],
+             salidas: Sequence[str] = SALIDAS_DEFAULT) -> JacobianResult:
+    """Valores y Jacobiano de `salidas` (por año) respecto de `fields`, en una
+    sola pasada en modo directo. Salidas disponibles: ver OUTPUTS_DIFERENCIABLES."""
+    t0 = time.perf_counter()
+    fields = list(fields)
+    unknown = set(fields) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+    malos = [f for f in fields if PARAM_TYPES[f] is bool or f == "anios"]
+    if malos:
+        raise ValueError(f"Campos no diferenciables: {malos}")
+    con_calendario = [f for f in fields if is_scheduled(getattr(par, f))]
+    if con_calendario:
+        raise ValueError(f"Campos con calendario no soportados: {con_calendario}")
+    faltan = set(salidas) - set(OUTPUTS_DIFERENCIABLES)
+    if faltan:
+        raise ValueError(f"Salidas no disponibles: {sorted(faltan)} (opciones: {', '.join(OUTPUTS_DIFERENCIABLES)})")
+
+    p = len(fields)
+    pol = _Politica(p)
+    valores = asdict(par)
+    sch = resolve_schedules(par)
+    anios = par.anios
+
+    def campo(nombre: str):
+        # Dual con tangente unitaria si el campo está elegido; si no, constante
+        if nombre in fields:
+            e = np.zeros(p)
+            e[fields.index(nombre)] = 1.0
+            return Dual(float(valores[nombre]), e)
+        return float(valores[nombre])
+
+    def anual(nombre: str, k: int):
+        # Campo con calendario: sólo escalares elegidos llevan tangente
+        if nombre in fields:
+            return campo(nombre)
+        return float(sch[nombre][k]) if nombre in SCHEDULE_FIELDS else float(valores[nombre])
+
+    def const(v) -> Dual:
+        v = np.asarray(v, dtype=float)
+        return Dual(v, np.zeros(v.shape + (p,)))
+
+    def como_dual(x) -> Dual:
+        return x if isinstance(x, Dual) else const(x)
+
+    meses = campo("meses_cobro")
+    cupo_max = campo("cupo_maximo")
+    cupo_opt = campo("cupo_optimo")
+    capex = campo("capex_aula")
+    gamma = campo("gamma_hacinamiento")
+    tasa_cont = campo("tasa_cont_k_to_g1")
+    ref_precio = pol.max(campo("ref_precio"), 1e-9)
+    iK5 = GRADE_INDEX["K5"]
+    entrada = ENTRY_INDEX
+
+    w = [pol.max(campo(f"prop_cand_{g}"), 0.0) for g in ("k3", "k4", "k5", "g1")]
+    wsum = w[0] + w[1] + w[2] + w[3]
+    if _v(wsum) <= 0:
+        w = [0.25] * 4
+    else:
+        w = [wi / wsum for wi in w]
+    blandos = sum(campo(f"k_{x}") * pol.clip(campo(f"nivel_{x}"), 0.0, 1.0)
+                  for x in ("articulacion", "comunicacion", "diferenciacion"))
+    extra = [sch[f"extra_div_{g}_per_year"] for g in ("k3", "k4", "k5", "g1")]
+
+    G = como_dual(campo("alumnos_inicial_por_grado") * np.ones(N_GRADES))
+    Div = como_dual(campo("divisiones_iniciales") * np.ones(N_GRADES))
+    alumnos0 = G.sum()
+    calidad_prev = como_dual(campo("calidad_base"))
+    Demanda = pol.max(campo("demanda_inicial"), alumnos0 + 50.0)
+    Marketing = pol.max(anual("mkt_floor", 0), anual("prop_mkt", 0) * (alumnos0 * anual("cuota_mensual", 0) * meses))
+    G_prev = None
+    hist: Dict[str, List[Dual]] = {c: [] for c in OUTPUTS_DIFERENCIABLES}
+
+    for k in range(anios):
+        cuota = anual("cuota_mensual", k)
+        sobreprecio = pol.max(cuota / ref_precio - 1.0, 0.0)
+        inv_infra = const(0.0)
+
+        # --- Aulas manuales (enteras: sin derivada propia) ---
+        if par.manual_crecimiento:
+            nuevas = 0
+            suma = np.zeros(N_GRADES)
+            for idx, e in zip(entrada, extra):
+                add = int(e[k])
+                if add > 0:
+                    suma[idx] += add
+                    nuevas += add
+            Div = Div + suma
+            if nuevas > 0:
+                inv_infra = inv_infra + capex * nuevas
+
+        alumnos = G.sum()
+        if k > 0:
+            Demanda = pol.max(Demanda + campo("beta_demanda_calidad") * calidad_prev
+                              - campo("delta_demanda_saturacion") * alumnos,
+                              alumnos + campo("piso_demanda_gap"))
+        saturacion = 0.0 if _v(Demanda) <= 0 else alumnos / pol.max(Demanda, 1e-9)
+        CAC = campo("cac_base") * (1.0 + campo("k_saturacion") * saturacion) * (1.0 + campo("k_precio_cac") * sobreprecio)
+        if k > 0:
+            fact_prev = G_prev.sum() * anual("cuota_mensual", k - 1) * meses
+            Marketing = pol.max(anual("mkt_floor", k), anual("prop_mkt", k) * fact_prev)
+
+        candidatos_pago = Marketing / pol.max(CAC, 1e-9)
+        nc = pol.max(0.0, candidatos_pago + campo("k_calidad_candidatos") * calidad_prev)
+
+        # --- Admisiones ---
+        politica = anual("politica_seleccion", k)
+        adm_des = [pol.min(politica * (nc * wi), Div[i] * cupo_max) for i, wi in zip(entrada, w)]
+        gap = pol.max(Demanda - alumnos, 0.0)
+        total = adm_des[0] + adm_des[1] + adm_des[2] + adm_des[3]
+        escala = 1.0 if _v(total) <= 0 else pol.min(1.0, gap / total)
+        adm = [a * escala for a in adm_des]
+
+        capacidad_g1 = Div[0] * cupo_max
+        cap_politica = politica * nc
+        adm_max = anual("admitidos_max_abs", k)
+        if _v(adm_max) >= 0:
+            cap_politica = pol.min(cap_politica, adm_max)
+        deseados = pol.min(cap_politica, gap)
+        admitidos = pol.min(deseados, capacidad_g1)
+
+        # --- Disparo de construcción: decisión fija ---
+        if par.trigger_auto_aula:
+            exceso = _v(deseados) - _v(capacidad_g1)
+            if (par.regla_dos_div and _v(deseados) >= 2 * _v(cupo_max)) or exceso > 0:
+                inv_infra = inv_infra + capex
+                if k < anios - 1:
+                    suma = np.zeros(N_GRADES)
+                    suma[0] = 1.0
+                    Div = Div + suma
+
+        # --- Hacinamiento ---
+        ratio = G / (pol.max(Div, 1e-9) * cupo_opt)
+        hac = pol.max(ratio - 1.0, 0.0).mean()
+        if _v(alumnos) <= 0:
+            hac = const(0.0)
+        elif (_v(gamma) != 1.0 or isinstance(gamma, Dual)) and _v(hac) > 0:
+            # con gamma elegido se aplica siempre: en gamma = 1 el valor no cambia
+            # (x ** 1.0 == x) pero la derivada respecto de gamma es hac · ln(hac)
+            hac = hac ** gamma
+
+        # --- Calidad ---
+        inv_alum_norm = 0.0
+        if _v(alumnos) > 0:
+            inv_alum_norm = (0.5 * Marketing / pol.max(alumnos, 1e-9)) / pol.max(campo("ref_inv_alumno"), 1e-9)
+        inv_infra_norm = inv_infra / pol.max(campo("ref_inv_infra"), 1e-9)
+        selectividad = 0.0 if _v(nc) <= 0 else pol.clip(admitidos / pol.max(nc, 1e-9), 0.0, 1.0)
+        calidad_inst = (campo("calidad_base") - campo("k_hacinamiento") * hac
+                        + campo("k_inv_alumno") * inv_alum_norm + campo("k_inv_infra") * inv_infra_norm
+                        - campo("k_selectividad") * (1.0 - selectividad) + blandos)
+        calidad = pol.clip(calidad_prev + campo("alpha_calidad") * (calidad_inst - calidad_prev), 0.0, 1.0)
+
+        # --- Bajas y progresión ---
+        tasa = pol.clip(campo("tasa_bajas_base") + (1.0 - calidad) * campo("k_bajas_calidad")
+                        + sobreprecio * campo("k_bajas_precio"), 0.0, 0.5)
+        if _v(alumnos) > 0:
+            net = pol.max(G - (G / alumnos) * (tasa * alumnos), 0.0)
+        else:
+            net = G
+        # K5 -> G1 sólo continúa una fracción tasa_cont; después todos pasan de grado
+        factor = np.ones(N_GRADES)
+        factor[iK5] = _v(tasa_cont)
+        net_c = Dual(net.v * factor, net.d * factor[:, None])
+        if isinstance(tasa_cont, Dual):
+            net_c.d[iK5] += net.v[iK5] * tasa_cont.d
+        siguiente = Dual(TRANSITION @ net_c.v, TRANSITION @ net_c.d)
+        suma_v = np.zeros(N_GRADES)
+        suma_d = np.zeros((N_GRADES, p))
+        for i, a in zip(entrada, adm):
+            a = como_dual(a)
+            suma_v[i] += a.v
+            suma_d[i] += a.d
+        siguiente = siguiente + Dual(suma_v, suma_d)
+
+        # --- Salidas del año ---
+        facturacion = alumnos * cuota * meses
+        costos = (Div.sum() * anual("costo_docente_por_aula", k) + anual("sueldos_no_docentes", k)
+                  + campo("mantenimiento_prop") * facturacion + Marketing)
+        hist["alumnos_totales"].append(como_dual(alumnos))
+        hist["calidad"].append(como_dual(calidad))
+        hist["tasa_bajas"].append(como_dual(tasa))
+        hist["admitidos"].append(como_dual(admitidos))
+        hist["Demanda"].append(como_dual(Demanda))
+        hist["Marketing"].append(como_dual(Marketing))
+        hist["facturacion"].append(como_dual(facturacion))
+        hist["costos_totales"].append(como_dual(costos))
+        hist["resultado"].append(como_dual(facturacion - costos - inv_infra))
+
+        calidad_prev = calidad
+        G_prev = G
+        G = siguiente
+
+    return JacobianResult(
+        fields=fields,
+        valores={c: np.array([x.v for x in hist[c]]) for c in salidas},
+        jacobiano={c: np.stack([np.broadcast_to(x.d, (p,)) for x in hist[c]]) for c in salidas},
+        empates=pol.empates,
+        wall_time=time.perf_counter() - t0,
+    )
+
+
+if __name__ == "__main__":
+    from simulate_case import simulate_batch
+    par = Params()
+    fields = ["cuota_mensual", "prop_mkt", "calidad_base", "k_bajas_calidad", "alpha_calidad"]
+    res = jacobian(par, fields)
+    # Contraste con diferencias centradas
+    h = 1e-6
+    lista = []
+    for f in fields:
+        v = getattr(par, f)
+        lista += [Params(**{**asdict(par), f: v + h * max(abs(v), 1.0)}),
+                  Params(**{**asdict(par), f: v - h * max(abs(v), 1.0)})]
+    out = simulate_batch(lista, round_counts=False)
+    for c in SALIDAS_DEFAULT:
+        fd = np.stack([(out[c][2 * j] - out[c][2 * j + 1]) / (2 * h * max(abs(getattr(par, f)), 1.0))
+                       for j, f in enumerate(fields)], axis=1)
+        err = np.abs(fd - res.jacobiano[c]).max() / max(np.abs(fd).max(), 1e-12)
+        print(f"{c}: error relativo vs diferencias finitas {err:.1e}")
+    print(f"{len(fields)} campos en {res.wall_time * 1e3:.1f} ms, empates: {res.empates}")
@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simulate_case import Params, N_GRADES, GRADE_INDEX, ENTRY_INDEX, repeat_params, simulate_batch_arrays
+
+# =====================================================================
+# Microsimulación por alumno
+# =====================================================================
+# Mismo paso anual que el modo Monte Carlo (candidatos Poisson, admisiones
+# enteras), pero la matrícula es una población de alumnos individuales. Cada
+# alumno tiene réplica, grado actual, año y grado de ingreso; la antigüedad es
+# anio - anio_ingreso y su riesgo de baja es la tasa_bajas de su réplica ese año
+# (misma fórmula de calidad y precio que `simulate`). Cada año, con máscaras
+# vectorizadas sobre toda la población:
+#   - baja      ~ Bernoulli(tasa_bajas)
+#   - K5 -> G1  ~ Bernoulli(tasa_cont_k_to_g1) entre los que siguen en K5
+#   - G12 egresa, el resto pasa de grado
+#   - los admitidos (enteros) entran a K3/K4/K5/G1 con anio_ingreso = k + 1
+# G del año siguiente es el conteo de la población, así que calidad,
+# hacinamiento y Demanda reaccionan a la matrícula realizada.
+#
+# Los alumnos se guardan como columnas NumPy (struct-of-arrays), no como
+# objetos. Las réplicas corren por bloques de ~`alumnos_por_bloque` alumnos para
+# acotar la memoria; cada bloque tiene su propia semilla (SeedSequence.spawn).
+
+BAJA, NO_CONTINUA, EGRESO = 1, 2, 3     # motivo de salida en el registro (0 = sigue)
+_IK5 = GRADE_INDEX["K5"]
+_IG12 = N_GRADES - 1
+
+
+@dataclass
+class Alumnos:
+    rep: np.ndarray             # int32, réplica (dentro del bloque)
+    grado: np.ndarray           # int8, índice en GRADE_NAMES
+    anio_ingreso: np.ndarray    # int16, primer año cursado (0 = matrícula inicial)
+    grado_ingreso: np.ndarray   # int8
+
+    def __len__(self) -> int:
+        return len(self.rep)
+
+    def take(self, idx) -> "Alumnos":
+        return Alumnos(*(getattr(self, f.name)[idx] for f in fields(self)))
+
+    @staticmethod
+    def concat(partes: Sequence["Alumnos"]) -> "Alumnos":
+        return Alumnos(*(np.concatenate([getattr(p, f.name) for p in partes]) for f in fields(Alumnos)))
+
+    @staticmethod
+    def nuevos(conteos: np.ndarray, grados: Sequence[int], anio: int) -> "Alumnos":
+        # conteos (n, len(grados)) enteros -> alumnos nuevos de cada réplica y grado
+        n, g = conteos.shape
+        c = conteos.ravel().astype(np.int64)
+        grado = np.repeat(np.tile(np.asarray(grados, dtype=np.int8), n), c)
+        return Alumnos(
+            rep=np.repeat(np.repeat(np.arange(n, dtype=np.int32), g), c),
+            grado=grado,
+            anio_ingreso=np.full(grado.size, anio, dtype=np.int16),
+            grado_ingreso=grado.copy(),
+        )
+
+
+class _Poblacion:
+    # Gancho `micro` de simulate_batch_arrays: mantiene la población del bloque
+    def __init__(self, G0: np.ndarray, anios: int, rng: np.random.Generator, registro: bool):
+        n = G0.shape[0]
+        self.n = n
+        self.rng = rng
+        self.G = np.rint(G0).astype(np.int64)          # conteos (n, N_GRADES) de la población
+        self.activos = Alumnos.nuevos(self.G, range(N_GRADES), 0)
+        self.bajas = np.zeros((n, anios), dtype=np.int64)
+        self.no_continuan = np.zeros((n, anios), dtype=np.int64)
+        self.egresos = np.zeros((n, anios), dtype=np.int64)
+        self.salidas: Optional[List[Tuple[Alumnos, int, np.ndarray]]] = [] if registro else None
+
+    def paso(self, k: int, tasa: np.ndarray, tasa_cont: np.ndarray, adm: np.ndarray,
+             ultimo: bool = False) -> Optional[np.ndarray]:
+        a, rng, n = self.activos, self.rng, self.n
+        baja = rng.random(len(a), dtype=np.float32) < np.take(tasa.astype(np.float32), a.rep)
+        sigue = ~baja
+        i5 = np.flatnonzero(sigue & (a.grado == _IK5))
+        sigue[i5] = rng.random(i5.size, dtype=np.float32) < np.take(tasa_cont.astype(np.float32), a.rep[i5])
+        sigue &= a.grado != _IG12
+
+        # Salen pocos (bajas + no continúan + egresos): los conteos se sacan de ese subconjunto
+        isale = np.flatnonzero(~sigue)
+        sale = a.take(isale)
+        motivo = np.where(baja[isale], BAJA, np.where(sale.grado == _IK5, NO_CONTINUA, EGRESO)).astype(np.int8)
+        for m, destino in ((BAJA, self.bajas), (NO_CONTINUA, self.no_continuan), (EGRESO, self.egresos)):
+            destino[:, k] = np.bincount(sale.rep[motivo == m], minlength=n)
+        if self.salidas is not None:
+            self.salidas.append((sale, k, motivo))
+        self.G -= np.bincount(sale.rep.astype(np.int64) * N_GRADES + sale.grado,
+                              minlength=n * N_GRADES).reshape(n, N_GRADES)
+
+        iq = np.flatnonzero(sigue)
+        if ultimo:
+            self.activos = a.take(iq)
+            return None
+        # Compactación + pase de grado + ingresantes, escribiendo directo en las columnas nuevas
+        adm = adm.astype(np.int64)
+        nuevos = Alumnos.nuevos(adm, ENTRY_INDEX, k + 1)
+        q = iq.size
+        cols = []
+        for f in fields(Alumnos):
+            v, extra = getattr(a, f.name), getattr(nuevos, f.name)
+            c = np.empty(q + extra.size, dtype=v.dtype)
+            np.take(v, iq, out=c[:q])
+            c[q:] = extra
+            cols.append(c)
+        self.activos = Alumnos(*cols)
+        self.activos.grado[:q] += 1
+
+        G = np.zeros_like(self.G)
+        G[:, 1:] = self.G[:, :-1]
+        G[:, ENTRY_INDEX] += adm
+        self.G = G
+        return G.astype(float)
+
+    def registro(self, rep0: int) -> Dict[str, np.ndarray]:
+        # Un alumno por fila: salidas de cada año + los que siguen al final
+        partes = [(a, np.full(len(a), k, dtype=np.int16), m) for a, k, m in self.salidas]
+        fin = self.activos
+        partes.append((fin, np.full(len(fin), -1, dtype=np.int16), np.zeros(len(fin), dtype=np.int8)))
+        al = Alumnos.concat([p[0] for p in partes])
+        return {
+            "rep": al.rep.astype(np.int64) + rep0,
+            "anio_ingreso": al.anio_ingreso,
+            "grado_ingreso": al.grado_ingreso,
+            "anio_salida": np.concatenate([p[1] for p in partes]),   # último año cursado (-1 = sigue)
+            "grado_salida": al.grado,
+            "motivo": np.concatenate([p[2] for p in partes]),
+        }
+
+
+def _correr_bloque(par: Params, n: int, rep0: int, semilla: np.random.SeedSequence,
+                   sigma_demanda: float, columns: Optional[Sequence[str]],
+                   registro: bool) -> Tuple[Dict[str, np.ndarray], Optional[Dict[str, np.ndarray]]]:
+    rng = np.random.default_rng(semilla)
+    P = repeat_params(par, n)
+    G0 = np.broadcast_to(P["alumnos_inicial_por_grado"].astype(float)[:, None], (n, N_GRADES))
+    pob = _Poblacion(G0, par.anios, rng, registro)
+    out = simulate_batch_arrays(P, n, par.anios, rng=rng, sigma_demanda=sigma_demanda,
+                                columns=columns, micro=pob)
+    # Conteos realizados en lugar de los esperados (tasa · alumnos)
+    if "bajas_totales" in out:
+        out["bajas_totales"] = pob.bajas
+    if "egresados" in out:
+        out["egresados"][:, 0] = 0
+        out["egresados"][:, 1:] = pob.egresos[:, :-1]
+    out["no_continuan"] = pob.no_continuan
+    return out, (pob.registro(rep0) if registro else None)
+
+
+def simulate_micro(par: Params, n_rep: int = 100, seed: Optional[int] = None,
+                   sigma_demanda: float = 0.0, columns: Optional[Sequence[str]] = None,
+                   registro: bool = False, alumnos_por_bloque: int = 4_000_000,
+                   max_workers: Optional[int] = 1) -> Tuple[Dict[str, np.ndarray], Optional[Dict[str, np.ndarray]]]:
+    """Corre `n_rep` réplicas de `par` siguiendo a cada alumno.
+
+    Devuelve (out, registro):
+      - out: salida del motor en lote, forma (n_rep, anios), con "bajas_totales"
+        y "egresados" realizados, "no_continuan" (K5 que no pasan a G1) y "G".
+      - registro (sólo con registro=True): un alumno por fila, columnas "rep",
+        "anio_ingreso", "grado_ingreso", "anio_salida" (último año cursado,
+        -1 si sigue), "grado_salida" y "motivo" (BAJA/NO_CONTINUA/EGRESO, 0 si
+        sigue). Para auditoría de corridas chicas: crece con el total de alumnos.
+    alumnos_por_bloque: tamaño aproximado de la población de cada bloque de réplicas.
+    max_workers: 1 corre en el proceso actual; si no, ProcessPoolExecutor por bloques.
+    """
+    if n_rep <= 0:
+        raise ValueError("n_rep debe ser > 0")
+    estimado = max(par.alumnos_inicial_por_grado * N_GRADES, par.demanda_inicial, 1)
+    m = max(1, min(n_rep, alumnos_por_bloque // estimado))
+    bloques = [(r0, min(r0 + m, n_rep)) for r0 in range(0, n_rep, m)]
+    semillas = np.random.SeedSequence(seed).spawn(len(bloques))
+    args = [(par, r1 - r0, r0, s, sigma_demanda, columns, registro) for (r0, r1), s in zip(bloques, semillas)]
+
+    if max_workers == 1 or len(bloques) == 1:
+        res = [_correr_bloque(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as ex:
+            res = list(ex.map(_correr_bloque, *zip(*args)))
+
+    outs = [r[0] for r in res]
+    out = {c: np.concatenate([o[c] for o in outs]) for c in outs[0]}
+    reg = None
+    if registro:
+        regs = [r[1] for r in res]
+        reg = {c: np.concatenate([g[c] for g in regs]) for c in regs[0]}
+    return out, reg
+
+
+if __name__ == "__main__":
+    import time
+    # ~100k alumnos por réplica
+    grande = Params(anios=30, alumnos_inicial_por_grado=6700, divisiones_iniciales=270,
+                    demanda_inicial=200_000, piso_demanda_gap=5000, tasa_bajas_base=0.01,
+                    k_bajas_calidad=0.02, k_bajas_precio=0.0, cuota_mensual=50, cac_base=100,
+                    prop_mkt=0.2, politica_seleccion=1.0)
+    t0 = time.perf_counter()
+    out, _ = simulate_micro(grande, n_rep=20, seed=0)
+    dt = time.perf_counter() - t0
+    print(f"20 réplicas x 30 años, ~{out['alumnos_totales'].mean():.0f} alumnos: {dt:.2f}s "
+          f"(1k réplicas ~{dt * 50:.0f}s)")
+    out, reg = simulate_micro(Params(), n_rep=3, seed=0, registro=True)
+    print(out["alumnos_totales"])
+    print({c: v[:5] for c, v in reg.items()})
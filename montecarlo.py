@@ -0,0 +1,80 @@
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import Params, OUTPUT_COLUMNS, repeat_params, simulate_batch_arrays
+
+# =====================================================================
+# Modo Monte Carlo
+# =====================================================================
+# Mismo modelo que `simulate`, con sorteos reproducibles (semilla):
+#   - bajas por grado ~ Binomial(alumnos del grado, tasa_bajas)
+#   - continuidad K5 -> G1 ~ Binomial(k5_net, tasa_cont_k_to_g1)
+#   - candidatos nuevos ~ Poisson(candidatos esperados)
+#   - ruido normal en el crecimiento de la Demanda (sigma_demanda * Demanda previa)
+# Las N réplicas corren vectorizadas con el motor en lote (una réplica = un "escenario").
+# "bajas_totales" y "egresados" son los conteos sorteados (no tasa · alumnos), así
+# que sus bandas incluyen la variabilidad de las bajas.
+
+BANDAS = (5, 50, 95)
+
+
+def simulate_mc(par: Params, n_rep: int = 1000, seed: Optional[int] = None,
+                sigma_demanda: float = 0.05,
+                percentiles: Sequence[float] = BANDAS) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Corre `n_rep` réplicas estocásticas de `par`.
+
+    Devuelve (bandas, extras):
+      - bandas: DataFrame indexado por "anio" con columnas MultiIndex
+        (columna de salida, "P5"/"P50"/"P95") para cada columna de `simulate`.
+      - extras: "reps" (salida cruda del motor en lote, forma (n_rep, anios)),
+        "resultado_acumulado" (n_rep,), "params" y "seed".
+    """
+    if n_rep <= 0:
+        raise ValueError("n_rep debe ser > 0")
+    rng = np.random.default_rng(seed)
+    P = repeat_params(par, n_rep)
+    out = simulate_batch_arrays(P, n_rep, par.anios, rng=rng, sigma_demanda=sigma_demanda)
+
+    q = np.asarray(percentiles, dtype=float)
+    cols = [c for c in OUTPUT_COLUMNS if c != "anio"]
+    etiquetas = [f"P{p:g}" for p in q]
+    data = {}
+    for c in cols:
+        bandas = np.percentile(out[c], q, axis=0)   # (len(q), anios)
+        for e, b in zip(etiquetas, bandas):
+            data[(c, e)] = b
+    df = pd.DataFrame(data, index=pd.Index(np.arange(par.anios), name="anio"))
+    df.columns = pd.MultiIndex.from_tuples(df.columns, names=["columna", "banda"])
+
+    extras = {
+        "reps": out,
+        "resultado_acumulado": out["resultado"].sum(axis=1),
+        "params": asdict(par),
+        "seed": seed,
+    }
+    return df, extras
+
+
+def tail_summary(extras: Dict[str, Any], alpha: float = 0.05) -> Dict[str, float]:
+    """Resumen de cola del resultado acumulado: media, VaR y CVaR al nivel alpha,
+    y probabilidad de pérdida acumulada."""
+    r = np.sort(extras["resultado_acumulado"])
+    corte = max(int(np.floor(alpha * r.size)), 1)
+    return {
+        "media": float(r.mean()),
+        "VaR": float(np.quantile(r, alpha)),
+        "CVaR": float(r[:corte].mean()),
+        "prob_perdida": float((r < 0).mean()),
+    }
+
+
+if __name__ == "__main__":
+    import time
+    t0 = time.perf_counter()
+    bandas, ex = simulate_mc(Params(anios=30), n_rep=10_000, seed=42)
+    print(f"10k réplicas x 30 años en {time.perf_counter() - t0:.2f}s")
+    print(bandas["resultado"].tail())
+    print(tail_summary(ex))
@@ -0,0 +1,236 @@
+import time
+from dataclasses import dataclass, asdict, field, replace
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from simulate_case import (Params, PARAM_FIELDS, cast_param, is_scheduled, repeat_params,
+                           resolve_schedule, simulate_batch)
+
+# =====================================================================
+# Búsqueda de metas sobre Params
+# =====================================================================
+# Maximiza un objetivo (por defecto el resultado acumulado) sujeto a:
+#   - calidad >= calidad_min en todos los años
+#   - hacinamiento_prom <= hacinamiento_max en todos los años (opcional)
+# Cada iteración evalúa una población completa con `simulate_batch`:
+#   1) muestra inicial LHS sobre la caja de búsqueda
+#   2) búsqueda por coordenadas en paralelo: desde el mejor punto se prueban
+#      todos los pasos ±h en cada variable (más algunas direcciones al azar) en
+#      un solo lote; si nada mejora, se achica h.
+# Restricciones con reglas de Deb: un punto factible siempre gana a uno
+# infactible, y entre infactibles gana el de menor violación.
+# `SearchSpace` y `coordinate_search` son públicos: calibrate.py usa la misma
+# búsqueda (con varios arranques y otra pérdida).
+
+Objective = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+
+def resultado_acumulado(out: Dict[str, np.ndarray]) -> np.ndarray:
+    return out["resultado"].sum(axis=1)
+
+
+@dataclass
+class OptimResult:
+    params: Params                    # mejor escenario encontrado
+    x: Dict[str, Any]                 # valores de las variables de decisión
+    objetivo: float
+    factible: bool
+    violacion: float
+    n_evals: int
+    wall_time: float
+    history: List[Tuple[int, float, float]] = field(default_factory=list)   # (n_evals, objetivo, violación)
+
+
+def _violation(out: Dict[str, np.ndarray], calidad_min: Optional[float],
+               hacinamiento_max: Optional[float]) -> np.ndarray:
+    v = np.zeros(out["calidad"].shape[0])
+    if calidad_min is not None:
+        v += np.maximum(calidad_min - out["calidad"].min(axis=1), 0.0)
+    if hacinamiento_max is not None:
+        v += np.maximum(out["hacinamiento_prom"].max(axis=1) - hacinamiento_max, 0.0)
+    return v
+
+
+def _valor_inicial(name: str, value: Any, anios: int) -> float:
+    if is_scheduled(value):
+        return float(resolve_schedule(name, value, anios)[0])
+    return float(value)
+
+
+class SearchSpace:
+    """Caja de búsqueda sobre campos de Params, vista como el cubo [0, 1]^d.
+
+    `evaluar(cols)` recibe columnas de Params (como `repeat_params`) y devuelve
+    una tupla de arrays (m,), p.ej. (objetivo, violación). `evaluate` deduplica
+    por valores casteados (los ints redondeados caen en la misma clave), guarda
+    cada punto en cache y no pasa de `max_evals` escenarios distintos; los
+    puntos que no entran valen `peor`."""
+
+    def __init__(self, space: Mapping[str, Tuple[float, float]], base: Params,
+                 evaluar: Callable[[Dict[str, np.ndarray]], Tuple[np.ndarray, ...]],
+                 peor: Tuple[float, ...], max_evals: int):
+        unknown = set(space) - set(PARAM_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+        self.names = list(space)
+        self.lo = np.array([float(space[k][0]) for k in self.names])
+        self.hi = np.array([float(space[k][1]) for k in self.names])
+        if np.any(self.hi < self.lo):
+            raise ValueError("Cada rango debe cumplir min <= max")
+        self.d = len(self.names)
+        self.base = base
+        self.evaluar = evaluar
+        self.peor = tuple(peor)
+        self.max_evals = max_evals
+        self.seen: Dict[Tuple, Tuple[float, ...]] = {}
+
+    @property
+    def n_evals(self) -> int:
+        return len(self.seen)
+
+    def to_values(self, U: np.ndarray) -> Dict[str, np.ndarray]:
+        """[0,1]^d -> valores casteados al tipo del campo (ints redondeados)."""
+        X = self.lo + np.clip(U, 0.0, 1.0) * (self.hi - self.lo)
+        return {k: cast_param(k, X[:, j]) for j, k in enumerate(self.names)}
+
+    def x(self, u: np.ndarray) -> Dict[str, Any]:
+        """Valores de un punto del cubo como dict campo -> escalar."""
+        return {k: v[0].item() for k, v in self.to_values(u[None, :]).items()}
+
+    def punto_base(self) -> np.ndarray:
+        # Un campo con calendario en `base` arranca desde su valor del año 0
+        # (la búsqueda lo reemplaza por un escalar)
+        base_d = asdict(self.base)
+        x0 = np.array([(_valor_inicial(k, base_d[k], self.base.anios) - self.lo[j]) / (self.hi[j] - self.lo[j])
+                       if self.hi[j] > self.lo[j] else 0.0 for j, k in enumerate(self.names)])
+        return np.clip(x0, 0.0, 1.0)
+
+    def lhs(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Muestra LHS de n puntos, precedida por el punto base: (n + 1, d)."""
+        U = (rng.permuted(np.tile(np.arange(n), (self.d, 1)), axis=1).T + rng.random((n, self.d))) / n
+        return np.vstack([self.punto_base()[None, :], U])
+
+    def evaluate(self, U: np.ndarray) -> List[Tuple[float, ...]]:
+        vals = self.to_values(U)
+        keys = [tuple(vals[k][i].item() for k in self.names) for i in range(U.shape[0])]
+        # nuevos, sin repetir dentro del lote
+        nuevos = list({key: i for i, key in enumerate(keys) if key not in self.seen}.values())
+        if nuevos and len(self.seen) < self.max_evals:
+            nuevos = nuevos[:self.max_evals - len(self.seen)]
+            cols = repeat_params(self.base, len(nuevos))
+            for k in self.names:
+                cols[k] = vals[k][nuevos]
+            res = [np.asarray(r, dtype=float) for r in self.evaluar(cols)]
+            for j, i in enumerate(nuevos):
+                self.seen[keys[i]] = tuple(float(r[j]) for r in res)
+        return [self.seen.get(key, self.peor) for key in keys]
+
+
+def coordinate_search(sp: SearchSpace, U0: np.ndarray, clave: Callable[[Tuple[float, ...]], Tuple],
+                      rng: np.random.Generator, n_starts: int = 1, tol: float = 1e-3,
+                      n_random_dirs: int = 8) -> Tuple[np.ndarray, List[Tuple[float, ...]], List[Tuple[int, Tuple[float, ...]]]]:
+    """Búsqueda por coordenadas en lote desde la muestra U0 (menor `clave` = mejor).
+
+    Los `n_starts` mejores puntos de U0 separados más de 2·tol arrancan cada uno
+    una búsqueda: ±h por variable más `n_random_dirs` direcciones al azar, los
+    pasos de todos los arranques en el mismo lote. Si un arranque mejora se
+    prueba seguir en la misma dirección con paso doble; si no, achica su h, y
+    termina con h < tol (o al llegar a max_evals).
+    Devuelve (X, valores, history): mejor punto y valor de cada arranque, e
+    historia [(n_evals, mejor valor)]."""
+    V0 = sp.evaluate(U0)
+    elegidos: List[int] = []
+    for i in sorted(range(len(V0)), key=lambda i: clave(V0[i])):
+        if len(elegidos) >= n_starts:
+            break
+        if all(np.abs(U0[i] - U0[j]).max() > 2 * tol for j in elegidos):
+            elegidos.append(i)
+    X = U0[elegidos].copy()
+    V = [V0[i] for i in elegidos]
+    h = np.full(len(elegidos), 0.25)
+    history = [(sp.n_evals, min(V, key=clave))]
+
+    base_steps = np.vstack([np.eye(sp.d), -np.eye(sp.d)])
+    while np.any(h >= tol) and sp.n_evals < sp.max_evals:
+        activos = np.flatnonzero(h >= tol)
+        bloques = []
+        for s in activos:
+            steps = base_steps
+            if n_random_dirs > 0:
+                dirs = rng.standard_normal((n_random_dirs, sp.d))
+                dirs /= np.linalg.norm(dirs, axis=1, keepdims=True)
+                steps = np.vstack([steps, dirs])
+            bloques.append(np.clip(X[s] + steps * h[s], 0.0, 1.0))
+        cand = np.vstack(bloques)
+        Vc = sp.evaluate(cand)
+        mejoras = []
+        pos = 0
+        for s, b in zip(activos, bloques):
+            i = min(range(pos, pos + len(b)), key=lambda i: clave(Vc[i]))
+            pos += len(b)
+            if clave(Vc[i]) < clave(V[s]):
+                mejoras.append((s, X[s].copy(), cand[i]))
+                X[s], V[s] = cand[i], Vc[i]
+            else:
+                h[s] *= 0.5
+        if mejoras:
+            # Mejoró: probamos seguir en la misma dirección con paso doble
+            ext = np.vstack([np.clip(2 * nuevo - viejo, 0.0, 1.0) for _, viejo, nuevo in mejoras])
+            for (s, _, _), u, v in zip(mejoras, ext, sp.evaluate(ext)):
+                if clave(v) < clave(V[s]):
+                    X[s], V[s] = u, v
+        history.append((sp.n_evals, min(V, key=clave)))
+    return X, V, history
+
+
+def _clave_deb(v: Tuple[float, float]) -> Tuple[bool, float]:
+    # Reglas de Deb como clave de orden (menor = mejor): factibles por objetivo
+    # (mayor primero), después infactibles por violación
+    obj, viol = v
+    return (False, -obj) if viol <= 0 else (True, viol)
+
+
+def optimize(space: Mapping[str, Tuple[float, float]], base: Optional[Params] = None,
+             objective: Objective = resultado_acumulado,
+             calidad_min: Optional[float] = 0.6, hacinamiento_max: Optional[float] = None,
+             n_init: int = 256, max_evals: int = 5000, tol: float = 1e-3,
+             n_random_dirs: int = 8, seed: Optional[int] = None) -> OptimResult:
+    """Busca los valores de `space` (campo -> (min, max)) que maximizan `objective`
+    respetando las restricciones. Los campos no incluidos toman el valor de `base`.
+    `tol` es el paso mínimo relativo al ancho de cada rango."""
+    t0 = time.perf_counter()
+    base = base or Params()
+
+    def evaluar(cols: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        out = simulate_batch(cols)
+        return objective(out), _violation(out, calidad_min, hacinamiento_max)
+
+    sp = SearchSpace(space, base, evaluar, peor=(-np.inf, np.inf), max_evals=max_evals)
+    rng = np.random.default_rng(seed)
+    U0 = sp.lhs(max(min(n_init, max_evals), 1), rng)    # incluye el punto base
+    X, V, hist = coordinate_search(sp, U0, _clave_deb, rng, n_starts=1, tol=tol, n_random_dirs=n_random_dirs)
+
+    x = sp.x(X[0])
+    obj, viol = V[0]
+    return OptimResult(
+        params=replace(base, **x),
+        x=x,
+        objetivo=float(obj),
+        factible=bool(viol <= 0),
+        violacion=float(viol),
+        n_evals=sp.n_evals,
+        wall_time=time.perf_counter() - t0,
+        history=[(n, o, v) for n, (o, v) in hist],
+    )
+
+
+if __name__ == "__main__":
+    res = optimize(
+        {"cuota_mensual": (100, 600), "prop_mkt": (0.0, 0.2), "politica_seleccion": (0.3, 1.0),
+         "k_inv_alumno": (0.0, 1.0), "divisiones_iniciales": (1, 4), "cupo_maximo": (25, 35)},
+        calidad_min=0.6, hacinamiento_max=0.2, seed=0,
+    )
+    print(res.x)
+    print(f"objetivo={res.objetivo:,.0f} factible={res.factible} "
+          f"evals={res.n_evals} tiempo={res.wall_time:.2f}s")
@@ -0,0 +1,218 @@
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simulate_case import Params, PARAM_FIELDS, cast_param, repeat_params, simulate_batch
+
+# =====================================================================
+# Fronteras de régimen (capacidad / demanda) por refinamiento adaptativo
+# =====================================================================
+# Un clasificador asigna a cada escenario una etiqueta entera (p.ej. "la
+# capacidad ata antes del año 5"). Sobre una caja de campos de Params (2 campos
+# = quadtree; en general un 2^d-tree) se trabaja en una grilla entera de
+# resolución final N = n_inicial · 2^niveles celdas por eje:
+#   1) nivel 0: n_inicial^d celdas; se evalúan sus esquinas y centros
+#   2) las celdas con etiquetas distintas entre esquinas/centro se parten en
+#      2^d hijas; los puntos nuevos de todo el nivel van en un solo lote
+#   3) al llegar a la resolución final, cada arista de celda mixta con
+#      etiquetas distintas en sus extremos aporta su punto medio a la frontera
+#   4) seguimiento: las vecinas de las celdas mixtas finales se revisan hasta
+#      que no aparecen nuevas (tramos que cruzan una celda gruesa sin cambiar
+#      sus esquinas ni su centro)
+# Los puntos ya evaluados se reutilizan (clave = coordenadas enteras). Una
+# región aislada más chica que la celda inicial que no toca esquinas ni
+# centros no se detecta: `n_inicial` fija esa escala.
+
+Clasificador = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+
+def capacidad_antes_de(anio: int) -> Clasificador:
+    """1 si capacidad_binding se activa en algún año < anio."""
+    def f(out: Dict[str, np.ndarray]) -> np.ndarray:
+        return out["capacidad_binding"][:, :anio].any(axis=1).astype(int)
+    return f
+
+
+def demanda_antes_de(anio: int) -> Clasificador:
+    """1 si demanda_binding se activa en algún año < anio."""
+    def f(out: Dict[str, np.ndarray]) -> np.ndarray:
+        return out["demanda_binding"][:, :anio].any(axis=1).astype(int)
+    return f
+
+
+def regimen_antes_de(anio: int) -> Clasificador:
+    """0 ninguna, 1 sólo capacidad, 2 sólo demanda, 3 ambas (años < anio)."""
+    cap, dem = capacidad_antes_de(anio), demanda_antes_de(anio)
+    return lambda out: cap(out) + 2 * dem(out)
+
+
+@dataclass
+class BoundaryResult:
+    names: List[str]
+    low: np.ndarray
+    high: np.ndarray
+    resolucion: np.ndarray          # ancho de celda final por eje
+    puntos: np.ndarray              # (m, d) puntos evaluados
+    etiquetas: np.ndarray           # (m,)
+    celdas: np.ndarray              # (k, 2, d) celdas mixtas finales [esquina baja, esquina alta]
+    frontera: np.ndarray            # (b, d) puntos medios de aristas con cambio de etiqueta
+    transicion: np.ndarray          # (b, 2) etiquetas (menor, mayor) a cada lado
+    n_evals: int
+    n_grilla: int                   # evaluaciones de una grilla uniforme con la misma resolución
+    wall_time: float
+
+    def curva(self, a: int, b: int) -> np.ndarray:
+        """Puntos de la frontera entre las etiquetas a y b."""
+        lo, hi = min(a, b), max(a, b)
+        m = (self.transicion[:, 0] == lo) & (self.transicion[:, 1] == hi)
+        return self.frontera[m]
+
+
+def find_boundaries(space: Mapping[str, Tuple[float, float]], clasificador: Clasificador,
+                    base: Optional[Params] = None, n_inicial: int = 4, niveles: int = 5,
+                    columns: Optional[Sequence[str]] = None, chunk_size: int = 20_000,
+                    max_workers: Optional[int] = 1, seguir: bool = True) -> BoundaryResult:
+    """Mapea dónde cambia la etiqueta de `clasificador` sobre la caja `space`
+    (campo -> (min, max)), refinando sólo cerca de las fronteras.
+
+    Resolución final: (max - min) / (n_inicial · 2^niveles) por eje.
+    columns: columnas que necesita el clasificador (por defecto todas).
+    seguir: sigue la frontera por celdas vecinas a resolución final (recupera
+      tramos que el refinamiento grueso no vio).
+    max_workers != 1: lotes de más de `chunk_size` escenarios corren con
+      transport.simulate_parallel.
+    """
+    t0 = time.perf_counter()
+    unknown = set(space) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+    if not space:
+        raise ValueError("El espacio de parámetros está vacío")
+    if n_inicial < 1 or niveles < 0:
+        raise ValueError("n_inicial debe ser >= 1 y niveles >= 0")
+    base = base or Params()
+    names = list(space)
+    d = len(names)
+    lo = np.array([float(space[k][0]) for k in names])
+    hi = np.array([float(space[k][1]) for k in names])
+    N = n_inicial * 2 ** niveles
+    esquinas = np.array(list(itertools.product((0, 1), repeat=d)), dtype=np.int64)   # (2^d, d)
+
+    cache: Dict[Tuple[int, ...], int] = {}
+    puntos: List[np.ndarray] = []
+    etiquetas: List[np.ndarray] = []
+
+    def evaluar(I: np.ndarray) -> None:
+        # I: (m, d) coordenadas enteras; evalúa en lote las que faltan
+        nuevos = {tuple(r) for r in I.tolist()} - cache.keys()
+        if not nuevos:
+            return
+        J = np.array(sorted(nuevos), dtype=np.int64)
+        X = lo + J / N * (hi - lo)
+        cols = repeat_params(base, len(J))
+        for j, k in enumerate(names):
+            cols[k] = cast_param(k, X[:, j])
+        if max_workers != 1 and len(J) > chunk_size:
+            from transport import simulate_parallel
+            out = simulate_parallel(cols, columns=columns, chunk_size=chunk_size, max_workers=max_workers)
+            et = np.asarray(clasificador(out), dtype=np.int64)
+            out.close()
+        else:
+            et = np.concatenate([
+                np.asarray(clasificador(simulate_batch({k: v[r0:r0 + chunk_size] for k, v in cols.items()},
+                                                       columns=columns)), dtype=np.int64)
+                for r0 in range(0, len(J), chunk_size)
+            ])
+        base_idx = sum(len(e) for e in etiquetas)
+        for i, key in enumerate(map(tuple, J.tolist())):
+            cache[key] = base_idx + i
+        puntos.append(X)
+        etiquetas.append(et)
+
+    def etiqueta(I: np.ndarray) -> np.ndarray:
+        todas = np.concatenate(etiquetas)
+        return todas[[cache[tuple(r)] for r in I.reshape(-1, d).tolist()]].reshape(I.shape[:-1])
+
+    # --- Refinamiento por niveles ---
+    s = 2 ** niveles
+    celdas = np.array(list(itertools.product(range(n_inicial), repeat=d)), dtype=np.int64) * s   # esquina baja
+    while True:
+        vert = celdas[:, None, :] + esquinas[None, :, :] * s                 # (c, 2^d, d)
+        pts = [vert.reshape(-1, d)]
+        if s >= 2:
+            pts.append(celdas + s // 2)                                       # centros
+        evaluar(np.concatenate(pts))
+        ev = etiqueta(vert)
+        if s >= 2:
+            ev = np.concatenate([ev, etiqueta(celdas + s // 2)[:, None]], axis=1)
+        mixtas = celdas[(ev != ev[:, :1]).any(axis=1)]
+        if s == 1 or len(mixtas) == 0:
+            break
+        s //= 2
+        celdas = (mixtas[:, None, :] + esquinas[None, :, :] * s).reshape(-1, d)
+
+    # --- Seguimiento de la frontera a resolución final ---
+    # Un tramo que entra y sale de una celda gruesa sin cambiar sus esquinas ni su
+    # centro se pierde al refinar; se revisan las vecinas de las celdas mixtas
+    # finales (en lote) hasta que no aparecen celdas mixtas nuevas.
+    if seguir and s == 1 and len(mixtas):
+        vecinos = np.concatenate([np.eye(d, dtype=np.int64), -np.eye(d, dtype=np.int64)])
+        visitadas = {tuple(c) for c in celdas.tolist()}
+        frente = mixtas
+        while len(frente):
+            cand = (frente[:, None, :] + vecinos[None, :, :]).reshape(-1, d)
+            cand = cand[((cand >= 0) & (cand < N)).all(axis=1)]
+            cand = np.array(sorted({tuple(c) for c in cand.tolist()} - visitadas), dtype=np.int64).reshape(-1, d)
+            if not len(cand):
+                break
+            visitadas.update(map(tuple, cand.tolist()))
+            vert = cand[:, None, :] + esquinas[None, :, :]
+            evaluar(vert.reshape(-1, d))
+            ev = etiqueta(vert)
+            frente = cand[(ev != ev[:, :1]).any(axis=1)]
+            mixtas = np.concatenate([mixtas, frente])
+
+    # --- Frontera: aristas de las celdas mixtas finales con cambio de etiqueta ---
+    ancho = (hi - lo) / N
+    medios, trans = [], []
+    if len(mixtas):
+        vistos = set()
+        for eje in range(d):
+            paso = np.zeros(d, dtype=np.int64)
+            paso[eje] = s
+            otros = esquinas[esquinas[:, eje] == 0]                           # un extremo de cada arista
+            A = (mixtas[:, None, :] + otros[None, :, :] * s).reshape(-1, d)
+            B = A + paso
+            la, lb = etiqueta(A), etiqueta(B)
+            for a, ea, eb in zip(A.tolist(), la.tolist(), lb.tolist()):
+                if ea != eb and (tuple(a), eje) not in vistos:
+                    vistos.add((tuple(a), eje))
+                    medios.append(lo + (np.array(a) + paso / 2) / N * (hi - lo))
+                    trans.append((min(ea, eb), max(ea, eb)))
+
+    return BoundaryResult(
+        names=names,
+        low=lo,
+        high=hi,
+        resolucion=ancho,
+        puntos=np.concatenate(puntos),
+        etiquetas=np.concatenate(etiquetas),
+        celdas=np.stack([lo + mixtas / N * (hi - lo), lo + (mixtas + s) / N * (hi - lo)], axis=1)
+        if len(mixtas) else np.zeros((0, 2, d)),
+        frontera=np.array(medios).reshape(-1, d),
+        transicion=np.array(trans, dtype=np.int64).reshape(-1, 2),
+        n_evals=len(cache),
+        n_grilla=(N + 1) ** d,
+        wall_time=time.perf_counter() - t0,
+    )
+
+
+if __name__ == "__main__":
+    res = find_boundaries({"cuota_mensual": (100.0, 600.0), "prop_mkt": (0.0, 0.3)},
+                          capacidad_antes_de(5), base=Params(anios=5), n_inicial=8, niveles=5,
+                          columns=["capacidad_binding"])
+    print(f"{res.n_evals} evaluaciones (grilla uniforme: {res.n_grilla}), {len(res.frontera)} puntos de "
+          f"frontera a resolución {res.resolucion.round(4)}, {res.wall_time:.2f}s")
@@ -0,0 +1,193 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import Params, PARAM_FIELDS, cast_param, repeat_params, simulate_batch
+from sweep import Uniform, as_dist
+
+# =====================================================================
+# Sensibilidad global (índices de Sobol, esquema de Saltelli)
+# =====================================================================
+# Con dos matrices base A y B (n x d) y las d matrices AB_i (A con la columna i
+# tomada de B) se evalúa el modelo n * (d + 2) veces y, para cada salida
+# escalar f:
+#   S1_i = mean(f(B) * (f(AB_i) - f(A))) / V          (Saltelli 2010)
+#   ST_i = mean((f(A) - f(AB_i))^2) / (2 V)           (Jansen)
+# con V = var([f(A), f(B)]). Intervalos por bootstrap sobre las n filas base.
+#
+# Las n * (d + 2) corridas no se materializan: se generan por bloques de
+# filas base (~chunk_size escenarios), cada bloque se simula con el motor en
+# lote y sólo se guardan las salidas escalares (n x (d + 2) por salida).
+
+Salida = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+
+def resultado_acumulado(out: Dict[str, np.ndarray]) -> np.ndarray:
+    return out["resultado"].sum(axis=1)
+
+
+def alumnos_finales(out: Dict[str, np.ndarray]) -> np.ndarray:
+    return out["alumnos_totales"][:, -1].astype(float)
+
+
+SALIDAS: Dict[str, Salida] = {
+    "resultado_acumulado": resultado_acumulado,
+    "alumnos_finales": alumnos_finales,
+}
+
+
+@dataclass
+class SobolResult:
+    indices: pd.DataFrame       # salida, parametro, S1, S1_lo, S1_hi, ST, ST_lo, ST_hi
+    n: int                      # filas base
+    n_evals: int                # n * (d + 2)
+    wall_time: float
+
+    def ranking(self, salida: str) -> pd.DataFrame:
+        """Parámetros de `salida` ordenados por índice total."""
+        df = self.indices[self.indices["salida"] == salida]
+        return df.sort_values("ST", ascending=False, ignore_index=True)
+
+
+def _as_bounds(spec: Any):
+    # (low, high) como en optimize: rango uniforme; el resto como en sweep
+    if isinstance(spec, tuple) and len(spec) == 2 and not isinstance(spec[0], bool):
+        return Uniform(float(spec[0]), float(spec[1]))
+    return as_dist(spec)
+
+
+def _eval_chunk(cols: Dict[str, np.ndarray], salidas: Mapping[str, Salida]) -> Dict[str, np.ndarray]:
+    # Corre en el worker: simula el bloque y devuelve sólo las salidas escalares
+    out = simulate_batch(cols)
+    return {k: np.asarray(fn(out), dtype=float) for k, fn in salidas.items()}
+
+
+def _bloques(XA: Dict[str, np.ndarray], XB: Dict[str, np.ndarray], base: Params,
+             m: int) -> Iterator[Tuple[int, int, Dict[str, np.ndarray]]]:
+    # Bloques de filas base [r0, r1): escenarios [A; B; AB_0; ...; AB_{d-1}]
+    names = list(XA)
+    d = len(names)
+    n = len(XA[names[0]])
+    for r0 in range(0, n, m):
+        r1 = min(r0 + m, n)
+        k = r1 - r0
+        cols = repeat_params(base, k * (d + 2))
+        for j, name in enumerate(names):
+            a, b = XA[name][r0:r1], XB[name][r0:r1]
+            v = np.concatenate([a, b, np.tile(a, d)])
+            v[(2 + j) * k:(3 + j) * k] = b
+            cols[name] = v
+        yield r0, r1, cols
+
+
+def _indices(fA: np.ndarray, fB: np.ndarray, fAB: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # fA, fB: (..., n); fAB: (..., n, d)
+    V = np.concatenate([fA, fB], axis=-1).var(axis=-1)[..., None]
+    V = np.where(V > 0, V, np.nan)
+    S1 = (fB[..., None] * (fAB - fA[..., None])).mean(axis=-2) / V
+    ST = 0.5 * ((fA[..., None] - fAB) ** 2).mean(axis=-2) / V
+    return S1, ST
+
+
+def sobol_indices(space: Mapping[str, Any], n: int = 1024, seed: Optional[int] = None,
+                  base: Optional[Params] = None, salidas: Optional[Mapping[str, Salida]] = None,
+                  chunk_size: int = 8192, max_workers: Optional[int] = 1,
+                  n_boot: int = 200, conf: float = 0.95) -> SobolResult:
+    """Índices de Sobol de primer orden (S1) y totales (ST) de cada campo de
+    `space` sobre cada salida escalar.
+
+    space: campo de Params -> (low, high) (uniforme), Uniform/LogUniform/Normal/
+      Choice o lista de valores. Los campos no incluidos toman el valor de `base`.
+    n: filas base (evaluaciones: n * (d + 2)).
+    salidas: nombre -> función(salida de simulate_batch) -> (n,). Por defecto
+      resultado acumulado y alumnos del último año. Con max_workers != 1 deben
+      ser funciones de módulo (se envían a los procesos).
+    chunk_size: escenarios por bloque; acota la memoria del motor en lote.
+    max_workers: 1 corre en el proceso actual; si no, ProcessPoolExecutor.
+    n_boot, conf: réplicas bootstrap e intervalo de confianza.
+    """
+    if not space:
+        raise ValueError("El espacio de parámetros está vacío")
+    unknown = set(space) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+    if n <= 1:
+        raise ValueError("n debe ser > 1")
+    t0 = time.perf_counter()
+    salidas = dict(salidas or SALIDAS)
+    names = list(space)
+    d = len(names)
+    dists = [_as_bounds(space[k]) for k in names]
+    base = base or Params()
+
+    rng = np.random.default_rng(seed)
+    U = rng.random((2, n, d))
+    XA = {k: cast_param(k, dist.ppf(U[0, :, j])) for j, (k, dist) in enumerate(zip(names, dists))}
+    XB = {k: cast_param(k, dist.ppf(U[1, :, j])) for j, (k, dist) in enumerate(zip(names, dists))}
+    del U
+
+    F = {k: np.empty((d + 2, n)) for k in salidas}
+    m = max(1, chunk_size // (d + 2))
+
+    def guardar(r0: int, r1: int, res: Dict[str, np.ndarray]) -> None:
+        for k, v in res.items():
+            F[k][:, r0:r1] = v.reshape(d + 2, r1 - r0)
+
+    if max_workers == 1:
+        for r0, r1, cols in _bloques(XA, XB, base, m):
+            guardar(r0, r1, _eval_chunk(cols, salidas))
+    else:
+        # Como mucho 2 bloques por worker en vuelo: la memoria no crece con n
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            limite = 2 * (max_workers or os.cpu_count() or 1)
+            pendientes = deque()
+            for r0, r1, cols in _bloques(XA, XB, base, m):
+                pendientes.append((r0, r1, ex.submit(_eval_chunk, cols, salidas)))
+                if len(pendientes) >= limite:
+                    a, b, fut = pendientes.popleft()
+                    guardar(a, b, fut.result())
+            for a, b, fut in pendientes:
+                guardar(a, b, fut.result())
+
+    # Bootstrap sobre filas base, de a un bloque de réplicas para acotar memoria
+    alpha = (1.0 - conf) / 2.0
+    filas = []
+    for k, f in F.items():
+        fA, fB, fAB = f[0], f[1], f[2:].T
+        S1, ST = _indices(fA, fB, fAB)
+        bS1, bST = np.empty((n_boot, d)), np.empty((n_boot, d))
+        paso = max(1, (1 << 22) // (n * d))
+        for s in range(0, n_boot, paso):
+            idx = rng.integers(0, n, (min(paso, n_boot - s), n))
+            bS1[s:s + len(idx)], bST[s:s + len(idx)] = _indices(fA[idx], fB[idx], fAB[idx])
+        q1 = np.nanquantile(bS1, [alpha, 1.0 - alpha], axis=0) if n_boot else np.full((2, d), np.nan)
+        qT = np.nanquantile(bST, [alpha, 1.0 - alpha], axis=0) if n_boot else np.full((2, d), np.nan)
+        for j, name in enumerate(names):
+            filas.append({
+                "salida": k, "parametro": name,
+                "S1": S1[j], "S1_lo": q1[0, j], "S1_hi": q1[1, j],
+                "ST": ST[j], "ST_lo": qT[0, j], "ST_hi": qT[1, j],
+            })
+    return SobolResult(
+        indices=pd.DataFrame(filas),
+        n=n,
+        n_evals=n * (d + 2),
+        wall_time=time.perf_counter() - t0,
+    )
+
+
+if __name__ == "__main__":
+    res = sobol_indices(
+        {"k_bajas_calidad": (0.05, 0.3), "beta_demanda_calidad": (2.0, 20.0),
+         "alpha_calidad": (0.1, 0.8), "cac_base": (100.0, 400.0),
+         "cuota_mensual": (200.0, 400.0), "prop_mkt": (0.0, 0.2)},
+        n=4096, seed=0,
+    )
+    print(f"{res.n_evals} evaluaciones en {res.wall_time:.2f}s")
+    print(res.ranking("resultado_acumulado").round(3))
@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from simulate_case import Params, OUTPUT_COLUMNS, params_hash, simulate_batch, validate_params
+
+# =====================================================================
+# Servicio HTTP/JSON local (asyncio, sólo stdlib)
+# =====================================================================
+# POST /simulate   {"params": {campo: valor, ...}, "columns": [...], "timeout": s}
+#                  -> {"hash": ..., "data": {columna: [...]}, "G": [[...]]}
+# GET  /metrics    contadores, latencias y throughput
+# GET  /health
+#
+# - Coalescencia: pedidos idénticos en vuelo (mismo params_hash) esperan el
+#   mismo resultado; el escenario se calcula una sola vez.
+# - Micro-lotes: los escenarios nuevos se juntan durante `batch_window` s (o
+#   hasta `max_batch`) y se corren con `simulate_batch` en un pool de procesos,
+#   agrupados por `anios` (el motor en lote exige horizonte fijo).
+# - Contrapresión: con `max_pending` escenarios en cola/corriendo, responde 503.
+# - Timeout por pedido (por defecto `timeout`, o "timeout" en el cuerpo): 504.
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error",
+               503: "Service Unavailable", 504: "Gateway Timeout"}
+MAX_BODY = 1 << 20
+MAX_ANIOS = 200          # horizonte máximo aceptado por pedido
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, mensaje: str):
+        super().__init__(mensaje)
+        self.status = status
+        self.mensaje = mensaje
+
+
+def validar_params(d: Any) -> Params:
+    """Params desde el JSON de un pedido: `validate_params` (tipos estrictos,
+    el mismo validador que cli.py) con anios <= MAX_ANIOS. Errores -> ValueError."""
+    return validate_params(d, max_anios=MAX_ANIOS)
+
+
+def _run_batch(params: List[Params]) -> List[Dict[str, np.ndarray]]:
+    # Corre en el proceso worker: un lote de escenarios con el mismo anios
+    out = simulate_batch(params)
+    return [{c: out[c][i] for c in OUTPUT_COLUMNS + ["G"]} for i in range(len(params))]
+
+
+class SimService:
+    def __init__(self, max_workers: Optional[int] = None, max_batch: int = 256,
+                 batch_window: float = 0.005, max_pending: int = 10_000, timeout: float = 30.0):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._t0 = time.monotonic()
+        self._latencias = deque(maxlen=4096)
+        self._fin = deque(maxlen=4096)      # instantes de respuesta (throughput reciente)
+        self.contadores = {
+            "pedidos": 0, "ok": 0, "coalescidos": 0, "escenarios": 0, "lotes": 0,
+            "rechazados_503": 0, "timeouts_504": 0, "errores_400": 0, "errores_500": 0,
+        }
+
+    # --- Ciclo de vida ---
+    # El pool usa "spawn": hacer fork desde un proceso con el loop de asyncio
+    # (y sus threads de getaddrinfo) puede dejar workers bloqueados.
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._pool = ProcessPoolExecutor(max_workers=self._max_workers,
+                                         mp_context=mp.get_context("spawn"))
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # --- Simulación con coalescencia y micro-lotes ---
+    async def simulate(self, par: Params, timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        key = params_hash(par)
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.contadores["coalescidos"] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self.contadores["rechazados_503"] += 1
+                raise HTTPError(503, "Servicio saturado, reintentar más tarde")
+            fut = asyncio.get_running_loop().create_future()
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _f, k=key: self._inflight.pop(k, None))
+            self._queue.put_nowait((par, fut))
+        try:
+            # shield: el timeout de un pedido no cancela el cálculo compartido
+            return await asyncio.wait_for(asyncio.shield(fut), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self.contadores["timeouts_504"] += 1
+            raise HTTPError(504, "Tiempo de espera agotado")
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._queue.get()]
+            limite = loop.time() + self.batch_window
+            while len(lote) < self.max_batch:
+                resto = limite - loop.time()
+                if resto <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._queue.get(), resto))
+                except asyncio.TimeoutError:
+                    break
+            grupos: Dict[int, List[Tuple[Params, asyncio.Future]]] = {}
+            for par, fut in lote:
+                grupos.setdefault(par.anios, []).append((par, fut))
+            for items in grupos.values():
+                asyncio.create_task(self._run_group(items))
+
+    async def _run_group(self, items: List[Tuple[Params, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        self.contadores["lotes"] += 1
+        self.contadores["escenarios"] += len(items)
+        try:
+            res = await loop.run_in_executor(self._pool, _run_batch, [p for p, _ in items])
+        except Exception as e:
+            if len(items) == 1:
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+                return
+            # Un escenario malo no tiene que tumbar al resto del lote: se reintenta
+            # cada uno por separado y el error queda sólo en su pedido
+            await asyncio.gather(*(self._run_group([it]) for it in items))
+            self.contadores["lotes"] -= len(items)
+            self.contadores["escenarios"] -= len(items)
+            return
+        for (_, fut), r in zip(items, res):
+            if not fut.done():
+                fut.set_result(r)
+
+    # --- Métricas ---
+    def metrics(self) -> Dict[str, Any]:
+        ahora = time.monotonic()
+        lat = np.array(self._latencias) if self._latencias else np.zeros(1)
+        recientes = sum(1 for t in self._fin if ahora - t <= 60.0)
+        return {
+            **self.contadores,
+            "en_vuelo": len(self._inflight),
+            "en_cola": self._queue.qsize() if self._queue is not None else 0,
+            "uptime_s": ahora - self._t0,
+            "throughput_rps": self.contadores["ok"] / max(ahora - self._t0, 1e-9),
+            "throughput_rps_60s": recientes / min(max(ahora - self._t0, 1e-9), 60.0),
+            "lote_promedio": self.contadores["escenarios"] / max(self.contadores["lotes"], 1),
+            "latencia_ms": {f"p{q}": float(np.percentile(lat, q) * 1e3) for q in (50, 95, 99)},
+        }
+
+    # --- HTTP ---
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        t0 = time.monotonic()
+        status, body = 200, {}
+        try:
+            metodo, ruta, payload = await _read_request(reader)
+            if ruta == "/simulate":
+                if metodo != "POST":
+                    raise HTTPError(405, "Usar POST")
+                self.contadores["pedidos"] += 1
+                body = await self._simulate_endpoint(payload)
+                self.contadores["ok"] += 1
+                self._latencias.append(time.monotonic() - t0)
+                self._fin.append(time.monotonic())
+            elif ruta == "/metrics":
+                body = self.metrics()
+            elif ruta == "/health":
+                body = {"status": "ok"}
+            else:
+                raise HTTPError(404, f"Ruta desconocida: {ruta}")
+        except HTTPError as e:
+            status, body = e.status, {"error": e.mensaje}
+            if e.status == 400:
+                self.contadores["errores_400"] += 1
+        except Exception as e:
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            self.contadores["errores_500"] += 1
+        try:
+            data = json.dumps(body).encode("utf-8")
+            extra = "Retry-After: 1\r\n" if status == 503 else ""
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"{extra}Connection: close\r\n\r\n".encode("ascii") + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _simulate_endpoint(self, payload: Any) -> Dict[str, Any]:
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+        columns = payload.get("columns") or OUTPUT_COLUMNS
+        desconocidas = [c for c in columns if c not in OUTPUT_COLUMNS]
+        if desconocidas:
+            raise HTTPError(400, f"Columnas desconocidas: {desconocidas}")
+        try:
+            par = validar_params(payload.get("params") or {})
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, f"Params inválidos: {e}")
+        timeout = payload.get("timeout")
+        if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                    or not 0 < timeout < float("inf")):
+            raise HTTPError(400, f"'timeout' debe ser un número de segundos > 0 (llegó {timeout!r})")
+        res = await self.simulate(par, timeout)
+        return {
+            "hash": params_hash(par),
+            "data": {c: res[c].tolist() for c in columns},
+            "G": res["G"].tolist(),
+        }
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Any]:
+    linea = (await reader.readline()).decode("latin-1").strip()
+    try:
+        metodo, ruta, _ = linea.split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Línea de pedido inválida")
+    headers = {}
+    while True:
+        h = (await reader.readline()).decode("latin-1")
+        if h in ("\r\n", "\n", ""):
+            break
+        nombre, _, valor = h.partition(":")
+        headers[nombre.strip().lower()] = valor.strip()
+    try:
+        largo = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HTTPError(400, "Content-Length inválido")
+    if largo < 0:
+        raise HTTPError(400, "Content-Length inválido")
+    if largo > MAX_BODY:
+        raise HTTPError(413, "Cuerpo demasiado grande")
+    payload = None
+    if largo:
+        try:
+            payload = json.loads(await reader.readexactly(largo))
+        except (ValueError, asyncio.IncompleteReadError):
+            raise HTTPError(400, "JSON inválido")
+    return metodo.upper(), ruta.split("?", 1)[0], payload
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, **kwargs) -> None:
+    svc = SimService(**kwargs)
+    server = await svc.start(host, port)
+    print(f"Escuchando en http://{host}:{port} (POST /simulate, GET /metrics)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await svc.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Servicio local de simulación")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--max-batch", type=int, default=256)
+    ap.add_argument("--batch-window", type=float, default=0.005, help="segundos")
+    ap.add_argument("--max-pending", type=int, default=10_000)
+    ap.add_argument("--timeout", type=float, default=30.0)
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, max_workers=args.workers, max_batch=args.max_batch,
+                          batch_window=args.batch_window, max_pending=args.max_pending,
+                          timeout=args.timeout))
+    except KeyboardInterrupt:
+        pass
@@ -1,14 +1,70 @@
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
+import hashlib
+import json
+import time
+import types
 import numpy as np
-import pandas as pd
-from typing import Tuple, Dict, Any
+from typing import TYPE_CHECKING, Tuple, Dict, Any, Callable, Iterator, List, Mapping, Optional, Sequence, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _pd():
+    # pandas se importa recién al pedir un DataFrame: el núcleo sólo necesita NumPy
+    import pandas
+    return pandas
+
 
 # Orden oficial de grados (incluye K3-K5, ver §2)
 GRADE_NAMES = ["K3", "K4", "K5"] + [f"G{g}" for g in range(1, 13)]
 GRADE_INDEX = {name: i for i, name in enumerate(GRADE_NAMES)}
 N_GRADES = len(GRADE_NAMES)  # 15
 
+# Grados con admisión externa (orden de prop_cand_*)
+ENTRY_GRADES = ["K3", "K4", "K5", "G1"]
+ENTRY_INDEX = [GRADE_INDEX[g] for g in ENTRY_GRADES]
+
+# Grado cuyo pase al siguiente aplica tasa_cont_k_to_g1 (K5 -> G1)
+CONT_GRADE = "K5"
+
+
+def transition_matrix(grade_names=GRADE_NAMES) -> np.ndarray:
+    """Operador de progresión de cohortes (N x N): T[dst, src] = 1 si los alumnos
+    de `src` pasan a `dst` al año siguiente. Cada grado pasa al siguiente de la
+    lista y el último egresa (columna en cero). Es una banda bajo la diagonal."""
+    n = len(grade_names)
+    T = np.zeros((n, n))
+    T[np.arange(1, n), np.arange(n - 1)] = 1.0
+    return T
+
+
+TRANSITION = transition_matrix()
+_CONT_IDX = GRADE_INDEX[CONT_GRADE]
+# Forma compacta para el kernel: destino de cada grado (-1 = egresa)
+_PROG_DST = np.where(TRANSITION.any(axis=0), TRANSITION.argmax(axis=0), -1)
+_ENTRY_IDX = np.array(ENTRY_INDEX)
+
+
+def progress_cohorts(net: np.ndarray, tasa_cont: Any) -> np.ndarray:
+    """Avanza un año los alumnos netos de bajas (..., N_GRADES): aplica la
+    continuidad K5 -> G1 y el operador de progresión. Vectorizado sobre los ejes
+    iniciales (escenarios, años), resuelto como un producto matricial."""
+    net = np.array(net, dtype=float)
+    net[..., _CONT_IDX] = tasa_cont * net[..., _CONT_IDX]
+    return net @ TRANSITION.T
+
+
+def cohort_operator(tasa_bajas: Any, tasa_cont: Any) -> np.ndarray:
+    """Operador lineal de un año sin admisiones, M = T · diag(c) · (1 - tasa_bajas),
+    con forma (..., N, N) si las tasas son arrays. Sirve para proyectar cohortes
+    varios años de golpe (p.ej. np.linalg.matrix_power(M, m) @ G)."""
+    tasa_bajas = np.asarray(tasa_bajas, dtype=float)[..., None, None]
+    c = np.ones(np.shape(tasa_cont) + (N_GRADES,))
+    c[..., _CONT_IDX] = tasa_cont
+    return TRANSITION * c[..., None, :] * (1.0 - tasa_bajas)
+
 @dataclass
 class Params:
     # --- Horizonte y estado inicial ---
@@ -91,7 +147,379 @@ class Params:
     # (Opcional) Cobranza/morosidad: si tu app lo pasa, DEBE estar acá
     tasa_cobro: float = 1.0                # 1.0 = 100%
 
-def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+# --- Parámetros con calendario anual ---
+# Estos campos aceptan, además de un escalar, un calendario por año:
+#   - una secuencia de largo `anios` (valor de cada año), o
+#   - un dict {año: valor} escalonado (cada valor rige desde ese año; debe incluir el año 0).
+# Se resuelven una sola vez a vectores densos de largo `anios` antes del loop.
+SCHEDULE_FIELDS = (
+    "cuota_mensual", "prop_mkt", "mkt_floor", "politica_seleccion", "admitidos_max_abs",
+    "extra_div_k3_per_year", "extra_div_k4_per_year", "extra_div_k5_per_year", "extra_div_g1_per_year",
+    "costo_docente_por_aula", "sueldos_no_docentes",
+)
+
+
+def is_scheduled(value: Any) -> bool:
+    if type(value) in (float, int, bool):
+        return False
+    return isinstance(value, Mapping) or np.ndim(value) > 0
+
+
+def resolve_schedule(name: str, value: Any, anios: int) -> np.ndarray:
+    """Devuelve el calendario de `name` como vector float de largo `anios`."""
+    if isinstance(value, Mapping):
+        if name not in SCHEDULE_FIELDS:
+            raise ValueError(f"'{name}' no admite calendario (campos válidos: {', '.join(SCHEDULE_FIELDS)})")
+        # claves int o str (p.ej. calendarios que llegan por JSON)
+        cambios = sorted((int(a), float(x)) for a, x in value.items())
+        if not cambios or cambios[0][0] != 0:
+            raise ValueError(f"El calendario de '{name}' debe incluir el año 0")
+        v = np.empty(anios)
+        for (a, x), b in zip(cambios, [c for c, _ in cambios[1:]] + [anios]):
+            v[a:b] = x
+        return v
+    if np.ndim(value) == 0:
+        return np.full(anios, float(value))
+    if name not in SCHEDULE_FIELDS:
+        raise ValueError(f"'{name}' no admite calendario (campos válidos: {', '.join(SCHEDULE_FIELDS)})")
+    v = np.asarray(value, dtype=float)
+    if v.shape != (anios,):
+        raise ValueError(f"El calendario de '{name}' debe tener largo anios={anios} (tiene forma {v.shape})")
+    return v
+
+
+def resolve_schedules(par: Params) -> Dict[str, np.ndarray]:
+    """Resuelve todos los campos de SCHEDULE_FIELDS de `par` a vectores (anios,)."""
+    for name in PARAM_FIELDS:
+        if name not in SCHEDULE_FIELDS and is_scheduled(getattr(par, name)):
+            raise ValueError(f"'{name}' no admite calendario (campos válidos: {', '.join(SCHEDULE_FIELDS)})")
+    return {name: resolve_schedule(name, getattr(par, name), par.anios) for name in SCHEDULE_FIELDS}
+
+
+def params_hash(par: Params) -> str:
+    """Hash estable (sha256 hex) de asdict(par). Normaliza los tipos declarados
+    para que, por ejemplo, cuota_mensual=300 y 300.0 den el mismo hash. Un
+    calendario constante hashea igual que el escalar equivalente."""
+    d = {}
+    for f in fields(par):
+        v = getattr(par, f.name)
+        if is_scheduled(v):
+            v = resolve_schedule(f.name, v, par.anios)
+            v = v.tolist() if np.any(v != v[0]) else v[0]
+        if isinstance(v, list):
+            pass
+        elif f.type is float:
+            v = float(v)
+        elif f.type is int:
+            v = int(v)
+        elif f.type is bool:
+            v = bool(v)
+        d[f.name] = v
+    blob = json.dumps(d, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def json_default(o: Any) -> Any:
+    """`default=` para json.dumps de Params / metadatos: escalares y arrays de
+    NumPy (p.ej. Params armados desde un barrido, o calendarios como array)."""
+    if isinstance(o, (np.generic, np.ndarray)):
+        return o.tolist()
+    raise TypeError(f"No serializable: {type(o).__name__}")
+
+
+# Series anuales que produce el paso del modelo (además de G y Div)
+RAW_SERIES = [
+    "calidad", "Demanda", "Marketing", "CAC", "admitidos", "admitidos_deseados",
+    "nuevos_candidatos", "candidatos_pago", "candidatos_organico", "tasa_bajas",
+    "inv_infra", "hacinamiento_prom", "selectividad", "capacidad_binding", "demanda_binding",
+]
+
+BACKENDS = ("python", "numpy", "numba", "auto")
+
+
+# =====================================================================
+# Perfilado por fase del paso anual (opcional)
+# =====================================================================
+# simulate(par, profiler=PhaseProfiler()) o simulate_batch(..., profiler=...)
+# acumulan tiempo y cantidad de pasadas por (fase, año). Sin profiler el costo
+# es un `is not None` por fase. El backend "numba" no se puede instrumentar.
+
+PHASES = (
+    "aulas_manual", "demanda", "cac_marketing", "candidatos", "admisiones",
+    "construccion", "hacinamiento", "calidad", "bajas", "progresion",
+)
+
+
+class PhaseProfiler:
+    """Acumula tiempos por fase y por año entre llamadas a `simulate`."""
+
+    def __init__(self):
+        self.tiempo: Dict[Tuple[str, int], float] = {}
+        self.llamadas: Dict[Tuple[str, int], int] = {}
+        self._t = 0.0
+
+    def start(self) -> None:
+        self._t = time.perf_counter()
+
+    def lap(self, fase: str, anio: int) -> None:
+        # Atribuye a `fase` el tiempo transcurrido desde la marca anterior
+        t = time.perf_counter()
+        key = (fase, anio)
+        self.tiempo[key] = self.tiempo.get(key, 0.0) + (t - self._t)
+        self.llamadas[key] = self.llamadas.get(key, 0) + 1
+        self._t = t
+
+    def reset(self) -> None:
+        self.tiempo.clear()
+        self.llamadas.clear()
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Una fila por (fase, anio): tiempo_s y llamadas."""
+        keys = sorted(self.tiempo, key=lambda fk: (fk[1], PHASES.index(fk[0])))
+        return _pd().DataFrame({
+            "fase": [f for f, _ in keys],
+            "anio": [a for _, a in keys],
+            "tiempo_s": [self.tiempo[k] for k in keys],
+            "llamadas": [self.llamadas[k] for k in keys],
+        })
+
+    def summary(self) -> "pd.DataFrame":
+        """Totales por fase (todos los años) con su proporción del tiempo total."""
+        df = self.to_frame()
+        res = df.groupby("fase", sort=False)[["tiempo_s", "llamadas"]].sum()
+        res = res.reindex([f for f in PHASES if f in res.index])
+        res["proporcion"] = res["tiempo_s"] / max(res["tiempo_s"].sum(), 1e-12)
+        return res.reset_index()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato serializable a JSON para exportar."""
+        return {"phases": list(PHASES), "registros": self.to_frame().to_dict(orient="records")}
+
+
+@dataclass
+class SimState:
+    """Estado al inicio del año `anio`: todo lo que el paso anual necesita para
+    seguir desde ahí. Se obtiene con simulate(..., keep_states=True)."""
+    anio: int
+    G: np.ndarray              # alumnos por grado al inicio del año (sin redondear)
+    Div: np.ndarray            # divisiones por grado al inicio del año
+    calidad: float             # calidad del año anterior
+    Demanda: float             # Demanda del año anterior
+    Marketing: float           # Marketing del año anterior
+    fact_prev: float           # facturación del año anterior (base del Marketing)
+    egresados: float           # egresados al inicio del año (G12 previo neto de bajas)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["G"] = [float(x) for x in self.G]
+        d["Div"] = [int(x) for x in self.Div]
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Mapping[str, Any]) -> "SimState":
+        d = dict(d)
+        d["G"] = np.asarray(d["G"], dtype=float)
+        d["Div"] = np.asarray(d["Div"], dtype=int)
+        return cls(**d)
+
+
+def simulate(par: Params, backend: str = "python", start_state: Optional[SimState] = None,
+             start_year: Optional[int] = None, keep_states: bool = False,
+             output: str = "frame", columns: Optional[Sequence[str]] = None,
+             round_counts: bool = True,
+             profiler: Optional[PhaseProfiler] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Simula un escenario.
+
+    backend:
+      - "python": implementación de referencia (loop anual en Python)
+      - "numpy":  motor en lote vectorizado con un solo escenario
+      - "numba":  kernel compilado con Numba (requiere numba instalado)
+      - "auto":   "numba" si está disponible, si no "numpy"
+
+    start_state / start_year: retoma desde un SimState (p.ej. guardado de una
+    corrida previa) y calcula sólo los años start_year..anios-1; el DataFrame y
+    extras["G"]/["Div"] cubren sólo ese tramo. Con los mismos Params, el tramo
+    coincide exactamente con la corrida completa.
+    keep_states: agrega extras["states"] = {año: SimState} para reanudar después.
+
+    output:
+      - "frame":   DataFrame (por defecto)
+      - "arrays":  dict columna -> array (anios,), sin pasar por pandas
+      - "records": array estructurado de NumPy con los mismos campos
+    columns: subconjunto (y orden) de OUTPUT_COLUMNS a devolver.
+    round_counts: redondea a int las columnas de conteo y extras["G"] (como siempre).
+    profiler: PhaseProfiler que acumula tiempos por fase y año (no con "numba").
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"output desconocido: {output!r} (opciones: {', '.join(OUTPUTS)})")
+    k0 = 0
+    if start_state is not None:
+        k0 = start_state.anio if start_year is None else int(start_year)
+        if k0 != start_state.anio:
+            raise ValueError(f"start_year={k0} no coincide con start_state.anio={start_state.anio}")
+        if not 1 <= k0 < par.anios:
+            raise ValueError(f"start_year debe estar entre 1 y anios-1 ({par.anios - 1})")
+    elif start_year:
+        raise ValueError("start_year requiere start_state")
+
+    if backend == "auto":
+        if _numba_kernel() is not None and profiler is None:
+            backend = "numba"
+        else:
+            backend = "python" if (start_state is not None or keep_states) else "numpy"
+    if backend == "python":
+        raw = _simulate_python(par, start_state, profiler)
+    elif backend == "numba":
+        if profiler is not None:
+            raise ValueError("backend='numba' no soporta profiler (usar 'python' o 'numpy')")
+        kernel = _numba_kernel()
+        if kernel is None:
+            raise ImportError("backend='numba' requiere numba instalado (pip install numba); usar backend='auto'")
+        raw = _simulate_kernel(par, kernel, start_state)
+    elif backend == "numpy":
+        if start_state is not None or keep_states:
+            raise ValueError("backend='numpy' no soporta start_state/keep_states (usar 'python' o 'numba')")
+        out = simulate_batch_arrays(repeat_params(par, 1), 1, par.anios,
+                                    columns=columns, round_counts=round_counts, profiler=profiler)
+        G, Div = out.pop("G")[0], out.pop("Div")[0]
+        cols = {c: v[0] for c, v in out.items()}
+        extras = {"G": G, "Div": Div, "params": asdict(par)}
+    else:
+        raise ValueError(f"backend desconocido: {backend!r} (opciones: {', '.join(BACKENDS)})")
+    if backend != "numpy":
+        cols, extras = _assemble(par, raw, start_state, columns, round_counts)
+        if keep_states:
+            extras["states"] = _states_from_raw(par, raw, k0)
+    if output == "frame":
+        return _pd().DataFrame(cols), extras
+    if output == "records":
+        return to_records(cols), extras
+    return cols, extras
+
+
+def _states_from_raw(par: Params, raw: Dict[str, np.ndarray], k0: int) -> Dict[int, SimState]:
+    # Estados al inicio de cada año k0+1..anios-1, con las mismas expresiones que el paso anual
+    G, iG12 = raw["G"], GRADE_INDEX["G12"]
+    cuota = resolve_schedule("cuota_mensual", par.cuota_mensual, par.anios)
+    states = {}
+    for k in range(k0, par.anios - 1):
+        states[k + 1] = SimState(
+            anio=k + 1,
+            G=G[k + 1].copy(),
+            Div=np.asarray(raw["Div"][k]).copy(),   # Div[k+1] arranca como copia de Div[k]
+            calidad=float(raw["calidad"][k]),
+            Demanda=float(raw["Demanda"][k]),
+            Marketing=float(raw["Marketing"][k]),
+            fact_prev=float(G[k, :].sum() * cuota[k] * par.meses_cobro),
+            egresados=max(float(G[k, iG12]) * (1.0 - float(raw["tasa_bajas"][k])), 0.0),
+        )
+    return states
+
+
+# =====================================================================
+# Simulación año a año (generador)
+# =====================================================================
+
+def iter_simulate(par: Params, start_state: Optional[SimState] = None,
+                  stop: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                  round_counts: bool = True,
+                  profiler: Optional[PhaseProfiler] = None) -> Iterator[Dict[str, Any]]:
+    """Igual que `simulate` (backend "python"), pero entrega cada año apenas se
+    calcula: un dict con las columnas de OUTPUT_COLUMNS más "G" y "Div" del año.
+
+    Para cortar antes basta con dejar de iterar, o pasar `stop(fila) -> bool`:
+    el generador termina después de entregar la primera fila con stop True
+    (ver stop_after_losses / stop_if_calidad_below). Las filas coinciden con
+    las de `simulate` para los mismos años.
+    """
+    sch = resolve_schedules(par)
+    cuota, costo, no_doc = sch["cuota_mensual"], sch["costo_docente_por_aula"], sch["sueldos_no_docentes"]
+    k0 = 0 if start_state is None else start_state.anio
+    iG12 = GRADE_INDEX["G12"]
+    for k, raw in _iter_python(par, start_state, profiler):
+        G, Div, tasa_bajas = raw["G"], raw["Div"], raw["tasa_bajas"]
+        alumnos = G[k, :].sum()
+        facturacion = alumnos * cuota[k] * par.meses_cobro
+        sueldos_docentes = np.sum(Div[k]) * costo[k]
+        costos = sueldos_docentes + no_doc[k] + par.mantenimiento_prop * facturacion + raw["Marketing"][k]
+        if k == k0:
+            egresados = 0.0 if start_state is None else start_state.egresados
+        else:
+            egresados = max(float(G[k-1, iG12]) * (1.0 - float(tasa_bajas[k-1])), 0.0)
+        fila = {
+            "anio": k,
+            "alumnos_totales": alumnos,
+            "calidad": raw["calidad"][k],
+            "tasa_bajas": tasa_bajas[k],
+            "bajas_totales": max(int(np.rint(tasa_bajas[k] * alumnos)), 0),
+            "egresados": max(int(np.rint(egresados)), 0),
+            "nuevos_candidatos": raw["nuevos_candidatos"][k],
+            "candidatos_pago": raw["candidatos_pago"][k],
+            "candidatos_organico": raw["candidatos_organico"][k],
+            "admitidos_deseados": raw["admitidos_deseados"][k],
+            "admitidos": raw["admitidos"][k],
+            "Demanda": raw["Demanda"][k],
+            "Marketing": raw["Marketing"][k],
+            "CAC": raw["CAC"][k],
+            "DivG1": Div[k, 0],
+            "AulasTotales": Div[k].sum(),
+            "hacinamiento_prom": raw["hacinamiento_prom"][k],
+            "selectividad": raw["selectividad"][k],
+            "capacidad_binding": int(raw["capacidad_binding"][k]),
+            "demanda_binding": int(raw["demanda_binding"][k]),
+            "facturacion": facturacion,
+            "sueldos_docentes": sueldos_docentes,
+            "costos_totales": costos,
+            "resultado": facturacion - costos - raw["inv_infra"][k],
+        }
+        if round_counts:
+            for c in ROUND_COLUMNS:
+                fila[c] = int(np.round(fila[c]))
+        fila["G"] = np.round(G[k]).astype(int) if round_counts else G[k].copy()
+        fila["Div"] = Div[k].copy()
+        yield fila
+        if stop is not None and stop(fila):
+            return
+
+
+def stop_after_losses(n: int = 3) -> Callable[[Dict[str, Any]], bool]:
+    """Criterio de corte: `resultado` negativo `n` años seguidos.
+    Guarda estado: crear uno nuevo por corrida."""
+    racha = 0
+
+    def stop(fila: Dict[str, Any]) -> bool:
+        nonlocal racha
+        racha = racha + 1 if fila["resultado"] < 0 else 0
+        return racha >= n
+    return stop
+
+
+def stop_if_calidad_below(piso: float) -> Callable[[Dict[str, Any]], bool]:
+    """Criterio de corte: `calidad` por debajo de `piso`."""
+    return lambda fila: fila["calidad"] < piso
+
+
+def _init_from_state(st: SimState, G, Div, calidad, Demanda, Marketing) -> None:
+    # Carga el estado en los arrays de la corrida (fila st.anio y previas)
+    k0 = st.anio
+    G[k0, :] = st.G
+    Div[k0, :] = st.Div
+    calidad[k0 - 1] = st.calidad
+    Demanda[k0 - 1] = st.Demanda
+    Marketing[k0 - 1] = st.Marketing
+
+
+def _simulate_python(par: Params, start_state: Optional[SimState] = None,
+                     prof: Optional[PhaseProfiler] = None) -> Dict[str, np.ndarray]:
+    for _, raw in _iter_python(par, start_state, prof):
+        pass
+    return raw
+
+
+def _iter_python(par: Params, start_state: Optional[SimState] = None,
+                 prof: Optional[PhaseProfiler] = None):
+    # Loop anual de referencia. Entrega (k, raw) al terminar cada año: las
+    # series de raw quedan completas hasta el año k inclusive.
     G = np.zeros((par.anios, N_GRADES))
     Div = np.zeros((par.anios, N_GRADES), dtype=int)
     calidad = np.zeros(par.anios)
@@ -111,29 +539,52 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     capacidad_binding = np.zeros(par.anios, dtype=bool)
     demanda_binding = np.zeros(par.anios, dtype=bool)
 
-    G[0, :] = par.alumnos_inicial_por_grado
-    Div[0, :] = par.divisiones_iniciales
-    calidad[0] = par.calidad_base
-    Demanda[0] = max(par.demanda_inicial, G[0, :].sum() + 50)
-    fact_prev = G[0, :].sum() * par.cuota_mensual * par.meses_cobro
-    Marketing[0] = max(par.mkt_floor, par.prop_mkt * fact_prev)
+    # Calendarios resueltos una vez (listas: indexarlas por año es barato)
+    sch = resolve_schedules(par)
+    cuota = sch["cuota_mensual"].tolist()
+    prop_mkt = sch["prop_mkt"].tolist()
+    mkt_floor = sch["mkt_floor"].tolist()
+    politica = sch["politica_seleccion"].tolist()
+    adm_max = sch["admitidos_max_abs"].tolist()
+    extra_div = list(zip(*(sch[f"extra_div_{g}_per_year"].tolist() for g in ("k3", "k4", "k5", "g1"))))
+
+    k0 = 0
+    if start_state is None:
+        G[0, :] = par.alumnos_inicial_por_grado
+        Div[0, :] = par.divisiones_iniciales
+        calidad[0] = par.calidad_base
+        Demanda[0] = max(par.demanda_inicial, G[0, :].sum() + 50)
+        fact_prev = G[0, :].sum() * cuota[0] * par.meses_cobro
+        Marketing[0] = max(mkt_floor[0], prop_mkt[0] * fact_prev)
+    else:
+        k0 = start_state.anio
+        _init_from_state(start_state, G, Div, calidad, Demanda, Marketing)
+        fact_prev = start_state.fact_prev
+
+    raw = {
+        "G": G, "Div": Div, "calidad": calidad, "Demanda": Demanda, "Marketing": Marketing,
+        "CAC": CAC, "admitidos": admitidos, "admitidos_deseados": admitidos_deseados,
+        "nuevos_candidatos": nuevos_candidatos, "candidatos_pago": candidatos_pago,
+        "candidatos_organico": candidatos_organico, "tasa_bajas": tasa_bajas,
+        "inv_infra": inv_infra, "hacinamiento_prom": hac_prom_hist,
+        "selectividad": selectividad_hist, "capacidad_binding": capacidad_binding,
+        "demanda_binding": demanda_binding,
+    }
 
-    for k in range(par.anios):
+    for k in range(k0, par.anios):
+        if prof is not None:
+            prof.start()
         # --- Crecimiento manual de aulas ---
         if par.manual_crecimiento:
-            add_map = {
-                GRADE_INDEX["K3"]: par.extra_div_k3_per_year,
-                GRADE_INDEX["K4"]: par.extra_div_k4_per_year,
-                GRADE_INDEX["K5"]: par.extra_div_k5_per_year,
-                GRADE_INDEX["G1"]: par.extra_div_g1_per_year,
-            }
             nuevas = 0
-            for idx, add in add_map.items():
+            for idx, add in zip(ENTRY_INDEX, extra_div[k]):
                 if add > 0:
                     Div[k, idx] += int(add)
                     nuevas += int(add)
             if nuevas > 0:
                 inv_infra[k] += par.capex_aula * nuevas  # CAPEX por cada aula nueva
+        if prof is not None:
+            prof.lap("aulas_manual", k)
         
         # Si es "solo_manual", apagamos el trigger automático
         auto_trigger = (not par.solo_manual) and par.trigger_auto_aula
@@ -145,15 +596,20 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
                 - par.delta_demanda_saturacion * alumnos_k,
                 alumnos_k + par.piso_demanda_gap
             )
+        if prof is not None:
+            prof.lap("demanda", k)
 
         saturacion = 0.0 if Demanda[k] <= 0 else (alumnos_k / max(Demanda[k], 1e-9))
         CAC[k] = par.cac_base * (1.0 + par.k_saturacion * saturacion)
-        precio_rel = par.cuota_mensual / max(par.ref_precio, 1e-9)
+        precio_rel = cuota[k] / max(par.ref_precio, 1e-9)
         CAC[k] *= (1.0 + par.k_precio_cac * max(precio_rel - 1.0, 0.0))
 
         if k > 0:
-            fact_prev = G[k-1, :].sum() * par.cuota_mensual * par.meses_cobro
-            Marketing[k] = max(par.mkt_floor, par.prop_mkt * fact_prev)
+            if k > k0:
+                fact_prev = G[k-1, :].sum() * cuota[k-1] * par.meses_cobro
+            Marketing[k] = max(mkt_floor[k], prop_mkt[k] * fact_prev)
+        if prof is not None:
+            prof.lap("cac_marketing", k)
 
         candidatos_pago[k] = Marketing[k] / max(CAC[k], 1e-9)
         candidatos_organico[k] = par.k_calidad_candidatos * (calidad[k-1] if k > 0 else calidad[0])
@@ -175,6 +631,8 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         cand_k4 = nuevos_candidatos[k] * w_k4
         cand_k5 = nuevos_candidatos[k] * w_k5
         cand_g1 = nuevos_candidatos[k] * w_g1
+        if prof is not None:
+            prof.lap("candidatos", k)
 
         # Índices de grados de entrada
         iK3 = GRADE_INDEX["K3"]; iK4 = GRADE_INDEX["K4"]; iK5 = GRADE_INDEX["K5"]; iG1 = GRADE_INDEX["G1"]
@@ -185,10 +643,10 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         cap_g1 = Div[k, iG1] * par.cupo_maximo
         
         # Política de selección por grado
-        adm_des_k3 = min(par.politica_seleccion * cand_k3, cap_k3)
-        adm_des_k4 = min(par.politica_seleccion * cand_k4, cap_k4)
-        adm_des_k5 = min(par.politica_seleccion * cand_k5, cap_k5)
-        adm_des_g1 = min(par.politica_seleccion * cand_g1, cap_g1)
+        adm_des_k3 = min(politica[k] * cand_k3, cap_k3)
+        adm_des_k4 = min(politica[k] * cand_k4, cap_k4)
+        adm_des_k5 = min(politica[k] * cand_k5, cap_k5)
+        adm_des_g1 = min(politica[k] * cand_g1, cap_g1)
         
         # Gap de demanda total puede acotar el total de admitidos (en bloque)
         gap_demanda = max(Demanda[k] - float(G[k, :].sum()), 0.0)
@@ -206,11 +664,13 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
 
         capacidad_g1 = int(Div[k, 0] * par.cupo_maximo)
         gap_demanda = max(Demanda[k] - alumnos_k, 0.0)
-        cap_politica = par.politica_seleccion * nuevos_candidatos[k]
-        if par.admitidos_max_abs >= 0:
-            cap_politica = min(cap_politica, float(par.admitidos_max_abs))
+        cap_politica = politica[k] * nuevos_candidatos[k]
+        if adm_max[k] >= 0:
+            cap_politica = min(cap_politica, adm_max[k])
         admitidos_deseados[k] = min(cap_politica, gap_demanda)
         admitidos[k] = min(admitidos_deseados[k], float(capacidad_g1))
+        if prof is not None:
+            prof.lap("admisiones", k)
 
         build = False
         if par.trigger_auto_aula:
@@ -221,6 +681,8 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
             inv_infra[k] += par.capex_aula
             if k < par.anios - 1:
                 Div[k, 0] += 1
+        if prof is not None:
+            prof.lap("construccion", k)
 
         div_valid = np.maximum(Div[k, :], 1e-9)
         ratio = G[k, :] / (div_valid * par.cupo_optimo)
@@ -229,6 +691,8 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         if par.gamma_hacinamiento != 1.0 and hac_prom > 0:
             hac_prom = hac_prom ** par.gamma_hacinamiento
         hac_prom_hist[k] = hac_prom
+        if prof is not None:
+            prof.lap("hacinamiento", k)
 
         inv_calidad_alumno[k] = 0.5 * Marketing[k]
         inv_alum_norm = 0.0
@@ -256,6 +720,8 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         )
         prev_c = calidad[k-1] if k > 0 else par.calidad_base
         calidad[k] = float(np.clip(prev_c + par.alpha_calidad * (calidad_inst - prev_c), 0.0, 1.0))
+        if prof is not None:
+            prof.lap("calidad", k)
 
         tasa = (
             par.tasa_bajas_base
@@ -266,44 +732,16 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         tasa_bajas[k] = tasa
         bajas_tot = tasa * alumnos_k
 
-        next_row = np.zeros(N_GRADES)
-        
-        # Ingresos por admisión externa a grados de entrada
-        next_row[iK3] += adm_k3
-        next_row[iK4] += adm_k4
-        next_row[iK5] += adm_k5
-        next_row[iG1] += adm_g1
-        
-        # Bajas totales del año (ya calculaste 'tasa' y 'bajas_tot' antes)
-        alumnos_k = float(G[k, :].sum())
-        def bajas_por(grado_idx):
-            return 0.0 if alumnos_k <= 0 else (G[k, grado_idx] / alumnos_k) * bajas_tot
-        
-        # Kinder: K3 -> K4 ; K4 -> K5 ; K5 -> G1 (con continuidad)
-        iG2 = GRADE_INDEX["G2"]
-        iG12 = GRADE_INDEX["G12"]
-        
-        # K3 -> K4
-        k3_net = max(G[k, iK3] - bajas_por(iK3), 0.0)
-        next_row[iK4] += k3_net
-        
-        # K4 -> K5
-        k4_net = max(G[k, iK4] - bajas_por(iK4), 0.0)
-        next_row[iK5] += k4_net
-        
-        # K5 -> G1 con continuidad
-        k5_net = max(G[k, iK5] - bajas_por(iK5), 0.0)
-        next_row[iG1] += par.tasa_cont_k_to_g1 * k5_net
-        
-        # Primaria/Secundaria: G1 -> G2 -> ... -> G12
-        for g in range(1, 13):
-            name_src = f"G{g}"
-            idx_src = GRADE_INDEX[name_src]
-            if g < 12:
-                idx_dst = GRADE_INDEX[f"G{g+1}"]
-                net = max(G[k, idx_src] - bajas_por(idx_src), 0.0)
-                next_row[idx_dst] += net
-            # G12 egresa (no se suma)
+        # Bajas por grado, proporcionales a la matrícula del grado
+        bajas = np.zeros(N_GRADES) if alumnos_k <= 0 else (G[k, :] / alumnos_k) * bajas_tot
+        net = np.maximum(G[k, :] - bajas, 0.0)
+        if prof is not None:
+            prof.lap("bajas", k)
+
+        # Progresión K3 -> K4 -> K5 -> G1 (con continuidad) -> ... -> G12 (egresa)
+        # + ingresos por admisión externa a grados de entrada
+        next_row = progress_cohorts(net, par.tasa_cont_k_to_g1)
+        next_row[ENTRY_INDEX] += (adm_k3, adm_k4, adm_k5, adm_g1)
 
         if k < par.anios - 1:
             G[k+1, :] = next_row
@@ -311,20 +749,39 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
 
         capacidad_binding[k] = admitidos[k] < admitidos_deseados[k]
         demanda_binding[k] = (G[k, :].sum() >= Demanda[k] - 1e-6)
+        if prof is not None:
+            prof.lap("progresion", k)
+        yield k, raw
+
 
-    alumnos_tot = np.array([G[i, :].sum() for i in range(par.anios)])
-    facturacion = alumnos_tot * par.cuota_mensual * par.meses_cobro
-    sueldos_docentes = np.sum(Div, axis=1) * par.costo_docente_por_aula
-    costos = sueldos_docentes + par.sueldos_no_docentes + par.mantenimiento_prop * facturacion + Marketing
+def _assemble(par: Params, raw: Dict[str, np.ndarray], start_state: Optional[SimState] = None,
+              columns: Optional[Sequence[str]] = None,
+              round_counts: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    # Finanzas, egresados y columnas de salida (dict de arrays) a partir de las series del paso anual.
+    # Si se reanudó desde start_state, sólo se arma el tramo start_state.anio..anios-1.
+    k0 = 0 if start_state is None else start_state.anio
+    if k0:
+        raw = {name: v[k0:] for name, v in raw.items()}
+    n_anios = par.anios - k0
+    G, Div = raw["G"], raw["Div"]
+    tasa_bajas, Marketing, inv_infra = raw["tasa_bajas"], raw["Marketing"], raw["inv_infra"]
+
+    sch = {name: v[k0:] for name, v in resolve_schedules(par).items()}
+
+    alumnos_tot = np.array([G[i, :].sum() for i in range(n_anios)])
+    facturacion = alumnos_tot * sch["cuota_mensual"] * par.meses_cobro
+    sueldos_docentes = np.sum(Div, axis=1) * sch["costo_docente_por_aula"]
+    costos = sueldos_docentes + sch["sueldos_no_docentes"] + par.mantenimiento_prop * facturacion + Marketing
     resultado = facturacion - costos - inv_infra
 
     # --- Egresados por año (los G12 del año anterior, luego de bajas del año anterior) ---
     iG12 = GRADE_INDEX["G12"]
-    egresados = np.zeros(par.anios, dtype=float)
+    egresados = np.zeros(n_anios, dtype=float)
     
-    for t in range(par.anios):
+    for t in range(n_anios):
         if t == 0:
-            egresados[t] = 0.0  # no hay egresados en el año 0
+            # no hay egresados en el año 0 (o vienen del estado si se reanudó)
+            egresados[t] = 0.0 if start_state is None else start_state.egresados
         else:
             G12_prev = float(G[t-1, iG12])
             tasa_prev = float(tasa_bajas[t-1])
@@ -337,13 +794,541 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     bajas_totales = (tasa_bajas * G.sum(axis=1))
     bajas_totales = np.maximum(np.rint(bajas_totales), 0).astype(int)
 
-    df = pd.DataFrame({
-        "anio": np.arange(par.anios),
+    cols = {
+        "anio": np.arange(k0, par.anios),
         "alumnos_totales": alumnos_tot,
-        "calidad": calidad,
+        "calidad": raw["calidad"],
         "tasa_bajas": tasa_bajas,
         "bajas_totales": bajas_totales,   # nuevo (útil para auditoría)
         "egresados": egresados,          # <<— NUEVO
+        "nuevos_candidatos": raw["nuevos_candidatos"],
+        "candidatos_pago": raw["candidatos_pago"],
+        "candidatos_organico": raw["candidatos_organico"],
+        "admitidos_deseados": raw["admitidos_deseados"],
+        "admitidos": raw["admitidos"],
+        "Demanda": raw["Demanda"],
+        "Marketing": Marketing,
+        "CAC": raw["CAC"],
+        "DivG1": Div[:, 0],
+        "AulasTotales": Div.sum(axis=1),
+        "hacinamiento_prom": raw["hacinamiento_prom"],
+        "selectividad": raw["selectividad"],
+        "capacidad_binding": raw["capacidad_binding"].astype(int),
+        "demanda_binding": raw["demanda_binding"].astype(int),
+        "facturacion": facturacion,
+        "sueldos_docentes": sueldos_docentes,
+        "costos_totales": costos,
+        "resultado": resultado,
+    }
+    cols = select_columns(cols, columns, round_counts)
+
+    # También redondeamos la matriz G (alumnos por grado)
+    if round_counts:
+        G = np.round(G).astype(int)
+    extras = {"G": G, "Div": Div, "params": asdict(par)}
+    return cols, extras
+
+
+# =====================================================================
+# Motor en lote (vectorizado sobre escenarios)
+# =====================================================================
+# Mismo modelo que `simulate`, pero con el eje de escenarios en NumPy:
+# G/Div -> (n, anios, N_GRADES) y el resto de las series -> (n, anios).
+# Cada paso anual se calcula para todos los escenarios a la vez.
+
+PARAM_FIELDS = [f.name for f in fields(Params)]
+PARAM_TYPES = {f.name: f.type for f in fields(Params)}
+_PARAM_DEFAULTS = asdict(Params())
+
+
+def cast_param(name: str, values: Any) -> np.ndarray:
+    """Castea valores (p.ej. muestreados como float) al tipo declarado del campo:
+    int -> redondeo, bool -> umbral 0.5 (un muestreo uniforme en [0, 1] da
+    mitad y mitad), float -> float."""
+    values = np.asarray(values)
+    t = PARAM_TYPES[name]
+    if t is bool:
+        if values.dtype == bool:
+            return values
+        return values.astype(float) >= 0.5
+    if t is int:
+        return np.rint(values.astype(float)).astype(int)
+    return values.astype(float)
+
+
+def _es_numero(x: Any) -> bool:
+    # int/float de Python o NumPy; bool no cuenta como número
+    return isinstance(x, (int, float, np.integer, np.floating)) and not isinstance(x, (bool, np.bool_))
+
+
+def validate_params(d: Any, max_anios: Optional[int] = None) -> Params:
+    """Params desde un dict campo -> valor (JSON, YAML, CSV...), con tipos
+    estrictos según PARAM_TYPES: bool sólo acepta True/False, int/float sólo
+    números (sin strings), int sólo valores enteros, y los calendarios sólo
+    listas o dicts de números. Errores -> ValueError."""
+    if not isinstance(d, Mapping):
+        raise ValueError("Params debe ser un objeto campo -> valor")
+    desconocidos = set(d) - set(PARAM_FIELDS)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(map(str, desconocidos))}")
+    for campo, v in d.items():
+        tipo = PARAM_TYPES[campo]
+        if tipo is bool:
+            if not isinstance(v, (bool, np.bool_)):
+                raise ValueError(f"'{campo}' debe ser true/false (llegó {v!r})")
+        elif campo in SCHEDULE_FIELDS and isinstance(v, (list, dict)):
+            valores = v.values() if isinstance(v, dict) else v
+            if not all(_es_numero(x) for x in valores):
+                raise ValueError(f"El calendario de '{campo}' debe tener sólo números")
+        elif not _es_numero(v):
+            raise ValueError(f"'{campo}' debe ser un número (llegó {v!r})")
+        elif tipo is int and not float(v).is_integer():
+            raise ValueError(f"'{campo}' debe ser entero (llegó {v!r})")
+    par = Params(**d)
+    if par.anios < 1 or (max_anios is not None and par.anios > max_anios):
+        rango = f"entre 1 y {max_anios}" if max_anios is not None else ">= 1"
+        raise ValueError(f"anios debe estar {rango} (llegó {par.anios})")
+    params_hash(par)   # valida calendarios (largo, año 0)
+    return par
+
+# Columnas de salida (mismo orden que el DataFrame de `simulate`)
+OUTPUT_COLUMNS = [
+    "anio", "alumnos_totales", "calidad", "tasa_bajas", "bajas_totales", "egresados",
+    "nuevos_candidatos", "candidatos_pago", "candidatos_organico",
+    "admitidos_deseados", "admitidos", "Demanda", "Marketing", "CAC",
+    "DivG1", "AulasTotales", "hacinamiento_prom", "selectividad",
+    "capacidad_binding", "demanda_binding",
+    "facturacion", "sueldos_docentes", "costos_totales", "resultado",
+]
+ROUND_COLUMNS = [
+    "alumnos_totales", "nuevos_candidatos", "candidatos_pago",
+    "candidatos_organico", "admitidos_deseados", "admitidos",
+    "Demanda", "DivG1", "AulasTotales"
+]
+OUTPUTS = ("frame", "arrays", "records")
+
+
+def select_columns(out: Mapping[str, np.ndarray], columns: Optional[Sequence[str]] = None,
+                   round_counts: bool = True) -> Dict[str, np.ndarray]:
+    """Se queda con `columns` de `out` (en ese orden; por defecto OUTPUT_COLUMNS)
+    y, con round_counts, redondea a int las columnas de conteo (ROUND_COLUMNS)."""
+    names = OUTPUT_COLUMNS if columns is None else list(columns)
+    unknown = [c for c in names if c not in OUTPUT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Columnas desconocidas: {unknown} (opciones: {', '.join(OUTPUT_COLUMNS)})")
+    return {c: (np.round(out[c]).astype(int) if round_counts and c in ROUND_COLUMNS else out[c])
+            for c in names}
+
+
+def to_records(cols: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Empaqueta un dict de columnas (todas de la misma forma) en un array
+    estructurado de NumPy: rec["resultado"], rec[3], etc."""
+    arrays = [np.asarray(v) for v in cols.values()]
+    rec = np.empty(arrays[0].shape, dtype=[(c, v.dtype) for c, v in zip(cols, arrays)])
+    for c, v in zip(cols, arrays):
+        rec[c] = v
+    return rec
+
+
+def to_frame(cols: Union[Mapping[str, np.ndarray], np.ndarray]) -> "pd.DataFrame":
+    """DataFrame (una fila por año) a partir de la salida de
+    `simulate(..., output="arrays")` o `output="records"`."""
+    if isinstance(cols, np.ndarray):
+        return _pd().DataFrame({c: cols[c] for c in cols.dtype.names})
+    return _pd().DataFrame(dict(cols))
+
+
+def params_to_arrays(params: Union[Sequence[Params], Mapping[str, Any]]) -> Tuple[Dict[str, np.ndarray], int, int]:
+    """Convierte una lista de Params (o un dict campo -> escalar/array) en
+    struct-of-arrays. Devuelve (arrays, n_escenarios, anios).
+
+    Los campos de SCHEDULE_FIELDS con calendario quedan como (n, anios); en el
+    dict se pasan directamente como array 2D (n, anios)."""
+    if isinstance(params, Mapping):
+        unknown = set(params) - set(PARAM_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+        vals = {name: np.asarray(params.get(name, _PARAM_DEFAULTS[name])) for name in PARAM_FIELDS}
+        for name, v in vals.items():
+            if v.ndim > 2 or (v.ndim == 2 and name not in SCHEDULE_FIELDS):
+                raise ValueError(f"'{name}' debe ser escalar o 1D (forma {v.shape})")
+        sizes = {v.shape[0] for v in vals.values() if v.ndim > 0}
+        if len(sizes) > 1:
+            raise ValueError(f"Los arrays de parámetros tienen largos distintos: {sorted(sizes)}")
+        n = sizes.pop() if sizes else 1
+        cols = {name: (v if v.ndim == 2 else np.broadcast_to(v, (n,))).copy() for name, v in vals.items()}
+    else:
+        params = list(params)
+        if not params:
+            raise ValueError("Se necesita al menos un escenario")
+        n = len(params)
+        cols = {}
+        for name in PARAM_FIELDS:
+            values = [getattr(p, name) for p in params]
+            if name in SCHEDULE_FIELDS and any(is_scheduled(v) for v in values):
+                cols[name] = np.stack([resolve_schedule(name, v, p.anios) for p, v in zip(params, values)])
+            else:
+                cols[name] = np.array(values)
+                if cols[name].ndim != 1:
+                    raise ValueError(f"'{name}' no admite calendario (campos válidos: {', '.join(SCHEDULE_FIELDS)})")
+
+    # Sin np.unique: arrastra el import de numpy.ma (~10 ms del arranque de cli.py)
+    anios = cols["anios"]
+    if anios.size == 0 or np.any(anios != anios[0]):
+        raise ValueError("Todos los escenarios de un lote deben tener el mismo 'anios'")
+    anios = int(anios[0])
+    for name in SCHEDULE_FIELDS:
+        if cols[name].ndim == 2 and cols[name].shape[1] != anios:
+            raise ValueError(f"El calendario de '{name}' debe tener largo anios={anios}")
+    return cols, n, anios
+
+
+def params_hashes(P: Mapping[str, np.ndarray]) -> List[str]:
+    """`params_hash` de cada escenario de un struct-of-arrays (salida de
+    params_to_arrays), sin armar un Params por escenario. Mismo resultado."""
+    enc = []
+    for name in sorted(PARAM_FIELDS):
+        v, t = np.asarray(P[name]), PARAM_TYPES[name]
+        cast = float if t is float else int if t is int else bool
+        if v.ndim == 2:
+            rows = v.astype(float)
+            const = (rows == rows[:, :1]).all(axis=1)
+            vals = [json.dumps(cast(r[0]) if c else r.tolist(), separators=(",", ":"))
+                    for r, c in zip(rows, const)]
+        else:
+            col = v.astype(float if t is float else int if t is int else bool).tolist()
+            vals = json.dumps(col, separators=(",", ":"))[1:-1].split(",")
+        enc.append([f'"{name}":{x}' for x in vals])
+    return [hashlib.sha256(("{" + ",".join(fila) + "}").encode("utf-8")).hexdigest()
+            for fila in zip(*enc)]
+
+
+def repeat_params(par: Params, n: int) -> Dict[str, np.ndarray]:
+    """Struct-of-arrays con n copias de `par` (respeta calendarios)."""
+    P, _, _ = params_to_arrays([par])
+    return {name: np.repeat(v, n, axis=0) for name, v in P.items()}
+
+
+def simulate_batch(params: Union[Sequence[Params], Mapping[str, Any]],
+                   columns: Optional[Sequence[str]] = None,
+                   round_counts: bool = True,
+                   profiler: Optional[PhaseProfiler] = None) -> Dict[str, np.ndarray]:
+    """Simula muchos escenarios a la vez.
+
+    Acepta una lista de Params o un dict campo -> array (los campos que
+    falten toman el valor por defecto de Params). Devuelve un dict con las
+    mismas columnas que el DataFrame de `simulate` (o sólo `columns`), cada
+    una de forma (n, anios), más "G" y "Div" de forma (n, anios, N_GRADES).
+    Para un DataFrame, convertir una vez el lote con `batch_to_frame`.
+    profiler: PhaseProfiler opcional (tiempos por fase y año del lote).
+    """
+    P, n, anios = params_to_arrays(params)
+    return simulate_batch_arrays(P, n, anios, columns=columns, round_counts=round_counts,
+                                 profiler=profiler)
+
+
+def simulate_batch_arrays(P: Dict[str, np.ndarray], n: int, anios: int,
+                          rng: Optional["np.random.Generator"] = None,
+                          sigma_demanda: float = 0.0,
+                          columns: Optional[Sequence[str]] = None,
+                          round_counts: bool = True,
+                          profiler: Optional[PhaseProfiler] = None,
+                          red: Optional[Dict[str, float]] = None,
+                          micro: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """Núcleo del motor en lote sobre struct-of-arrays ya armado (P, n, anios
+    como los devuelve `params_to_arrays`). Es lo que usan simulate_batch,
+    montecarlo, network y microsim.
+
+    Con `rng` pasa a modo estocástico (Monte Carlo):
+      - ruido normal en el crecimiento de la Demanda (desvío sigma_demanda * Demanda previa)
+      - candidatos ~ Poisson(candidatos esperados)
+      - admisiones enteras, bajas ~ Binomial(alumnos del grado, tasa) y
+        continuidad K5 -> G1 ~ Binomial(k5_net, tasa_cont)
+    Con `red` (ver network.py) los n escenarios son campus de una misma red que
+    comparten un pool de Demanda: red = {"demanda_inicial", "piso_demanda_gap",
+    "k_calidad", "k_precio"}. Agrega "Demanda_red" (anios,) y "participacion" (n, anios).
+    Con `micro` (ver microsim.py, requiere `rng`) las bajas, la continuidad y los
+    pases se resuelven alumno por alumno: micro.paso(k, tasa, tasa_cont, adm, ultimo)
+    devuelve los conteos por grado del año k+1.
+    """
+    if micro is not None and rng is None:
+        raise ValueError("El modo por alumno requiere rng")
+    estocastico = rng is not None
+    prof = profiler
+    Pf = {name: v.astype(float) for name, v in P.items()}
+    f = Pf.__getitem__
+
+    G = np.zeros((n, anios, N_GRADES))
+    Div = np.zeros((n, anios, N_GRADES), dtype=int)
+    calidad = np.zeros((n, anios))
+    Demanda = np.zeros((n, anios))
+    Marketing = np.zeros((n, anios))
+    CAC = np.zeros((n, anios))
+    admitidos = np.zeros((n, anios))
+    admitidos_deseados = np.zeros((n, anios))
+    nuevos_candidatos = np.zeros((n, anios))
+    candidatos_pago = np.zeros((n, anios))
+    candidatos_organico = np.zeros((n, anios))
+    tasa_bajas = np.zeros((n, anios))
+    inv_infra = np.zeros((n, anios))
+    hac_prom_hist = np.zeros((n, anios))
+    selectividad_hist = np.zeros((n, anios))
+    capacidad_binding = np.zeros((n, anios), dtype=bool)
+    demanda_binding = np.zeros((n, anios), dtype=bool)
+    if estocastico and micro is None:
+        # Conteos sorteados (no esperados): bajas del año y G12 que siguen tras las bajas
+        bajas_sorteadas = np.zeros((n, anios), dtype=np.int64)
+        egresados_sorteados = np.zeros((n, anios), dtype=np.int64)
+
+    # --- Parámetros como vectores (n,); los campos con calendario pueden venir (n, anios) ---
+    yr = lambda v, k: v if v.ndim == 1 else v[:, k]       # valor del año k
+    col = lambda v: v[:, None] if v.ndim == 1 else v      # para operar contra (n, anios)
+    cuota, meses = f("cuota_mensual"), f("meses_cobro")
+    prop_mkt, mkt_floor = f("prop_mkt"), f("mkt_floor")
+    cupo_max, cupo_opt = P["cupo_maximo"], f("cupo_optimo")
+    politica = f("politica_seleccion")
+    capex = f("capex_aula")
+    manual = P["manual_crecimiento"].astype(bool)
+    trigger = P["trigger_auto_aula"].astype(bool)
+    regla = P["regla_dos_div"].astype(bool)
+    adm_max = f("admitidos_max_abs")
+    gamma = f("gamma_hacinamiento")
+    tasa_cont = f("tasa_cont_k_to_g1")
+    ref_precio = np.maximum(f("ref_precio"), 1e-9)
+    precio_rel = cuota / (ref_precio if cuota.ndim == 1 else ref_precio[:, None])
+    sobreprecio = np.maximum(precio_rel - 1.0, 0.0)
+
+    iK3, iK4, iK5, iG1 = (GRADE_INDEX[g] for g in ("K3", "K4", "K5", "G1"))
+    entrada = ENTRY_INDEX
+
+    # Aulas extra por año (plan manual), truncadas a entero como en `simulate`
+    extra = [P[f"extra_div_{g}_per_year"] for g in ("k3", "k4", "k5", "g1")]
+    if any(e.ndim == 2 for e in extra):
+        extra = [np.broadcast_to(col(e), (n, anios)) for e in extra]
+    extra = np.stack(extra, axis=1)                                  # (n, 4) o (n, 4, anios)
+    manual_mask = manual.reshape((n,) + (1,) * (extra.ndim - 1))
+    extra = np.where(manual_mask & (extra > 0), extra.astype(int), 0)
+    nuevas_manual = extra.sum(axis=1)
+
+    # Reparto de candidatos a grados de entrada (normalizado)
+    w = np.maximum(np.stack([f(f"prop_cand_{g}") for g in ("k3", "k4", "k5", "g1")], axis=1), 0.0)
+    wsum = w[:, 0] + w[:, 1] + w[:, 2] + w[:, 3]
+    w = np.where((wsum <= 0)[:, None], 0.25, w)
+    w = w / np.where(wsum <= 0, 1.0, wsum)[:, None]
+
+    # Factores blandos
+    blandos = (
+        f("k_articulacion") * np.clip(f("nivel_articulacion"), 0.0, 1.0),
+        f("k_comunicacion") * np.clip(f("nivel_comunicacion"), 0.0, 1.0),
+        f("k_diferenciacion") * np.clip(f("nivel_diferenciacion"), 0.0, 1.0),
+    )
+
+    G[:, 0, :] = f("alumnos_inicial_por_grado")[:, None]
+    Div[:, 0, :] = P["divisiones_iniciales"][:, None]
+    calidad[:, 0] = f("calidad_base")
+    Demanda[:, 0] = np.maximum(f("demanda_inicial"), G[:, 0, :].sum(axis=1) + 50)
+    fact_prev = G[:, 0, :].sum(axis=1) * yr(cuota, 0) * meses
+    Marketing[:, 0] = np.maximum(yr(mkt_floor, 0), yr(prop_mkt, 0) * fact_prev)
+    if red is not None:
+        Demanda_red = np.zeros(anios)
+        participacion = np.zeros((n, anios))
+        Demanda_red[0] = max(red["demanda_inicial"], G[:, 0, :].sum() + 50 * n)
+
+    for k in range(anios):
+        if prof is not None:
+            prof.start()
+        Gk, Divk = G[:, k, :], Div[:, k, :]
+
+        # --- Crecimiento manual de aulas ---
+        extra_k, nuevas_k = (extra, nuevas_manual) if extra.ndim == 2 else (extra[:, :, k], nuevas_manual[:, k])
+        Divk[:, entrada] += extra_k
+        inv_infra[:, k] += np.where(nuevas_k > 0, capex * nuevas_k, 0.0)
+        if prof is not None:
+            prof.lap("aulas_manual", k)
+
+        alumnos_k = Gk.sum(axis=1)
+        if red is not None:
+            # Pool compartido: crece con la calidad de todos los campus y las familias
+            # libres se reparten por calidad (año anterior) y precio relativo (logit)
+            alumnos_red = alumnos_k.sum()
+            if k > 0:
+                Demanda_red[k] = max(
+                    Demanda_red[k-1]
+                    + (f("beta_demanda_calidad") * calidad[:, k-1]).sum()
+                    - (f("delta_demanda_saturacion") * alumnos_k).sum(),
+                    alumnos_red + red["piso_demanda_gap"]
+                )
+            u = red["k_calidad"] * calidad[:, k-1 if k > 0 else 0] - red["k_precio"] * yr(precio_rel, k)
+            e = np.exp(u - u.max())
+            participacion[:, k] = e / e.sum()
+            Demanda[:, k] = alumnos_k + participacion[:, k] * max(Demanda_red[k] - alumnos_red, 0.0)
+        elif k > 0:
+            Demanda[:, k] = np.maximum(
+                Demanda[:, k-1]
+                + f("beta_demanda_calidad") * calidad[:, k-1]
+                - f("delta_demanda_saturacion") * alumnos_k,
+                alumnos_k + f("piso_demanda_gap")
+            )
+            if estocastico and sigma_demanda > 0:
+                ruido = sigma_demanda * Demanda[:, k-1] * rng.standard_normal(n)
+                Demanda[:, k] = np.maximum(Demanda[:, k] + ruido, alumnos_k + f("piso_demanda_gap"))
+        if prof is not None:
+            prof.lap("demanda", k)
+
+        D = Demanda[:, k]
+        saturacion = np.where(D <= 0, 0.0, alumnos_k / np.maximum(D, 1e-9))
+        CAC[:, k] = f("cac_base") * (1.0 + f("k_saturacion") * saturacion)
+        CAC[:, k] *= (1.0 + f("k_precio_cac") * yr(sobreprecio, k))
+
+        if k > 0:
+            fact_prev = G[:, k-1, :].sum(axis=1) * yr(cuota, k-1) * meses
+            Marketing[:, k] = np.maximum(yr(mkt_floor, k), yr(prop_mkt, k) * fact_prev)
+        if prof is not None:
+            prof.lap("cac_marketing", k)
+
+        candidatos_pago[:, k] = Marketing[:, k] / np.maximum(CAC[:, k], 1e-9)
+        candidatos_organico[:, k] = f("k_calidad_candidatos") * calidad[:, k-1 if k > 0 else 0]
+        nuevos_candidatos[:, k] = np.maximum(0.0, candidatos_pago[:, k] + candidatos_organico[:, k])
+        if estocastico:
+            nuevos_candidatos[:, k] = rng.poisson(nuevos_candidatos[:, k])
+        nc = nuevos_candidatos[:, k]
+        cand = nc[:, None] * w
+        if prof is not None:
+            prof.lap("candidatos", k)
+
+        # --- Admisiones por grado de entrada ---
+        cap = Divk[:, entrada] * cupo_max[:, None]
+        pol_k = yr(politica, k)
+        adm_des = np.minimum(pol_k[:, None] * cand, cap)
+        gap_demanda = np.maximum(D - alumnos_k, 0.0)
+        adm_total_deseado = adm_des[:, 0] + adm_des[:, 1] + adm_des[:, 2] + adm_des[:, 3]
+        escala = np.where(
+            adm_total_deseado <= 0, 1.0,
+            np.minimum(1.0, gap_demanda / np.where(adm_total_deseado <= 0, 1.0, adm_total_deseado))
+        )
+        adm = adm_des * escala[:, None]
+        if estocastico:
+            adm = np.floor(adm)
+
+        capacidad_g1 = (Divk[:, 0] * cupo_max).astype(int)
+        cap_politica = pol_k * nc
+        adm_max_k = yr(adm_max, k)
+        cap_politica = np.where(adm_max_k >= 0, np.minimum(cap_politica, adm_max_k), cap_politica)
+        admitidos_deseados[:, k] = np.minimum(cap_politica, gap_demanda)
+        admitidos[:, k] = np.minimum(admitidos_deseados[:, k], capacidad_g1)
+        if prof is not None:
+            prof.lap("admisiones", k)
+
+        # --- Disparo de construcción ---
+        exceso_g1 = np.maximum(admitidos_deseados[:, k] - capacidad_g1, 0.0)
+        build = trigger & ((regla & (admitidos_deseados[:, k] >= 2 * cupo_max)) | (exceso_g1 > 0))
+        inv_infra[:, k] += np.where(build, capex, 0.0)
+        if k < anios - 1:
+            Divk[:, 0] += build
+        if prof is not None:
+            prof.lap("construccion", k)
+
+        # --- Hacinamiento ---
+        ratio = Gk / (np.maximum(Divk, 1e-9) * cupo_opt[:, None])
+        hac = np.where(alumnos_k <= 0, 0.0, np.clip(ratio - 1.0, 0.0, None).mean(axis=1))
+        aplica = (gamma != 1.0) & (hac > 0)
+        hac[aplica] = hac[aplica] ** gamma[aplica]
+        hac_prom_hist[:, k] = hac
+        if prof is not None:
+            prof.lap("hacinamiento", k)
+
+        # --- Calidad ---
+        inv_alum_norm = np.where(
+            alumnos_k > 0,
+            (0.5 * Marketing[:, k] / np.maximum(alumnos_k, 1e-9)) / np.maximum(f("ref_inv_alumno"), 1e-9),
+            0.0,
+        )
+        inv_infra_norm = inv_infra[:, k] / np.maximum(f("ref_inv_infra"), 1e-9)
+        selectividad = np.where(nc <= 0, 0.0, admitidos[:, k] / np.maximum(nc, 1e-9))
+        selectividad = np.clip(selectividad, 0.0, 1.0)
+        selectividad_hist[:, k] = selectividad
+
+        calidad_inst = (
+            f("calidad_base")
+            - f("k_hacinamiento") * hac
+            + f("k_inv_alumno") * inv_alum_norm
+            + f("k_inv_infra") * inv_infra_norm
+            - f("k_selectividad") * (1.0 - selectividad)
+            + blandos[0]
+            + blandos[1]
+            + blandos[2]
+        )
+        prev_c = calidad[:, k-1] if k > 0 else f("calidad_base")
+        calidad[:, k] = np.clip(prev_c + f("alpha_calidad") * (calidad_inst - prev_c), 0.0, 1.0)
+        if prof is not None:
+            prof.lap("calidad", k)
+
+        # --- Bajas ---
+        tasa = (
+            f("tasa_bajas_base")
+            + (1.0 - calidad[:, k]) * f("k_bajas_calidad")
+            + yr(sobreprecio, k) * f("k_bajas_precio")
+        )
+        tasa = np.clip(tasa, 0.0, 0.5)
+        tasa_bajas[:, k] = tasa
+        bajas_tot = tasa * alumnos_k
+
+        # --- Progresión de cohortes ---
+        if micro is not None:
+            next_row = micro.paso(k, tasa, np.clip(tasa_cont, 0.0, 1.0), adm, ultimo=k == anios - 1)
+            if prof is not None:
+                prof.lap("bajas", k)
+        else:
+            if estocastico:
+                bajas = rng.binomial(Gk.astype(np.int64), tasa[:, None])
+            else:
+                safe_alum = np.where(alumnos_k <= 0, 1.0, alumnos_k)
+                bajas = np.where((alumnos_k <= 0)[:, None], 0.0, (Gk / safe_alum[:, None]) * bajas_tot[:, None])
+            net = np.maximum(Gk - bajas, 0.0)
+            if prof is not None:
+                prof.lap("bajas", k)
+            if estocastico:
+                bajas_sorteadas[:, k] = bajas.sum(axis=1)
+                if k < anios - 1:
+                    egresados_sorteados[:, k+1] = net[:, GRADE_INDEX["G12"]]
+                net[:, iK5] = rng.binomial(net[:, iK5].astype(np.int64), np.clip(tasa_cont, 0.0, 1.0))
+                next_row = progress_cohorts(net, 1.0)
+            else:
+                next_row = progress_cohorts(net, tasa_cont)
+            next_row[:, entrada] += adm
+
+        if k < anios - 1:
+            G[:, k+1, :] = next_row
+            Div[:, k+1, :] = Divk
+
+        capacidad_binding[:, k] = admitidos[:, k] < admitidos_deseados[:, k]
+        demanda_binding[:, k] = alumnos_k >= D - 1e-6
+        if prof is not None:
+            prof.lap("progresion", k)
+
+    alumnos_tot = G.sum(axis=2)
+    facturacion = alumnos_tot * col(cuota) * meses[:, None]
+    sueldos_docentes = Div.sum(axis=2) * col(f("costo_docente_por_aula"))
+    costos = (
+        sueldos_docentes + col(f("sueldos_no_docentes"))
+        + f("mantenimiento_prop")[:, None] * facturacion + Marketing
+    )
+    resultado = facturacion - costos - inv_infra
+
+    egresados = np.zeros((n, anios))
+    egresados[:, 1:] = np.maximum(G[:, :-1, GRADE_INDEX["G12"]] * (1.0 - tasa_bajas[:, :-1]), 0.0)
+    egresados = np.maximum(np.rint(egresados), 0).astype(int)
+    bajas_totales = np.maximum(np.rint(tasa_bajas * alumnos_tot), 0).astype(int)
+    if estocastico and micro is None:
+        egresados, bajas_totales = egresados_sorteados, bajas_sorteadas
+
+    out = {
+        "anio": np.broadcast_to(np.arange(anios), (n, anios)),
+        "alumnos_totales": alumnos_tot,
+        "calidad": calidad,
+        "tasa_bajas": tasa_bajas,
+        "bajas_totales": bajas_totales,
+        "egresados": egresados,
         "nuevos_candidatos": nuevos_candidatos,
         "candidatos_pago": candidatos_pago,
         "candidatos_organico": candidatos_organico,
@@ -352,8 +1337,8 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         "Demanda": Demanda,
         "Marketing": Marketing,
         "CAC": CAC,
-        "DivG1": Div[:, 0],
-        "AulasTotales": Div.sum(axis=1),
+        "DivG1": Div[:, :, 0],
+        "AulasTotales": Div.sum(axis=2),
         "hacinamiento_prom": hac_prom_hist,
         "selectividad": selectividad_hist,
         "capacidad_binding": capacidad_binding.astype(int),
@@ -362,18 +1347,271 @@ def simulate(par: Params) -> Tuple[pd.DataFrame, Dict[str, Any]]:
         "sueldos_docentes": sueldos_docentes,
         "costos_totales": costos,
         "resultado": resultado,
-    })
-        # --- Redondeo de variables de conteo ---
-    cols_round = [
-        "alumnos_totales", "nuevos_candidatos", "candidatos_pago",
-        "candidatos_organico", "admitidos_deseados", "admitidos",
-        "Demanda", "DivG1", "AulasTotales"
-    ]
-    for c in cols_round:
-        if c in df.columns:
-            df[c] = df[c].round().astype(int)
+    }
+    out = select_columns(out, columns, round_counts)
+    out["G"] = np.round(G).astype(int) if round_counts else G
+    out["Div"] = Div
+    if red is not None:
+        out["Demanda_red"] = np.round(Demanda_red).astype(int) if round_counts else Demanda_red
+        out["participacion"] = participacion
+    return out
 
-    # También redondeamos la matriz G (alumnos por grado)
-    G = np.round(G).astype(int)
-    extras = {"G": G, "Div": Div, "params": asdict(par)}
-    return df, extras
+
+def batch_to_frame(out: Dict[str, np.ndarray], columns: Optional[Sequence[str]] = None) -> "pd.DataFrame":
+    """Pasa la salida de `simulate_batch` a un DataFrame largo (una fila por
+    escenario y año), con una columna "escenario" al inicio."""
+    cols = [c for c in (columns or OUTPUT_COLUMNS) if c in out]
+    n, anios = out[cols[0]].shape
+    data = {"escenario": np.repeat(np.arange(n), anios)}
+    data.update({c: np.asarray(out[c]).reshape(-1) for c in cols})
+    return _pd().DataFrame(data)
+
+
+def batch_scenario(out: Dict[str, np.ndarray], i: int) -> Tuple["pd.DataFrame", Dict[str, Any]]:
+    """Extrae el escenario i de un lote con la misma forma que `simulate`
+    (sin "params" en extras)."""
+    df = _pd().DataFrame({c: out[c][i] for c in OUTPUT_COLUMNS})
+    return df, {"G": out["G"][i], "Div": out["Div"][i]}
+
+
+# =====================================================================
+# Kernel compilado (backend="numba")
+# =====================================================================
+# Mismo paso anual que `_simulate_python`, escrito como loop escalar sobre arrays
+# planos de float: sin dicts, closures, strings ni np.clip sobre escalares.
+# Los argumentos después de (G, Div, S, k0, fact_prev0) se llaman igual que los
+# campos de Params y se pasan como float; S tiene una fila por serie, en el orden
+# de RAW_SERIES; los campos de SCHEDULE_FIELDS llegan como vectores (anios,)
+# ya resueltos. Con k0 > 0 se reanuda: los arrays ya traen cargado el estado
+# (ver _init_from_state) y fact_prev0 es la facturación del año anterior.
+# Las sumas por grado replican la suma por pares de NumPy para que el resultado
+# coincida bit a bit con la implementación de referencia.
+
+def _row_sum(a):
+    n = a.shape[0]
+    if n < 8:
+        res = 0.0
+        for i in range(n):
+            res += a[i]
+        return res
+    r0, r1, r2, r3, r4, r5, r6, r7 = a[0], a[1], a[2], a[3], a[4], a[5], a[6], a[7]
+    m = n - n % 8
+    for i in range(8, m, 8):
+        r0 += a[i]; r1 += a[i+1]; r2 += a[i+2]; r3 += a[i+3]
+        r4 += a[i+4]; r5 += a[i+5]; r6 += a[i+6]; r7 += a[i+7]
+    res = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+    for i in range(m, n):
+        res += a[i]
+    return res
+
+
+def _kernel_py(G, Div, S, k0, fact_prev0,
+               alumnos_inicial_por_grado, demanda_inicial, divisiones_iniciales,
+               cupo_optimo, cupo_maximo, capex_aula, trigger_auto_aula, regla_dos_div,
+               manual_crecimiento, extra_div_k3_per_year, extra_div_k4_per_year,
+               extra_div_k5_per_year, extra_div_g1_per_year,
+               prop_mkt, mkt_floor, cac_base, k_saturacion, k_calidad_candidatos,
+               beta_demanda_calidad, delta_demanda_saturacion, piso_demanda_gap,
+               cuota_mensual, meses_cobro, ref_precio, k_bajas_precio, k_precio_cac,
+               tasa_bajas_base, k_bajas_calidad, politica_seleccion, admitidos_max_abs,
+               calidad_base, k_hacinamiento, gamma_hacinamiento, k_inv_alumno, ref_inv_alumno,
+               k_inv_infra, ref_inv_infra, k_selectividad, alpha_calidad,
+               nivel_articulacion, nivel_comunicacion, nivel_diferenciacion,
+               k_articulacion, k_comunicacion, k_diferenciacion,
+               prop_cand_k3, prop_cand_k4, prop_cand_k5, prop_cand_g1, tasa_cont_k_to_g1):
+    anios, ng = G.shape
+    calidad, Demanda, Marketing, CAC = S[0], S[1], S[2], S[3]
+    admitidos, admitidos_deseados = S[4], S[5]
+    nuevos_candidatos, candidatos_pago, candidatos_organico = S[6], S[7], S[8]
+    tasa_bajas, inv_infra, hac_hist, sel_hist = S[9], S[10], S[11], S[12]
+    cap_bind, dem_bind = S[13], S[14]
+    next_row = np.zeros(ng)
+    exceso = np.zeros(ng)
+
+    # --- Constantes del escenario (fuera del loop) ---
+    w0, w1, w2, w3 = max(prop_cand_k3, 0.0), max(prop_cand_k4, 0.0), max(prop_cand_k5, 0.0), max(prop_cand_g1, 0.0)
+    wsum = w0 + w1 + w2 + w3
+    if wsum <= 0:
+        w0 = w1 = w2 = w3 = 0.25
+        wsum = 1.0
+    w0, w1, w2, w3 = w0 / wsum, w1 / wsum, w2 / wsum, w3 / wsum
+    blandos = (
+        k_articulacion * min(max(nivel_articulacion, 0.0), 1.0),
+        k_comunicacion * min(max(nivel_comunicacion, 0.0), 1.0),
+        k_diferenciacion * min(max(nivel_diferenciacion, 0.0), 1.0),
+    )
+
+    fact_prev = fact_prev0
+    if k0 == 0:
+        for g in range(ng):
+            G[0, g] = alumnos_inicial_por_grado
+            Div[0, g] = int(divisiones_iniciales)
+        calidad[0] = calidad_base
+        Demanda[0] = max(demanda_inicial, _row_sum(G[0]) + 50)
+        fact_prev = _row_sum(G[0]) * cuota_mensual[0] * meses_cobro
+        Marketing[0] = max(mkt_floor[0], prop_mkt[0] * fact_prev)
+
+    for k in range(k0, anios):
+        # --- Crecimiento manual de aulas ---
+        if manual_crecimiento:
+            extra = (extra_div_k3_per_year[k], extra_div_k4_per_year[k],
+                     extra_div_k5_per_year[k], extra_div_g1_per_year[k])
+            nuevas = 0
+            for j in range(4):
+                if extra[j] > 0:
+                    Div[k, _ENTRY_IDX[j]] += int(extra[j])
+                    nuevas += int(extra[j])
+            if nuevas > 0:
+                inv_infra[k] += capex_aula * nuevas
+
+        alumnos_k = _row_sum(G[k])
+        if k > 0:
+            Demanda[k] = max(
+                Demanda[k-1] + beta_demanda_calidad * calidad[k-1] - delta_demanda_saturacion * alumnos_k,
+                alumnos_k + piso_demanda_gap
+            )
+        sobreprecio = max(cuota_mensual[k] / max(ref_precio, 1e-9) - 1.0, 0.0)
+        saturacion = 0.0 if Demanda[k] <= 0 else alumnos_k / max(Demanda[k], 1e-9)
+        CAC[k] = cac_base * (1.0 + k_saturacion * saturacion)
+        CAC[k] *= (1.0 + k_precio_cac * sobreprecio)
+
+        if k > 0:
+            if k > k0:
+                fact_prev = _row_sum(G[k-1]) * cuota_mensual[k-1] * meses_cobro
+            Marketing[k] = max(mkt_floor[k], prop_mkt[k] * fact_prev)
+
+        candidatos_pago[k] = Marketing[k] / max(CAC[k], 1e-9)
+        candidatos_organico[k] = k_calidad_candidatos * calidad[k-1 if k > 0 else 0]
+        nc = max(0.0, candidatos_pago[k] + candidatos_organico[k])
+        nuevos_candidatos[k] = nc
+
+        # --- Admisiones por grado de entrada ---
+        pol = politica_seleccion[k]
+        a0 = min(pol * (nc * w0), Div[k, _ENTRY_IDX[0]] * cupo_maximo)
+        a1 = min(pol * (nc * w1), Div[k, _ENTRY_IDX[1]] * cupo_maximo)
+        a2 = min(pol * (nc * w2), Div[k, _ENTRY_IDX[2]] * cupo_maximo)
+        a3 = min(pol * (nc * w3), Div[k, _ENTRY_IDX[3]] * cupo_maximo)
+        gap_demanda = max(Demanda[k] - alumnos_k, 0.0)
+        adm_total_deseado = a0 + a1 + a2 + a3
+        escala = 1.0 if adm_total_deseado <= 0 else min(1.0, gap_demanda / adm_total_deseado)
+        a0 *= escala; a1 *= escala; a2 *= escala; a3 *= escala
+
+        capacidad_g1 = float(int(Div[k, 0] * cupo_maximo))
+        cap_politica = pol * nc
+        if admitidos_max_abs[k] >= 0:
+            cap_politica = min(cap_politica, admitidos_max_abs[k])
+        adm_des = min(cap_politica, gap_demanda)
+        admitidos_deseados[k] = adm_des
+        admitidos[k] = min(adm_des, capacidad_g1)
+
+        # --- Disparo de construcción ---
+        if trigger_auto_aula:
+            exceso_g1 = max(adm_des - capacidad_g1, 0.0)
+            if (regla_dos_div and adm_des >= 2 * cupo_maximo) or exceso_g1 > 0:
+                inv_infra[k] += capex_aula
+                if k < anios - 1:
+                    Div[k, 0] += 1
+
+        # --- Hacinamiento ---
+        for g in range(ng):
+            exceso[g] = max(G[k, g] / (max(Div[k, g], 1e-9) * cupo_optimo) - 1.0, 0.0)
+        hac = 0.0 if alumnos_k <= 0 else _row_sum(exceso) / ng
+        if gamma_hacinamiento != 1.0 and hac > 0:
+            hac = hac ** gamma_hacinamiento
+        hac_hist[k] = hac
+
+        # --- Calidad ---
+        inv_alum_norm = 0.0
+        if alumnos_k > 0:
+            inv_alum_norm = (0.5 * Marketing[k] / max(alumnos_k, 1e-9)) / max(ref_inv_alumno, 1e-9)
+        inv_infra_norm = inv_infra[k] / max(ref_inv_infra, 1e-9)
+        sel = 0.0 if nc <= 0 else admitidos[k] / max(nc, 1e-9)
+        sel = min(max(sel, 0.0), 1.0)
+        sel_hist[k] = sel
+        calidad_inst = (
+            calidad_base
+            - k_hacinamiento * hac
+            + k_inv_alumno * inv_alum_norm
+            + k_inv_infra * inv_infra_norm
+            - k_selectividad * (1.0 - sel)
+            + blandos[0]
+            + blandos[1]
+            + blandos[2]
+        )
+        prev_c = calidad[k-1] if k > 0 else calidad_base
+        calidad[k] = min(max(prev_c + alpha_calidad * (calidad_inst - prev_c), 0.0), 1.0)
+
+        # --- Bajas y progresión de cohortes ---
+        tasa = tasa_bajas_base + (1.0 - calidad[k]) * k_bajas_calidad + sobreprecio * k_bajas_precio
+        tasa = min(max(tasa, 0.0), 0.5)
+        tasa_bajas[k] = tasa
+        bajas_tot = tasa * alumnos_k
+
+        # Progresión según TRANSITION (_PROG_DST) + admisiones en grados de entrada
+        for g in range(ng):
+            next_row[g] = 0.0
+        next_row[_ENTRY_IDX[0]] = a0
+        next_row[_ENTRY_IDX[1]] = a1
+        next_row[_ENTRY_IDX[2]] = a2
+        next_row[_ENTRY_IDX[3]] = a3
+        for g in range(ng):
+            d = _PROG_DST[g]
+            if d < 0:
+                continue                                   # egresa
+            bajas = 0.0 if alumnos_k <= 0 else (G[k, g] / alumnos_k) * bajas_tot
+            net = max(G[k, g] - bajas, 0.0)
+            if g == _CONT_IDX:
+                next_row[d] += tasa_cont_k_to_g1 * net     # K5 -> G1 con continuidad
+            else:
+                next_row[d] += net
+
+        if k < anios - 1:
+            for g in range(ng):
+                G[k+1, g] = next_row[g]
+                Div[k+1, g] = Div[k, g]
+
+        cap_bind[k] = 1.0 if admitidos[k] < adm_des else 0.0
+        dem_bind[k] = 1.0 if alumnos_k >= Demanda[k] - 1e-6 else 0.0
+
+
+_KERNEL_FIELDS = _kernel_py.__code__.co_varnames[5:_kernel_py.__code__.co_argcount]
+_NUMBA_KERNEL = None
+
+
+def _numba_kernel():
+    # Compila el kernel la primera vez (cache=True guarda el binario en __pycache__).
+    # Devuelve None si numba no está instalado.
+    global _NUMBA_KERNEL
+    if _NUMBA_KERNEL is None:
+        try:
+            import numba
+        except ImportError:
+            return None
+        # El kernel llama a _row_sum como global: se compila una copia de
+        # _kernel_py cuyos globals ven la versión compilada, sin tocar el
+        # _row_sum del módulo (que sigue siendo Python para el resto).
+        glb = dict(_kernel_py.__globals__)
+        glb["_row_sum"] = numba.njit(cache=True)(_row_sum)
+        kernel = types.FunctionType(_kernel_py.__code__, glb, _kernel_py.__name__,
+                                    _kernel_py.__defaults__, _kernel_py.__closure__)
+        kernel.__qualname__ = _kernel_py.__qualname__
+        _NUMBA_KERNEL = numba.njit(cache=True)(kernel)
+    return _NUMBA_KERNEL
+
+
+def _simulate_kernel(par: Params, kernel, start_state: Optional[SimState] = None) -> Dict[str, np.ndarray]:
+    G = np.zeros((par.anios, N_GRADES))
+    Div = np.zeros((par.anios, N_GRADES), dtype=np.int64)
+    S = np.zeros((len(RAW_SERIES), par.anios))
+    k0, fact_prev0 = 0, 0.0
+    if start_state is not None:
+        k0, fact_prev0 = start_state.anio, float(start_state.fact_prev)
+        _init_from_state(start_state, G, Div, S[0], S[1], S[2])
+    sch = resolve_schedules(par)
+    args = [sch[name] if name in sch else float(getattr(par, name)) for name in _KERNEL_FIELDS]
+    kernel(G, Div, S, k0, fact_prev0, *args)
+    raw = {name: S[i] for i, name in enumerate(RAW_SERIES)}
+    raw["capacidad_binding"] = raw["capacidad_binding"] > 0
+    raw["demanda_binding"] = raw["demanda_binding"] > 0
+    raw["G"], raw["Div"] = G, Div
+    return raw
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Set, Union
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import (Params, GRADE_NAMES, OUTPUT_COLUMNS, PARAM_FIELDS, PARAM_TYPES, ROUND_COLUMNS,
+                           cast_param, params_hashes, params_to_arrays, simulate_batch)
+
+# =====================================================================
+# Almacén columnar de resultados (Parquet / Arrow IPC)
+# =====================================================================
+# Una fila por (escenario, año):
+#   hash | campos de Params | columnas de salida | G_K3 ... G_G12
+# Los campos con calendario guardan el valor de ese año. Cada `append` escribe
+# un archivo nuevo (append-only, nombre único, escritura atómica), así que
+# varios procesos pueden escribir a la vez en el mismo directorio. Las filas se
+# ordenan por (hash, anio): las estadísticas por row group permiten saltear
+# grupos al filtrar por hash.
+#
+# Lectura con pyarrow.dataset: sólo las columnas pedidas y filtros empujados
+# al lector. Con format="arrow" los archivos IPC (sin compresión) se leen por
+# memory map, sin copiar. Requiere pyarrow (dependencia opcional).
+#
+# Esquema fijo (`schema()`): cada campo de Params con el tipo de PARAM_TYPES y
+# las salidas con los tipos de simulate_batch (conteos redondeados a int), así
+# todas las particiones coinciden aunque un lote traiga cuota_mensual=300 (int)
+# y otro 310.5. Al leer se usa el mismo esquema (un almacén vacío devuelve
+# resultados vacíos; particiones viejas con otro tipo se castean).
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+G_COLUMNS = [f"G_{g}" for g in GRADE_NAMES]
+ROW_GROUP_SIZE = 65_536
+
+Filter = Union[None, Sequence[tuple], Any]      # lista de tuplas (col, op, valor) o pyarrow Expression
+INT_OUTPUTS = {"anio", "bajas_totales", "egresados", "capacidad_binding", "demanda_binding", *ROUND_COLUMNS}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("store.py requiere pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def schema():
+    """Esquema Arrow de las filas del almacén."""
+    pa = _pyarrow()
+    tipos = {float: pa.float64(), int: pa.int64(), bool: pa.bool_()}
+    campos = [("hash", pa.string())]
+    campos += [(k, tipos[PARAM_TYPES[k]]) for k in PARAM_FIELDS]
+    campos += [(c, pa.int64() if c in INT_OUTPUTS else pa.float64()) for c in OUTPUT_COLUMNS]
+    campos += [(c, pa.int64()) for c in G_COLUMNS]
+    return pa.schema(campos)
+
+
+def _salida(c: str, v: np.ndarray) -> np.ndarray:
+    # Conteos como int (redondeados si vienen de round_counts=False), el resto float
+    v = np.asarray(v)
+    if c in INT_OUTPUTS or c in G_COLUMNS:
+        return v if v.dtype.kind in "iu" else np.rint(v).astype(np.int64)
+    return v.astype(float)
+
+
+class ResultStore:
+    def __init__(self, root: str, format: str = "parquet"):
+        if format not in FORMATS:
+            raise ValueError(f"format desconocido: {format!r} (opciones: {', '.join(FORMATS)})")
+        self.root = root
+        self.format = format
+        os.makedirs(root, exist_ok=True)
+
+    # --- Escritura ---
+    def append(self, params: Union[Sequence[Params], Mapping[str, Any]],
+               out: Optional[Dict[str, np.ndarray]] = None, skip_existing: bool = False) -> int:
+        """Agrega un lote de escenarios. `params` como en `simulate_batch`; si no
+        se pasa `out` (salida de simulate_batch para esos params) se simula.
+        Devuelve la cantidad de escenarios escritos."""
+        pa = _pyarrow()
+        P, n, anios = params_to_arrays(params)
+        hashes = np.array(params_hashes(P))
+        keep = np.ones(n, dtype=bool)
+        if skip_existing:
+            keep = ~np.isin(hashes, list(self.hashes()))
+        # dedup dentro del lote
+        _, first = np.unique(hashes, return_index=True)
+        keep &= np.isin(np.arange(n), first)
+        if not keep.any():
+            return 0
+        if out is None:
+            out = simulate_batch({k: v[keep] for k, v in P.items()})
+        elif not keep.all():
+            out = {k: v[keep] for k, v in out.items()}
+        P = {k: v[keep] for k, v in P.items()}
+        hashes = hashes[keep]
+        m = int(keep.sum())
+
+        order = np.argsort(hashes, kind="stable")
+        cols: Dict[str, np.ndarray] = {"hash": np.repeat(hashes[order], anios)}
+        for k in PARAM_FIELDS:
+            v = cast_param(k, P[k][order])
+            cols[k] = v.reshape(-1) if v.ndim == 2 else np.repeat(v, anios)
+        for c in OUTPUT_COLUMNS:
+            cols[c] = _salida(c, np.ascontiguousarray(out[c][order]).reshape(-1))
+        G = out["G"][order].reshape(m * anios, -1)
+        for j, c in enumerate(G_COLUMNS):
+            cols[c] = _salida(c, G[:, j])
+        table = pa.table(cols, schema=schema())
+        self._write(table)
+        return m
+
+    def _write(self, table) -> None:
+        pa = _pyarrow()
+        name = f"part-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}{FORMATS[self.format]}"
+        path = os.path.join(self.root, name)
+        tmp = path + f".{threading.get_ident()}.tmp"
+        if self.format == "parquet":
+            pa.parquet.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+        else:
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as w:
+                for batch in table.to_batches(max_chunksize=ROW_GROUP_SIZE):
+                    w.write_batch(batch)
+        os.replace(tmp, path)
+
+    # --- Lectura ---
+    def _dataset(self):
+        pa = _pyarrow()
+        files = sorted(os.path.join(self.root, f) for f in os.listdir(self.root)
+                       if f.endswith(FORMATS[self.format]))
+        fmt = "parquet" if self.format == "parquet" else "ipc"
+        return pa.dataset.dataset(files, schema=schema(), format=fmt,
+                                  filesystem=pa.fs.LocalFileSystem(use_mmap=True))
+
+    def _expression(self, filter: Filter):
+        pa = _pyarrow()
+        if filter is None or isinstance(filter, pa.dataset.Expression):
+            return filter
+        return pa.parquet.filters_to_expression(list(filter))
+
+    def scan(self, columns: Optional[Sequence[str]] = None, filter: Filter = None,
+             batch_size: int = ROW_GROUP_SIZE) -> Iterator[pd.DataFrame]:
+        """Recorre los resultados por bloques (DataFrames de hasta batch_size
+        filas) leyendo sólo `columns` y las filas que pasan `filter`."""
+        ds = self._dataset()
+        for batch in ds.to_batches(columns=list(columns) if columns else None,
+                                   filter=self._expression(filter), batch_size=batch_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+    def query(self, columns: Optional[Sequence[str]] = None, filter: Filter = None,
+              as_table: bool = False):
+        """Lee `columns` de las filas que pasan `filter`, p.ej.
+        [("calidad", ">", 0.7), ("anio", "==", 29)]. Con as_table=True devuelve
+        un pyarrow.Table (sin pasar por pandas)."""
+        ds = self._dataset()
+        table = ds.to_table(columns=list(columns) if columns else None, filter=self._expression(filter))
+        return table if as_table else table.to_pandas()
+
+    def hashes(self, filter: Filter = None) -> Set[str]:
+        """Hashes de escenarios guardados (que tengan alguna fila que pase `filter`)."""
+        t = self.query(["hash"], filter, as_table=True)
+        return set(t.column("hash").unique().to_pylist())
+
+    def final_year(self, filter: Filter = None) -> Set[str]:
+        """Hashes de escenarios cuyo último año pasa `filter`, p.ej.
+        store.final_year([("calidad", ">", 0.7)])."""
+        pa = _pyarrow()
+        ultimo = pa.dataset.field("anio") == pa.dataset.field("anios") - 1
+        expr = self._expression(filter)
+        return self.hashes(ultimo if expr is None else ultimo & expr)
+
+    def load(self, hashes: Sequence[str], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Filas (todos los años) de los escenarios `hashes`."""
+        pa = _pyarrow()
+        if columns is not None:
+            columns = ["hash", "anio"] + [c for c in columns if c not in ("hash", "anio")]
+        df = self.query(columns, pa.dataset.field("hash").isin(list(hashes)))
+        return df.sort_values(["hash", "anio"], ignore_index=True)
+
+    def count(self, filter: Filter = None) -> int:
+        return self._dataset().count_rows(filter=self._expression(filter))
+
@@ -0,0 +1,271 @@
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from itertools import combinations_with_replacement
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from sensitivity import SALIDAS as _SALIDAS_SOBOL, Salida
+from simulate_case import (Params, PARAM_FIELDS, PARAM_TYPES, json_default, params_to_arrays, repeat_params,
+                           simulate_batch)
+from sweep import Uniform, design
+
+# =====================================================================
+# Emulador (surrogate) de salidas escalares
+# =====================================================================
+# Caos polinomial sobre una caja de campos de Params: cada campo se lleva a
+# [-1, 1] y cada salida se ajusta como combinación de productos de polinomios
+# de Legendre de grado total <= `degree` (ridge, sólo NumPy). La muestra de
+# entrenamiento (LHS) se corre con el motor en lote.
+#
+# Error calibrado: se ajusta con una parte de la muestra y con el resto
+# (calib_frac) se mide el error fuera de muestra: RMSE y el cuantil `conf` de
+# |error| (conformal split: con probabilidad ~conf el valor real cae en
+# pred ± q).
+#
+# Fuera de la región entrenada (un campo fuera de [low, high], o un campo no
+# entrenado distinto del de `base`) `predict` corre el modelo real.
+# Las salidas se guardan por nombre: para emular otra, registrarla en SALIDAS.
+
+SALIDAS: Dict[str, Salida] = dict(_SALIDAS_SOBOL)
+
+
+def calidad_final(out: Dict[str, np.ndarray]) -> np.ndarray:
+    return out["calidad"][:, -1]
+
+
+SALIDAS["calidad_final"] = calidad_final
+
+FORMAT_VERSION = 1
+
+
+def _multi_indices(d: int, degree: int) -> np.ndarray:
+    # Exponentes (T, d) de todos los monomios de grado total <= degree
+    filas = [np.zeros(d, dtype=int)]
+    for g in range(1, degree + 1):
+        for combo in combinations_with_replacement(range(d), g):
+            a = np.zeros(d, dtype=int)
+            np.add.at(a, list(combo), 1)
+            filas.append(a)
+    return np.array(filas)
+
+
+def _features(Z: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    # Z (n, d) en [-1, 1] -> (n, T) con prod_j P_{alpha_j}(z_j) (Legendre)
+    n, d = Z.shape
+    p = int(alphas.max())
+    L = np.empty((p + 1, n, d))
+    L[0] = 1.0
+    if p >= 1:
+        L[1] = Z
+    for k in range(1, p):
+        L[k + 1] = ((2 * k + 1) * Z * L[k] - k * L[k - 1]) / (k + 1)
+    return L[alphas, :, np.arange(d)].prod(axis=1).T
+
+
+def _salidas_reales(P: Dict[str, np.ndarray], salidas: Sequence[str]) -> Dict[str, np.ndarray]:
+    out = simulate_batch(P)
+    return {s: SALIDAS[s](out) for s in salidas}
+
+
+@dataclass
+class Surrogate:
+    names: List[str]                      # campos entrenados
+    low: np.ndarray
+    high: np.ndarray
+    degree: int
+    alphas: np.ndarray                    # (T, d)
+    coef: np.ndarray                      # (T, n_salidas), sobre y estandarizada
+    y_mean: np.ndarray
+    y_std: np.ndarray
+    salidas: List[str]
+    base: Dict[str, Any]                  # asdict(Params) para los campos no entrenados
+    conf: float = 0.9
+    rmse: Dict[str, float] = field(default_factory=dict)
+    q: Dict[str, float] = field(default_factory=dict)       # cuantil conf de |error|
+    n_train: int = 0
+    fit_time: float = 0.0
+
+    @cached_property
+    def _base_arrays(self) -> Dict[str, np.ndarray]:
+        return repeat_params(Params(**self.base), 1)
+
+    # --- Predicción ---
+    def predict_x(self, X: np.ndarray) -> Dict[str, np.ndarray]:
+        """Camino rápido: X (n, d) con los campos en el orden de `names`, sin
+        chequeo de región ni fallback."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        Z = 2.0 * (X - self.low) / (self.high - self.low) - 1.0
+        Y = _features(Z, self.alphas) @ self.coef * self.y_std + self.y_mean
+        return {s: Y[:, j] for j, s in enumerate(self.salidas)}
+
+    def in_region(self, P: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Máscara (n,) de los escenarios de P (struct-of-arrays completo, como
+        el de params_to_arrays) que caen dentro de la región entrenada."""
+        n = len(P["anios"])
+        ok = np.ones(n, dtype=bool)
+        B = self._base_arrays
+        for k in PARAM_FIELDS:
+            v = P[k]
+            if k in self.names:
+                j = self.names.index(k)
+                ok &= (v.ndim == 1) and (v >= self.low[j]) & (v <= self.high[j])
+                continue
+            # no entrenado: igual a base (un calendario constante vale como escalar)
+            v2 = v if v.ndim == 2 else v[:, None]
+            b2 = B[k] if B[k].ndim == 2 else B[k][:, None]
+            if v2.shape[1] != b2.shape[1] and 1 not in (v2.shape[1], b2.shape[1]):
+                return np.zeros(n, dtype=bool)
+            ok &= np.all(v2 == b2, axis=1)
+        return ok
+
+    def predict(self, query: Union[Params, Sequence[Params], Mapping[str, Any]],
+                fallback: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Predice las salidas de `query` (Params, lista de Params o dict
+        campo -> array como en simulate_batch; en el dict los campos que faltan
+        toman el valor de `base`). Todos con el mismo `anios`, como en
+        simulate_batch.
+
+        Devuelve (valores, error): error es la semiamplitud del intervalo
+        calibrado (q) de cada escenario, 0 donde se corrió el modelo real. Con
+        fallback=False los escenarios fuera de región quedan en NaN."""
+        if isinstance(query, Params):
+            query = [query]
+        if isinstance(query, Mapping):
+            P, n, _ = params_to_arrays({"anios": self.base["anios"], **query})
+            P.update({k: np.repeat(v, n, axis=0) for k, v in self._base_arrays.items() if k not in query})
+        else:
+            P, n, _ = params_to_arrays(query)
+
+        dentro = self.in_region(P)
+        vals = {s: np.full(n, np.nan) for s in self.salidas}
+        err = {s: np.zeros(n) for s in self.salidas}
+        if dentro.any():
+            X = np.stack([P[k][dentro] for k in self.names], axis=1)
+            for s, v in self.predict_x(X).items():
+                vals[s][dentro] = v
+                err[s][dentro] = self.q[s]
+        fuera = ~dentro
+        if fuera.any():
+            if fallback:
+                reales = _salidas_reales({k: v[fuera] for k, v in P.items()}, self.salidas)
+                for s in self.salidas:
+                    vals[s][fuera] = reales[s]
+            else:
+                for s in self.salidas:
+                    err[s][fuera] = np.nan
+        return vals, err
+
+    # --- Persistencia ---
+    def save(self, path: str) -> None:
+        """Guarda el emulador en un .npz (sin pickle)."""
+        meta = {
+            "version": FORMAT_VERSION, "names": self.names, "degree": self.degree,
+            "salidas": self.salidas, "base": self.base, "conf": self.conf,
+            "rmse": self.rmse, "q": self.q, "n_train": self.n_train, "fit_time": self.fit_time,
+        }
+        # Escritura atómica: archivo temporal + os.replace
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            np.savez(fh, low=self.low, high=self.high, alphas=self.alphas, coef=self.coef,
+                     y_mean=self.y_mean, y_std=self.y_std,
+                     meta=np.array(json.dumps(meta, default=json_default)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Surrogate":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            arrays = {k: z[k] for k in ("low", "high", "alphas", "coef", "y_mean", "y_std")}
+        if meta.pop("version", None) != FORMAT_VERSION:
+            raise ValueError(f"Formato de emulador no soportado en {path}")
+        faltan = [s for s in meta["salidas"] if s not in SALIDAS]
+        if faltan:
+            raise ValueError(f"Salidas no registradas en SALIDAS: {faltan}")
+        return cls(**arrays, **meta)
+
+
+def fit_surrogate(space: Mapping[str, Tuple[float, float]], n: int = 20_000, degree: int = 3,
+                  base: Optional[Params] = None, salidas: Optional[Sequence[str]] = None,
+                  seed: Optional[int] = None, conf: float = 0.9, calib_frac: float = 0.2,
+                  ridge: float = 1e-8, chunk_size: int = 20_000) -> Surrogate:
+    """Ajusta un emulador de `salidas` (nombres de SALIDAS; por defecto todas)
+    sobre la caja `space` (campo -> (low, high)), con `n` escenarios LHS.
+
+    El resto de los campos queda fijo en `base`. La cantidad de términos es
+    C(d + degree, degree); la matriz de diseño ocupa n * términos floats.
+    """
+    if not space:
+        raise ValueError("El espacio de parámetros está vacío")
+    unknown = set(space) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+    no_num = [k for k in space if PARAM_TYPES[k] not in (int, float) or k == "anios"]
+    if no_num:
+        raise ValueError(f"Sólo campos numéricos (y no 'anios'): {no_num}")
+    salidas = list(salidas or SALIDAS)
+    faltan = [s for s in salidas if s not in SALIDAS]
+    if faltan:
+        raise ValueError(f"Salidas desconocidas: {faltan} (opciones: {', '.join(SALIDAS)})")
+    if not 0 < calib_frac < 1:
+        raise ValueError("calib_frac debe estar en (0, 1)")
+
+    t0 = time.perf_counter()
+    base = base or Params()
+    names = list(space)
+    low = np.array([float(space[k][0]) for k in names])
+    high = np.array([float(space[k][1]) for k in names])
+    if np.any(high <= low):
+        raise ValueError("Cada rango debe cumplir low < high")
+
+    des = design({k: Uniform(lo, hi) for k, lo, hi in zip(names, low, high)}, method="lhs", n=n, seed=seed)
+    cols = repeat_params(base, n)
+    cols.update(des)
+    Y = np.empty((n, len(salidas)))
+    for s in range(0, n, chunk_size):
+        out = simulate_batch({k: v[s:s + chunk_size] for k, v in cols.items()})
+        for j, nombre in enumerate(salidas):
+            Y[s:s + chunk_size, j] = SALIDAS[nombre](out)
+    X = np.stack([des[k] for k in names], axis=1).astype(float)
+
+    # Entrenamiento / calibración
+    perm = np.random.default_rng(seed).permutation(n)
+    m = max(1, int(round(calib_frac * n)))
+    cal, tr = perm[:m], perm[m:]
+    alphas = _multi_indices(len(names), degree)
+    if tr.size < alphas.shape[0]:
+        raise ValueError(f"Muy pocos escenarios de entrenamiento ({tr.size}) para {alphas.shape[0]} términos")
+    y_mean = Y[tr].mean(axis=0)
+    y_std = Y[tr].std(axis=0)
+    y_std = np.where(y_std > 0, y_std, 1.0)
+
+    Z = 2.0 * (X[tr] - low) / (high - low) - 1.0
+    Phi = _features(Z, alphas)
+    A = Phi.T @ Phi
+    A[np.diag_indices_from(A)] += ridge * np.trace(A) / A.shape[0]
+    coef = np.linalg.solve(A, Phi.T @ ((Y[tr] - y_mean) / y_std))
+
+    sur = Surrogate(names=names, low=low, high=high, degree=degree, alphas=alphas, coef=coef,
+                    y_mean=y_mean, y_std=y_std, salidas=salidas, base=asdict(base), conf=conf,
+                    n_train=int(tr.size))
+    pred = sur.predict_x(X[cal])
+    nivel = min(1.0, np.ceil((m + 1) * conf) / m)
+    for j, s in enumerate(salidas):
+        r = np.abs(pred[s] - Y[cal, j])
+        sur.rmse[s] = float(np.sqrt(np.mean(r ** 2)))
+        sur.q[s] = float(np.quantile(r, nivel))
+    sur.fit_time = time.perf_counter() - t0
+    return sur
+
+
+if __name__ == "__main__":
+    sur = fit_surrogate({"cuota_mensual": (200, 400), "prop_mkt": (0.0, 0.2), "calidad_base": (0.5, 0.9),
+                         "beta_demanda_calidad": (2, 20)}, n=20_000, degree=4, seed=0)
+    print(f"ajuste en {sur.fit_time:.2f}s; RMSE {sur.rmse}; q{sur.conf:.0%} {sur.q}")
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        sur.predict_x([[300, 0.1, 0.7, 10]])
+    print(f"predict_x: {(time.perf_counter() - t0) * 1e3 / 1000:.3f} ms por consulta")
@@ -0,0 +1,272 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from itertools import islice
+from statistics import NormalDist
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from simulate_case import Params, PARAM_FIELDS, cast_param, repeat_params, simulate_batch, batch_to_frame
+from transport import run_shared, shared_outputs
+
+# =====================================================================
+# Distribuciones / rangos de parámetros
+# =====================================================================
+# Cada distribución sabe:
+#   - grid():  valores para el diseño cartesiano
+#   - ppf(u):  transformar u ~ U(0,1) (vectorizado) para LHS y aleatorio
+
+@dataclass
+class Uniform:
+    low: float
+    high: float
+    n: int = 5          # puntos en el diseño cartesiano
+
+    def grid(self) -> np.ndarray:
+        return np.linspace(self.low, self.high, self.n)
+
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        return self.low + u * (self.high - self.low)
+
+
+@dataclass
+class LogUniform:
+    low: float
+    high: float
+    n: int = 5
+
+    def grid(self) -> np.ndarray:
+        return np.geomspace(self.low, self.high, self.n)
+
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        return np.exp(np.log(self.low) + u * (np.log(self.high) - np.log(self.low)))
+
+
+@dataclass
+class Normal:
+    mean: float
+    sd: float
+    n: int = 5
+    low: float = -np.inf     # truncamiento opcional
+    high: float = np.inf
+
+    def grid(self) -> np.ndarray:
+        # cuantiles en los puntos medios de n estratos
+        return self.ppf((np.arange(self.n) + 0.5) / self.n)
+
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        nd = NormalDist(self.mean, self.sd)
+        u = np.clip(np.asarray(u, dtype=float), 1e-12, 1 - 1e-12)
+        x = np.array([nd.inv_cdf(v) for v in u.ravel()]).reshape(u.shape)
+        return np.clip(x, self.low, self.high)
+
+
+@dataclass
+class Choice:
+    values: Sequence[Any]
+
+    def grid(self) -> np.ndarray:
+        return np.asarray(self.values)
+
+    def ppf(self, u: np.ndarray) -> np.ndarray:
+        vals = np.asarray(self.values)
+        idx = np.minimum((np.asarray(u) * len(vals)).astype(int), len(vals) - 1)
+        return vals[idx]
+
+
+Dist = Union[Uniform, LogUniform, Normal, Choice]
+
+
+def as_dist(spec: Any) -> Dist:
+    """Spec de un campo del espacio -> distribución: una distribución se
+    devuelve tal cual, una lista/tupla/array de valores es Choice y un
+    escalar es Choice([valor])."""
+    if hasattr(spec, "ppf") and hasattr(spec, "grid"):
+        return spec
+    if isinstance(spec, (list, tuple, np.ndarray)):
+        return Choice(list(spec))
+    return Choice([spec])
+
+
+# =====================================================================
+# Diseños
+# =====================================================================
+
+def design(space: Mapping[str, Any], method: str = "grid", n: Optional[int] = None,
+           seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """Construye el diseño de escenarios como struct-of-arrays.
+
+    space: campo de Params -> Uniform/LogUniform/Normal/Choice o lista de valores.
+    method: "grid" (cartesiano), "lhs" (latin hypercube) o "random".
+    n: cantidad de escenarios (obligatorio para "lhs" y "random").
+    """
+    if not space:
+        raise ValueError("El espacio de parámetros está vacío")
+    unknown = set(space) - set(PARAM_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos desconocidos en Params: {sorted(unknown)}")
+    names = list(space)
+    dists = [as_dist(space[k]) for k in names]
+
+    if method == "grid":
+        grids = [d.grid() for d in dists]
+        mesh = np.meshgrid(*[np.arange(len(g)) for g in grids], indexing="ij")
+        cols = {k: g[m.ravel()] for k, g, m in zip(names, grids, mesh)}
+    elif method in ("lhs", "random"):
+        if not n or n <= 0:
+            raise ValueError(f"method='{method}' requiere n > 0")
+        rng = np.random.default_rng(seed)
+        if method == "lhs":
+            # un punto por estrato en cada dimensión, con estratos permutados
+            u = (rng.permuted(np.tile(np.arange(n), (len(names), 1)), axis=1).T
+                 + rng.random((n, len(names)))) / n
+        else:
+            u = rng.random((n, len(names)))
+        cols = {k: d.ppf(u[:, j]) for j, (k, d) in enumerate(zip(names, dists))}
+    else:
+        raise ValueError(f"method desconocido: {method!r} (usar 'grid', 'lhs' o 'random')")
+
+    return {k: cast_param(k, v) for k, v in cols.items()}
+
+
+# =====================================================================
+# Ejecución en paralelo
+# =====================================================================
+
+def _frame_chunk(ids: np.ndarray, cols: Dict[str, np.ndarray], swept: List[str],
+                 columns: Optional[Sequence[str]], out: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    # Salida de un bloque a formato largo, con escenario y campos barridos
+    df = batch_to_frame(out, _df_columns(columns))
+    anios = out["anio"].shape[1]
+    df["escenario"] = np.repeat(ids, anios)
+    for j, k in enumerate(swept):
+        df.insert(1 + j, k, np.repeat(cols[k], anios))
+    return df
+
+
+def _df_columns(columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    return None if columns is None else ["anio"] + [c for c in columns if c != "anio"]
+
+
+def _run_chunk(ids: np.ndarray, cols: Dict[str, np.ndarray], swept: List[str],
+               columns: Optional[Sequence[str]], store: Optional[Any] = None) -> pd.DataFrame:
+    # Corre un bloque de escenarios con el motor en lote y lo pasa a formato largo.
+    # Con `store` (ResultStore) el worker además guarda el bloque completo.
+    out = simulate_batch(cols)
+    if store is not None:
+        store.append(cols, out)
+    return _frame_chunk(ids, cols, swept, columns, out)
+
+
+def _grupos(cols: Dict[str, np.ndarray]):
+    # Índices de escenarios por horizonte (el motor en lote exige anios fijo)
+    anios = cols["anios"]
+    for h in np.unique(anios):
+        yield np.flatnonzero(anios == h)
+
+
+def _chunks(cols: Dict[str, np.ndarray], chunk_size: int):
+    # Bloques de hasta chunk_size escenarios, agrupados por horizonte
+    for idx in _grupos(cols):
+        for s in range(0, idx.size, chunk_size):
+            sel = idx[s:s + chunk_size]
+            yield sel, {k: v[sel] for k, v in cols.items()}
+
+
+def iter_sweep(space: Mapping[str, Any], method: str = "grid", n: Optional[int] = None,
+               seed: Optional[int] = None, base: Optional[Params] = None,
+               chunk_size: int = 2000, max_workers: Optional[int] = None,
+               columns: Optional[Sequence[str]] = None, store: Optional[Any] = None,
+               transport: str = "shm") -> Iterator[pd.DataFrame]:
+    """Igual que `run_sweep`, pero entrega cada bloque (DataFrame largo) apenas
+    termina, en orden de llegada. max_workers=1 corre en el proceso actual."""
+    if transport not in ("shm", "pickle"):
+        raise ValueError(f"transport desconocido: {transport!r} (usar 'shm' o 'pickle')")
+    des = design(space, method=method, n=n, seed=seed)
+    n_total = len(next(iter(des.values())))
+    cols = repeat_params(base or Params(), n_total)
+    cols.update(des)
+    swept = list(des)
+
+    if max_workers == 1:
+        for ids, chunk in _chunks(cols, chunk_size):
+            yield _run_chunk(ids, chunk, swept, columns, store)
+        return
+
+    if transport == "pickle":
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futs = [ex.submit(_run_chunk, ids, chunk, swept, columns, store)
+                    for ids, chunk in _chunks(cols, chunk_size)]
+            for fut in as_completed(futs):
+                yield fut.result()
+        return
+
+    # Memoria compartida (transport.py): cada bloque tiene su propio segmento,
+    # que el worker llena y el padre pasa a DataFrame (copia) y libera enseguida.
+    # Con a lo sumo 2 * workers bloques en vuelo, la memoria queda acotada por
+    # chunk_size y no por el tamaño del barrido.
+    workers = max_workers or os.cpu_count() or 1
+    df_columns = _df_columns(columns)
+    pendientes = _chunks(cols, chunk_size)
+    futs: Dict[Any, Any] = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            def enviar() -> None:
+                for ids, chunk in islice(pendientes, 2 * workers - len(futs)):
+                    sb = shared_outputs(chunk, df_columns, grados=False)
+                    futs[ex.submit(run_shared, sb.spec, 0, chunk, df_columns, store)] = (sb, ids, chunk)
+
+            enviar()
+            while futs:
+                listos, _ = wait(futs, return_when=FIRST_COMPLETED)
+                for fut in listos:
+                    sb, ids, chunk = futs.pop(fut)
+                    try:
+                        m = fut.result()
+                        df = _frame_chunk(ids, chunk, swept, columns, {c: sb[c][:m] for c in sb})
+                    finally:
+                        sb.unlink()
+                        sb.close()
+                    yield df
+                enviar()
+    finally:
+        for sb, _, _ in futs.values():
+            sb.unlink()
+            sb.close()
+
+
+def run_sweep(space: Mapping[str, Any], method: str = "grid", n: Optional[int] = None,
+              seed: Optional[int] = None, base: Optional[Params] = None,
+              chunk_size: int = 2000, max_workers: Optional[int] = None,
+              columns: Optional[Sequence[str]] = None, store: Optional[Any] = None,
+              transport: str = "shm") -> pd.DataFrame:
+    """Barrido de sensibilidad sobre campos de Params.
+
+    Construye el diseño (cartesiano, LHS o aleatorio), lo reparte en bloques de
+    `chunk_size` escenarios sobre un ProcessPoolExecutor y junta todo en una
+    tabla larga: escenario, campos barridos, anio y columnas de salida.
+    Los campos no barridos toman el valor de `base` (por defecto Params()).
+    Con `store` (store.ResultStore) cada bloque se guarda completo en disco
+    (Params, salidas y G), escrito por el worker que lo calculó.
+    transport: cómo vuelven los bloques de los workers; "shm" (memoria
+    compartida, ver transport.py) o "pickle".
+    """
+    parts = list(iter_sweep(space, method=method, n=n, seed=seed, base=base,
+                            chunk_size=chunk_size, max_workers=max_workers, columns=columns,
+                            store=store, transport=transport))
+    df = pd.concat(parts, ignore_index=True)
+    return df.sort_values(["escenario", "anio"], kind="stable", ignore_index=True)
+
+
+if __name__ == "__main__":
+    import time
+    t0 = time.perf_counter()
+    res = run_sweep(
+        {"cuota_mensual": Uniform(150, 450, 7), "prop_mkt": Uniform(0.0, 0.2, 5),
+         "politica_seleccion": [0.5, 0.7, 0.9]},
+        method="grid",
+    )
+    print(res.groupby("escenario")["resultado"].sum().describe())
+    print(f"{res['escenario'].nunique()} escenarios en {time.perf_counter() - t0:.2f}s")
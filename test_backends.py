@@ -0,0 +1,138 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from simulate_case import (Params, OUTPUT_COLUMNS, SCHEDULE_FIELDS, SimState, _numba_kernel, simulate,
+                           simulate_batch)
+
+# =====================================================================
+# Los backends del paso anual tienen que coincidir
+# =====================================================================
+# "python" (referencia), "numpy" (motor en lote), "numba" (kernel compilado) y
+# `simulate_batch` implementan el mismo paso por separado: estos tests fallan si
+# uno se desincroniza. python y numba coinciden bit a bit; el motor en lote
+# promedia el hacinamiento sobre otro eje (otro orden de suma), así que ahí los
+# float se comparan con rtol=1e-12 y los enteros (conteos, G redondeado, Div)
+# exactos. Escenarios al azar (semilla fija) que cubren disparo de aulas, aulas
+# manuales, tope de admitidos, gamma != 1 y demanda cero.
+
+BACKENDS = ["python", "numpy"] + (["numba"] if _numba_kernel() is not None else [])
+
+
+def _escenarios(n: int, seed: int = 1, anios: int = 15):
+    rnd = random.Random(seed)
+    return [
+        Params(
+            anios=anios,
+            cuota_mensual=rnd.uniform(50, 600), prop_mkt=rnd.uniform(0, 0.2),
+            politica_seleccion=rnd.uniform(0, 1), demanda_inicial=rnd.choice([0, 300, 1500, 3000]),
+            alumnos_inicial_por_grado=rnd.choice([0, 10, 25, 40]), divisiones_iniciales=rnd.choice([1, 2, 3]),
+            trigger_auto_aula=rnd.random() < 0.7, regla_dos_div=rnd.random() < 0.5,
+            manual_crecimiento=rnd.random() < 0.3, extra_div_k3_per_year=rnd.choice([0, 1, 2]),
+            extra_div_g1_per_year=rnd.choice([0, 1]), admitidos_max_abs=rnd.choice([-1, 0, 20, 100]),
+            gamma_hacinamiento=rnd.choice([1.0, 1.3, 1.7]), prop_cand_k3=rnd.choice([0, 0.25, 0.5]),
+            prop_cand_k4=rnd.choice([0, 0.1]), prop_cand_k5=rnd.choice([0, 0.3]),
+            prop_cand_g1=rnd.choice([0, 0.25]), calidad_base=rnd.uniform(0, 1),
+            cupo_optimo=rnd.choice([15, 25]), k_bajas_calidad=rnd.uniform(0, 0.5),
+        )
+        for _ in range(n)
+    ]
+
+
+ESCENARIOS = _escenarios(40)
+
+# Calendarios: lista por año y dict escalonado
+CALENDARIOS = [
+    Params(anios=12, cuota_mensual=[250 + 10 * k for k in range(12)], prop_mkt={0: 0.05, 4: 0.12, 8: 0.02}),
+    Params(anios=12, politica_seleccion={0: 0.9, 6: 0.5}, admitidos_max_abs=[-1] * 6 + [30] * 6,
+           costo_docente_por_aula={0: 30_000, 5: 36_000}, sueldos_no_docentes=[50_000 * 1.03 ** k for k in range(12)]),
+    Params(anios=12, manual_crecimiento=True, extra_div_k3_per_year={0: 0, 3: 1, 5: 0},
+           extra_div_g1_per_year=[0, 1] * 6, mkt_floor={0: 1000, 2: 5000}),
+]
+
+
+def _assert_iguales(a, b, contexto="", exacto=True):
+    for c in OUTPUT_COLUMNS:
+        x, y = np.asarray(a[c]), np.asarray(b[c])
+        assert x.dtype == y.dtype, f"{contexto} columna {c}: {x.dtype} != {y.dtype}"
+        if exacto or x.dtype.kind != "f":
+            np.testing.assert_array_equal(x, y, err_msg=f"{contexto} columna {c}")
+        else:
+            np.testing.assert_allclose(x, y, rtol=1e-12, atol=1e-12, err_msg=f"{contexto} columna {c}")
+
+
+def _assert_grados(ex_a, G, Div, exacto=True):
+    np.testing.assert_array_equal(ex_a["Div"], Div)
+    if exacto or G.dtype.kind != "f":
+        np.testing.assert_array_equal(ex_a["G"], G)
+    else:
+        np.testing.assert_allclose(ex_a["G"], G, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize("backend", BACKENDS[1:])
+@pytest.mark.parametrize("round_counts", [True, False])
+def test_backends_coinciden_con_python(backend, round_counts):
+    for i, par in enumerate(ESCENARIOS + CALENDARIOS):
+        ref, ex_ref = simulate(par, output="arrays", round_counts=round_counts)
+        out, ex = simulate(par, backend=backend, output="arrays", round_counts=round_counts)
+        exacto = backend == "numba"
+        _assert_iguales(ref, out, f"{backend} escenario {i}", exacto)
+        _assert_grados(ex_ref, ex["G"], ex["Div"], exacto)
+
+
+@pytest.mark.parametrize("round_counts", [True, False])
+def test_simulate_batch_coincide_con_python(round_counts):
+    for grupo in (ESCENARIOS, CALENDARIOS):
+        out = simulate_batch(grupo, round_counts=round_counts)
+        for i, par in enumerate(grupo):
+            ref, ex = simulate(par, output="arrays", round_counts=round_counts)
+            _assert_iguales(ref, {c: out[c][i] for c in OUTPUT_COLUMNS}, f"lote escenario {i}", exacto=False)
+            _assert_grados(ex, out["G"][i], out["Div"][i], exacto=False)
+
+
+@pytest.mark.parametrize("backend", [b for b in BACKENDS if b != "numpy"])
+@pytest.mark.parametrize("k", [1, 6, 14])
+def test_reanudar_desde_simstate(backend, k):
+    # Retomar desde el estado del año k da exactamente el tramo k.. de la corrida completa
+    for par in ESCENARIOS[:10] + CALENDARIOS:
+        if k >= par.anios:
+            continue
+        full, ex = simulate(par, backend=backend, output="arrays", keep_states=True)
+        tramo, ex_t = simulate(par, backend=backend, output="arrays", start_state=ex["states"][k])
+        _assert_iguales({c: v[k:] for c, v in full.items()}, tramo, f"{backend} desde {k}")
+        np.testing.assert_array_equal(ex["G"][k:], ex_t["G"])
+
+
+def test_simstate_ida_y_vuelta_por_dict():
+    par = ESCENARIOS[3]
+    full, ex = simulate(par, output="arrays", keep_states=True)
+    st = SimState.from_dict(ex["states"][5].to_dict())
+    tramo, _ = simulate(par, output="arrays", start_state=st)
+    _assert_iguales({c: v[5:] for c, v in full.items()}, tramo)
+
+
+def test_calendario_constante_igual_a_escalar():
+    base = Params(anios=10)
+    for campo in SCHEDULE_FIELDS:
+        v = getattr(base, campo)
+        for cal in ([v] * 10, {0: v}):
+            par = replace(base, **{campo: cal})
+            _assert_iguales(simulate(base, output="arrays")[0], simulate(par, output="arrays")[0], campo)
+
+
+def test_calendario_dict_igual_a_lista():
+    lista = [0.05] * 4 + [0.12] * 4 + [0.02] * 4
+    a = Params(anios=12, prop_mkt={0: 0.05, 4: 0.12, 8: 0.02})
+    b = Params(anios=12, prop_mkt=lista)
+    _assert_iguales(simulate(a, output="arrays")[0], simulate(b, output="arrays")[0])
+
+
+def test_calendario_invalido():
+    with pytest.raises(ValueError):
+        simulate(Params(anios=10, cuota_mensual=[300] * 9))
+    with pytest.raises(ValueError):
+        simulate(Params(anios=10, cuota_mensual={2: 300}))
+    with pytest.raises(ValueError):
+        simulate(Params(anios=10, cupo_maximo=[30] * 10))
@@ -0,0 +1,42 @@
+import json
+
+from bench_sim import HORIZONTES, LOTES, casos, compare, main
+
+# =====================================================================
+# bench_sim.py: humo de --quick y --compare
+# =====================================================================
+
+
+def test_quick_corre_y_guarda_json(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    # Matriz --quick con un backend y tope de n * anios bajo, para que sea corta
+    args = ["--quick", "--min-time", "0", "--backends", "numpy", "--max-celdas", "5000", "--out", str(out)]
+    assert main(args) == 0
+    res = json.loads(out.read_text())
+    esperados = casos(HORIZONTES[:3], LOTES[:3], ["numpy"], max_celdas=5000)
+    assert [r["clave"] for r in res["resultados"]] == [
+        f"{c['tipo']}/{c['backend']}/{c['salida']}/anios={c['anios']}/n={c['n']}" for c in esperados]
+    for r in res["resultados"]:
+        assert r["t_min"] > 0 and r["t_min"] <= r["t_med"] and r["repeticiones"] >= 1 and r["pico_mem_mb"] >= 0
+    assert {"fecha", "commit", "python", "numpy"} <= set(res["meta"])
+
+
+def _bench(t_min):
+    return {"meta": {"commit": None}, "resultados": [
+        {"clave": k, "t_min": t, "pico_mem_mb": 1.0} for k, t in t_min.items()]}
+
+
+def test_compare_marca_regresiones(tmp_path, capsys):
+    base = _bench({"a": 1.0, "b": 1.0, "solo_base": 1.0})
+    nuevo = _bench({"a": 1.05, "b": 1.5, "solo_nuevo": 1.0})
+    filas = {f["clave"]: f for f in compare(base, nuevo, umbral=0.10)}
+    assert set(filas) == {"a", "b"}
+    assert not filas["a"]["regresion"] and filas["b"]["regresion"]
+
+    rutas = []
+    for nombre, datos in (("base", base), ("nuevo", nuevo), ("igual", base)):
+        rutas.append(tmp_path / f"{nombre}.json")
+        rutas[-1].write_text(json.dumps(datos))
+    assert main(["--compare", str(rutas[0]), str(rutas[1])]) == 1
+    assert main(["--compare", str(rutas[0]), str(rutas[2])]) == 0
+    assert "REGRESION" in capsys.readouterr().out
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+from cache import CACHE_VERSION, SimCache
+from simulate_case import Params, simulate
+
+# =====================================================================
+# Cache de resultados (cache.py)
+# =====================================================================
+
+PAR = Params(anios=8, cuota_mensual=330, prop_mkt=[0.05] * 4 + [0.1] * 4)
+
+
+def _contar_simulaciones(monkeypatch):
+    llamadas = []
+
+    def contar(par):
+        llamadas.append(par)
+        return simulate(par)
+
+    monkeypatch.setattr(cache, "simulate", contar)
+    return llamadas
+
+
+def test_segunda_llamada_es_un_hit(monkeypatch):
+    llamadas = _contar_simulaciones(monkeypatch)
+    c = SimCache(maxsize=4)
+    df1, ex1 = c.simulate(PAR)
+    df2, ex2 = c.simulate(Params(anios=8, cuota_mensual=330.0, prop_mkt={0: 0.05, 4: 0.1}))   # mismo hash
+    assert len(llamadas) == 1
+    assert c.stats["memoria"] == {"hits": 1, "misses": 1}
+    pd.testing.assert_frame_equal(df1, df2)
+    np.testing.assert_array_equal(ex1["G"], ex2["G"])
+
+
+def test_devuelve_copias():
+    c = SimCache()
+    df, ex = c.simulate(PAR)
+    df["resultado"] = 0.0
+    ex["G"][:] = -1
+    df2, ex2 = c.simulate(PAR)
+    ref, ex_ref = simulate(PAR)
+    pd.testing.assert_frame_equal(df2, ref)
+    np.testing.assert_array_equal(ex2["G"], ex_ref["G"])
+
+
+def test_lru_expulsa_el_menos_usado(monkeypatch):
+    llamadas = _contar_simulaciones(monkeypatch)
+    c = SimCache(maxsize=2)
+    a, b, d = (Params(anios=5, cuota_mensual=v) for v in (200, 300, 400))
+    c.simulate(a)
+    c.simulate(b)
+    c.simulate(a)          # a pasa a ser el más reciente
+    c.simulate(d)          # expulsa a b
+    assert len(c) == 2
+    c.simulate(a)
+    c.simulate(b)
+    assert len(llamadas) == 4
+
+
+def test_nivel_disco_ida_y_vuelta(tmp_path, monkeypatch):
+    llamadas = _contar_simulaciones(monkeypatch)
+    SimCache(cache_dir=str(tmp_path)).simulate(PAR)
+    assert os.listdir(tmp_path / f"v{CACHE_VERSION}")
+    # Otra instancia (p.ej. otro proceso) lee de disco sin simular
+    c = SimCache(cache_dir=str(tmp_path))
+    df, ex = c.simulate(PAR)
+    assert len(llamadas) == 1
+    assert c.stats["disco"] == {"hits": 1, "misses": 0}
+    ref, ex_ref = simulate(PAR)
+    pd.testing.assert_frame_equal(df, ref)
+    np.testing.assert_array_equal(ex["G"], ex_ref["G"])
+    np.testing.assert_array_equal(ex["Div"], ex_ref["Div"])
+    assert Params(**ex["params"]) == Params(**ex_ref["params"])
+
+
+def test_archivo_corrupto_es_un_miss(tmp_path):
+    c = SimCache(cache_dir=str(tmp_path))
+    c.simulate(PAR)
+    (ruta,) = (tmp_path / f"v{CACHE_VERSION}").iterdir()
+    ruta.write_bytes(b"basura")
+    c.clear()
+    df, _ = c.simulate(PAR)
+    assert c.stats["disco"]["misses"] == 2
+    pd.testing.assert_frame_equal(df, simulate(PAR)[0])
+
+
+def test_maxsize_invalido():
+    with pytest.raises(ValueError):
+        SimCache(maxsize=0)
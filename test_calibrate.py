@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from calibrate import calibrate
+from simulate_case import N_GRADES, Params, simulate_batch
+
+# =====================================================================
+# Calibración contra datos históricos (calibrate.py)
+# =====================================================================
+
+REAL = Params(anios=8, cuota_mensual=320, prop_mkt=0.08, calidad_base=0.75, tasa_bajas_base=0.05)
+ESPACIO = {"prop_mkt": (0.0, 0.2), "calidad_base": (0.4, 0.95), "tasa_bajas_base": (0.0, 0.1)}
+
+
+def _observados(par: Params):
+    ref = simulate_batch([par], round_counts=False)
+    return {"G": ref["G"][0], "admitidos": ref["admitidos"][0],
+            "bajas_totales": ref["tasa_bajas"][0] * ref["alumnos_totales"][0]}
+
+
+def test_recupera_parametros_conocidos():
+    res = calibrate(_observados(REAL), ESPACIO, base=Params(cuota_mensual=320), n_init=128, seed=0)
+    assert res.params.anios == REAL.anios
+    assert res.loss < 1e-6
+    for k in ESPACIO:
+        assert res.x[k] == pytest.approx(getattr(REAL, k), rel=0.02), k
+    assert np.abs(res.residuos["G"]).max() < 0.5
+    assert [v for _, v in res.history] == sorted((v for _, v in res.history), reverse=True)
+
+
+def test_datos_faltantes_y_pesos():
+    obs = _observados(REAL)
+    obs["admitidos"][[2, 5]] = np.nan
+    res = calibrate(obs, ESPACIO, base=Params(cuota_mensual=320), pesos={"G": 0.0}, n_init=128, seed=1)
+    assert res.componentes["G"] == 0.0
+    assert res.x["tasa_bajas_base"] == pytest.approx(REAL.tasa_bajas_base, rel=0.05)
+
+
+def test_calendarios_de_base_con_otro_horizonte():
+    obs = _observados(REAL)
+    sp = {"calidad_base": (0.4, 0.95)}
+    # Lista más larga que los datos: se recorta a los años observados
+    largo = Params(cuota_mensual=[320] * 12, prop_mkt=0.08, tasa_bajas_base=0.05)
+    res = calibrate(obs, sp, base=largo, n_init=32, max_evals=400, seed=0)
+    assert res.params.cuota_mensual == [320] * 8
+    assert res.x["calidad_base"] == pytest.approx(0.75, rel=0.02)
+    # Dict por escalones: vale para cualquier horizonte
+    res = calibrate(obs, sp, base=Params(cuota_mensual={0: 320, 20: 500}, prop_mkt=0.08, tasa_bajas_base=0.05),
+                    n_init=32, max_evals=400, seed=0)
+    assert res.x["calidad_base"] == pytest.approx(0.75, rel=0.02)
+    # Lista más corta: error claro
+    with pytest.raises(ValueError, match="cuota_mensual"):
+        calibrate(obs, sp, base=Params(cuota_mensual=[320] * 5))
+
+
+def test_entradas_invalidas():
+    obs = _observados(REAL)
+    with pytest.raises(ValueError):
+        calibrate(obs, {"anios": (5, 10)})
+    with pytest.raises(ValueError):
+        calibrate({"no_existe": np.zeros(8)}, ESPACIO)
+    with pytest.raises(ValueError):
+        calibrate({"admitidos": np.zeros(8), "bajas_totales": np.zeros(7)}, ESPACIO)
+    with pytest.raises(ValueError):
+        calibrate({"G": np.zeros((8, N_GRADES - 1))}, ESPACIO)
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+from cli import CLIError, leer_escenarios, main
+from simulate_case import Params, simulate_batch
+
+# =====================================================================
+# Corredor por línea de comandos (cli.py)
+# =====================================================================
+
+
+def _escribir(tmp_path, nombre, texto):
+    ruta = tmp_path / nombre
+    ruta.write_text(texto, encoding="utf-8")
+    return str(ruta)
+
+
+def _leer_csv(ruta):
+    with open(ruta, encoding="utf-8") as fh:
+        return list(csv.DictReader(fh))
+
+
+def test_csv_coincide_con_simulate_batch(tmp_path):
+    escenarios = [{"anios": 6, "cuota_mensual": 300}, {"anios": 4, "prop_mkt": [0.05, 0.1, 0.1, 0.2]},
+                  {"anios": 6, "cuota_mensual": 420.5}]
+    ent = _escribir(tmp_path, "esc.json", json.dumps(escenarios))
+    sal = str(tmp_path / "out.csv")
+    assert main([ent, "-o", sal, "--columns", "anio,alumnos_totales,resultado"]) == 0
+    filas = _leer_csv(sal)
+    assert list(filas[0]) == ["escenario", "anio", "alumnos_totales", "resultado"]
+    for i, d in enumerate(escenarios):
+        ref = simulate_batch([Params(**d)])
+        mias = [f for f in filas if int(f["escenario"]) == i]
+        assert [int(f["anio"]) for f in mias] == ref["anio"][0].tolist()
+        assert [int(f["alumnos_totales"]) for f in mias] == ref["alumnos_totales"][0].tolist()
+        np.testing.assert_allclose([float(f["resultado"]) for f in mias], ref["resultado"][0], rtol=1e-12)
+
+
+def test_stdin_jsonl_y_grados(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO('{"anios": 5}\n{"anios": 5, "regla_dos_div": true}\n'))
+    assert main(["--grados", "--out-format", "jsonl"]) == 0
+    filas = [json.loads(l) for l in capsys.readouterr().out.splitlines()]
+    assert len(filas) == 10 and "G_K3" in filas[0]
+    ref = simulate_batch([Params(anios=5), Params(anios=5, regla_dos_div=True)])
+    assert [f["G_K3"] for f in filas[5:]] == ref["G"][1, :, 0].tolist()
+
+
+def test_csv_de_entrada_con_calendarios(tmp_path):
+    ent = _escribir(tmp_path, "esc.csv", "anios,cuota_mensual,regla_dos_div,prop_mkt,cupo_maximo\n"
+                                         '4,300,true,"[0.1, 0.1, 0.2, 0.2]",30\n4,,0,,28.0\n')
+    assert leer_escenarios([ent]) == [
+        Params(anios=4, cuota_mensual=300.0, regla_dos_div=True, prop_mkt=[0.1, 0.1, 0.2, 0.2], cupo_maximo=30),
+        Params(anios=4, regla_dos_div=False, cupo_maximo=28),
+    ]
+
+
+@pytest.mark.parametrize("nombre,texto", [
+    ("a.json", '{"cuota_mensual": "300"}'),
+    ("b.json", '{"regla_dos_div": "false"}'),
+    ("c.json", '{"cupo_maximo": 30.5}'),
+    ("d.json", '{"no_existe": 1}'),
+    ("e.json", '{"anios": 5, "prop_mkt": [0.1, 0.1]}'),
+    ("f.csv", "anios,cupo_maximo\n5,2.5\n"),
+    ("g.csv", "anios,cuota_mensual\n5,mucho\n"),
+    ("h.csv", "anios,regla_dos_div\n5,quizas\n"),
+])
+def test_entrada_invalida(tmp_path, capsys, nombre, texto):
+    ent = _escribir(tmp_path, nombre, texto)
+    with pytest.raises(CLIError):
+        leer_escenarios([ent])
+    assert main([ent, "-o", str(tmp_path / "out.csv")]) == 2
+    assert capsys.readouterr().err.startswith("error:")
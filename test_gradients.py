@@ -0,0 +1,98 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from gradients import OUTPUTS_DIFERENCIABLES, SALIDAS_DEFAULT, jacobian
+from simulate_case import Params, PARAM_TYPES, is_scheduled, simulate_batch
+
+# =====================================================================
+# gradients.jacobian contra el modelo
+# =====================================================================
+# `jacobian` reescribe el paso anual con tangentes: si el modelo cambia y
+# gradients.py no, estos tests fallan. Los valores tienen que coincidir con
+# simulate_batch(round_counts=False) y el Jacobiano con diferencias centradas
+# (en puntos suaves: se descartan campos cuyo paso cruza un quiebre, detectado
+# porque las diferencias con h y h/2 no coinciden).
+
+
+def _escenarios(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    return [
+        Params(
+            anios=rnd.choice([5, 10, 15]),
+            cuota_mensual=rnd.uniform(100, 500), prop_mkt=rnd.uniform(0.02, 0.2),
+            politica_seleccion=rnd.uniform(0.3, 1), demanda_inicial=rnd.choice([300, 900, 1500]),
+            alumnos_inicial_por_grado=rnd.choice([10, 25, 40]), divisiones_iniciales=rnd.choice([1, 2]),
+            trigger_auto_aula=rnd.random() < 0.6, regla_dos_div=rnd.random() < 0.5,
+            manual_crecimiento=rnd.random() < 0.3, extra_div_g1_per_year=rnd.choice([0, 1]),
+            admitidos_max_abs=rnd.choice([-1, 40]), gamma_hacinamiento=rnd.choice([1.0, 1.5]),
+            calidad_base=rnd.uniform(0.3, 0.9), k_bajas_calidad=rnd.uniform(0, 0.3),
+        )
+        for _ in range(n)
+    ]
+
+
+ESCENARIOS = _escenarios(12)
+
+
+def _campos(par: Params):
+    return [f for f, t in PARAM_TYPES.items() if t is float and not is_scheduled(getattr(par, f))]
+
+
+@pytest.mark.parametrize("i", range(len(ESCENARIOS)))
+def test_valores_coinciden_con_simulate_batch(i):
+    par = ESCENARIOS[i]
+    res = jacobian(par, _campos(par), salidas=OUTPUTS_DIFERENCIABLES)
+    ref = simulate_batch([par], round_counts=False)
+    for c in OUTPUTS_DIFERENCIABLES:
+        np.testing.assert_allclose(res.valores[c], ref[c][0], rtol=1e-10, atol=1e-8, err_msg=c)
+
+
+def _diferencias(par: Params, campos, h: float):
+    lista = []
+    for f in campos:
+        v = getattr(par, f)
+        s = h * max(abs(v), 1.0)
+        lista += [replace(par, **{f: v + s}), replace(par, **{f: v - s})]
+    out = simulate_batch(lista, round_counts=False)
+    return {c: np.stack([(out[c][2 * j] - out[c][2 * j + 1]) / (2 * h * max(abs(getattr(par, f)), 1.0))
+                         for j, f in enumerate(campos)], axis=1) for c in SALIDAS_DEFAULT}
+
+
+@pytest.mark.parametrize("i", range(len(ESCENARIOS)))
+def test_jacobiano_coincide_con_diferencias_centradas(i):
+    par = ESCENARIOS[i]
+    campos = _campos(par)
+    res = jacobian(par, campos)
+    fd, fd2 = _diferencias(par, campos, 1e-6), _diferencias(par, campos, 5e-7)
+    comparados = 0
+    for c in SALIDAS_DEFAULT:
+        escala = np.maximum(np.abs(fd[c]).max(axis=0), 1e-9)
+        suave = (np.abs(fd[c] - fd2[c]).max(axis=0) <= 1e-5 * escala)
+        err = np.abs(fd[c] - res.jacobiano[c]).max(axis=0) / escala
+        malos = [(campos[j], float(err[j])) for j in np.flatnonzero(suave & (err > 1e-4))]
+        assert not malos, f"{c}: {malos}"
+        comparados += int(suave.sum())
+    assert comparados >= len(campos)    # la mayoría de los campos son suaves
+
+
+def test_una_pasada_sirve_para_cualquier_subconjunto():
+    par = ESCENARIOS[0]
+    campos = _campos(par)
+    todo = jacobian(par, campos)
+    sub = jacobian(par, campos[3:6])
+    for c in SALIDAS_DEFAULT:
+        np.testing.assert_allclose(sub.jacobiano[c], todo.jacobiano[c][:, 3:6], rtol=1e-12, atol=1e-12)
+
+
+def test_campos_invalidos():
+    with pytest.raises(ValueError):
+        jacobian(Params(), ["trigger_auto_aula"])
+    with pytest.raises(ValueError):
+        jacobian(Params(), ["no_existe"])
+    with pytest.raises(ValueError):
+        jacobian(Params(anios=5, cuota_mensual=[300] * 5), ["cuota_mensual"])
+    with pytest.raises(ValueError):
+        jacobian(Params(), ["cuota_mensual"], salidas=["G"])
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from microsim import BAJA, EGRESO, NO_CONTINUA, simulate_micro
+from montecarlo import simulate_mc
+from simulate_case import N_GRADES, Params
+
+# =====================================================================
+# Microsimulación por alumno (microsim.py)
+# =====================================================================
+
+PAR = Params(anios=8, demanda_inicial=1500, cuota_mensual=250, prop_mkt=0.1)
+
+
+def test_semilla_fija_y_workers():
+    a, reg_a = simulate_micro(PAR, n_rep=12, seed=3, registro=True, alumnos_por_bloque=2000)
+    b, reg_b = simulate_micro(PAR, n_rep=12, seed=3, registro=True, alumnos_por_bloque=2000, max_workers=2)
+    for c in a:
+        np.testing.assert_array_equal(a[c], b[c], err_msg=c)
+    for c in reg_a:
+        np.testing.assert_array_equal(reg_a[c], reg_b[c], err_msg=c)
+    c, _ = simulate_micro(PAR, n_rep=12, seed=4, alumnos_por_bloque=2000)
+    assert not np.array_equal(a["alumnos_totales"], c["alumnos_totales"])
+
+
+def test_registro_coincide_con_la_matricula():
+    out, reg = simulate_micro(PAR, n_rep=5, seed=0, registro=True)
+    n, anios = out["alumnos_totales"].shape
+    # Un alumno cursa desde anio_ingreso hasta anio_salida (-1 = sigue al final)
+    fin = np.where(reg["anio_salida"] < 0, anios - 1, reg["anio_salida"])
+    for k in range(anios):
+        presentes = (reg["anio_ingreso"] <= k) & (fin >= k)
+        np.testing.assert_array_equal(np.bincount(reg["rep"][presentes], minlength=n), out["alumnos_totales"][:, k])
+    # Conteos por motivo de salida = series realizadas
+    for motivo, serie in ((BAJA, out["bajas_totales"]), (NO_CONTINUA, out["no_continuan"])):
+        sel = reg["motivo"] == motivo
+        conteo = np.zeros((n, anios), dtype=np.int64)
+        np.add.at(conteo, (reg["rep"][sel], reg["anio_salida"][sel]), 1)
+        np.testing.assert_array_equal(conteo, serie)
+    eg = reg["motivo"] == EGRESO
+    assert (reg["grado_salida"][eg] == N_GRADES - 1).all()
+    conteo = np.zeros((n, anios), dtype=np.int64)
+    np.add.at(conteo, (reg["rep"][eg], reg["anio_salida"][eg]), 1)
+    np.testing.assert_array_equal(conteo[:, :-1], out["egresados"][:, 1:])
+    # Antigüedad coherente: nadie sale antes de entrar ni baja de grado
+    assert (fin >= reg["anio_ingreso"]).all() and (reg["grado_salida"] >= reg["grado_ingreso"]).all()
+
+
+def test_sin_bajas_ni_cortes():
+    par = Params(anios=6, tasa_bajas_base=0.0, k_bajas_calidad=0.0, k_bajas_precio=0.0, tasa_cont_k_to_g1=1.0)
+    out, _ = simulate_micro(par, n_rep=4, seed=1)
+    assert (out["bajas_totales"] == 0).all() and (out["no_continuan"] == 0).all()
+
+
+def test_misma_distribucion_que_monte_carlo():
+    # Mismo modelo agregado que el modo Monte Carlo: medias parecidas
+    micro, _ = simulate_micro(PAR, n_rep=400, seed=0)
+    _, ex = simulate_mc(PAR, n_rep=400, seed=0, sigma_demanda=0.0)
+    for c in ("alumnos_totales", "bajas_totales"):
+        np.testing.assert_allclose(micro[c].mean(axis=0), ex["reps"][c].mean(axis=0), rtol=0.05, err_msg=c)
+
+
+def test_n_rep_invalido():
+    with pytest.raises(ValueError):
+        simulate_micro(PAR, n_rep=0)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from montecarlo import simulate_mc, tail_summary
+from simulate_case import Params, simulate
+
+# =====================================================================
+# Modo Monte Carlo (montecarlo.py)
+# =====================================================================
+
+PAR = Params(anios=10, cuota_mensual=250, prop_mkt=0.1, demanda_inicial=1500)
+
+
+def test_semilla_fija_es_reproducible():
+    a, ex_a = simulate_mc(PAR, n_rep=200, seed=5)
+    b, ex_b = simulate_mc(PAR, n_rep=200, seed=5)
+    c, _ = simulate_mc(PAR, n_rep=200, seed=6)
+    assert a.equals(b)
+    np.testing.assert_array_equal(ex_a["resultado_acumulado"], ex_b["resultado_acumulado"])
+    assert not a.equals(c)
+
+
+def test_sin_ruido_de_demanda_sigue_al_determinista():
+    # La matrícula del año 0 es el estado inicial (igual en todas las réplicas) y,
+    # sin ruido de Demanda, la media de los sorteos sigue al modelo determinista
+    ref, _ = simulate(PAR, output="arrays")
+    _, ex = simulate_mc(PAR, n_rep=2000, seed=1, sigma_demanda=0.0)
+    np.testing.assert_array_equal(ex["reps"]["alumnos_totales"][:, 0], ref["alumnos_totales"][0])
+    for c in ("alumnos_totales", "bajas_totales", "resultado"):
+        np.testing.assert_allclose(ex["reps"][c][:, :6].mean(axis=0), ref[c][:6], rtol=0.05, err_msg=c)
+    assert ex["reps"]["alumnos_totales"][:, -1].std() > 0
+
+
+def test_bandas_y_conteos_sorteados():
+    bandas, ex = simulate_mc(PAR, n_rep=500, seed=2)
+    assert list(bandas.index) == list(range(PAR.anios))
+    p5, p50, p95 = (bandas["alumnos_totales"][e] for e in ("P5", "P50", "P95"))
+    assert (p5 <= p50).all() and (p50 <= p95).all() and (p95 > p5).any()
+    reps = ex["reps"]
+    for c in ("bajas_totales", "egresados"):
+        assert reps[c].dtype.kind == "i" and (reps[c] >= 0).all()
+        assert reps[c][:, -1].std() > 0          # sorteados, no tasa · alumnos
+
+
+def test_tail_summary():
+    ex = {"resultado_acumulado": np.array([-30.0, -10.0] + [10.0] * 98)}
+    res = tail_summary(ex, alpha=0.02)
+    assert res["prob_perdida"] == pytest.approx(0.02)
+    assert res["CVaR"] == pytest.approx(-20.0)
+    assert res["media"] == pytest.approx(9.4)
+    with pytest.raises(ValueError):
+        simulate_mc(PAR, n_rep=0)
@@ -0,0 +1,61 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from network import NetworkParams, network_summary, simulate_network
+from simulate_case import OUTPUT_COLUMNS, Params, simulate, simulate_batch
+
+# =====================================================================
+# Red de campus con pool de Demanda compartido (network.py)
+# =====================================================================
+
+CAMPUS = [Params(anios=10, cuota_mensual=c, calidad_base=q, demanda_inicial=d)
+          for c, q, d in ((250, 0.8, 600), (380, 0.6, 900), (300, 0.7, 400))]
+
+
+@pytest.mark.parametrize("par", [Params(anios=12), Params(anios=10, cuota_mensual=420, prop_mkt=0.15),
+                                 Params(anios=8, politica_seleccion={0: 0.9, 4: 0.5}, trigger_auto_aula=False)])
+def test_un_campus_coincide_con_simulate(par):
+    out = simulate_network([par])
+    ref, ex = simulate(par, output="arrays")
+    for c in OUTPUT_COLUMNS:
+        np.testing.assert_allclose(out[c][0], ref[c], rtol=1e-12, atol=1e-9, err_msg=c)
+    np.testing.assert_array_equal(out["Div"][0], ex["Div"])
+    np.testing.assert_allclose(out["participacion"], 1.0)
+    np.testing.assert_allclose(out["Demanda_red"], out["Demanda"][0], rtol=1e-12)
+
+
+def test_participacion_y_pool_compartido():
+    out = simulate_network(CAMPUS)
+    assert out["participacion"].shape == (3, 10) and out["Demanda_red"].shape == (10,)
+    np.testing.assert_allclose(out["participacion"].sum(axis=0), 1.0)
+    # Las familias libres del pool se reparten entre campus (sin redondear conteos)
+    cont = simulate_network(CAMPUS, round_counts=False)
+    libres = cont["Demanda_red"] - cont["alumnos_totales"].sum(axis=0)
+    np.testing.assert_allclose((cont["Demanda"] - cont["alumnos_totales"]).sum(axis=0), libres, rtol=1e-9)
+    # Compitiendo, cada campus admite a lo sumo lo que admitiría solo con el mismo pool
+    solos = simulate_batch([replace(p, demanda_inicial=sum(q.demanda_inicial for q in CAMPUS)) for p in CAMPUS])
+    assert (out["admitidos"][:, 1:] <= solos["admitidos"][:, 1:] + 1e-9).all()
+
+
+def test_reparto_favorece_calidad_y_precio():
+    iguales = [Params(anios=6, demanda_inicial=800)] * 2
+    out = simulate_network(iguales)
+    np.testing.assert_allclose(out["participacion"], 0.5)
+    caro = [Params(anios=6, demanda_inicial=800), Params(anios=6, demanda_inicial=800, cuota_mensual=600)]
+    out = simulate_network(caro, NetworkParams(k_precio_reparto=4.0))
+    assert (out["participacion"][0, 1:] > out["participacion"][1, 1:]).all()
+
+
+def test_network_summary():
+    out = simulate_network(CAMPUS)
+    df = network_summary(out)
+    assert df["anio"].tolist() == list(range(10))
+    np.testing.assert_allclose(df["alumnos_totales"], out["alumnos_totales"].sum(axis=0))
+    assert ((df["hhi"] >= 1 / 3 - 1e-12) & (df["hhi"] <= 1)).all()
+
+
+def test_horizontes_distintos():
+    with pytest.raises(ValueError):
+        simulate_network([Params(anios=5), Params(anios=6)])
@@ -0,0 +1,28 @@
+import numpy as np
+
+from simulate_case import Params, cast_param, params_hash
+
+# =====================================================================
+# Casteo y hash de Params
+# =====================================================================
+
+
+def test_cast_param_bool_usa_umbral():
+    # Muestras uniformes en [0, 1] (optimize, sensitivity, regimes) dan mitad y mitad
+    np.testing.assert_array_equal(cast_param("trigger_auto_aula", [0.0, 0.3, 0.49, 0.5, 0.7, 1.0]),
+                                  [False, False, False, True, True, True])
+    np.testing.assert_array_equal(cast_param("regla_dos_div", [True, False]), [True, False])
+    u = np.random.default_rng(0).random(10_000)
+    assert 0.45 < cast_param("regla_dos_div", u).mean() < 0.55
+
+
+def test_cast_param_int_y_float():
+    np.testing.assert_array_equal(cast_param("cupo_maximo", [29.6, 30.4]), [30, 30])
+    assert cast_param("cupo_maximo", [29.6]).dtype.kind == "i"
+    assert cast_param("cuota_mensual", [300]).dtype == float
+
+
+def test_params_hash_normaliza_tipos():
+    assert params_hash(Params(cuota_mensual=300)) == params_hash(Params(cuota_mensual=300.0))
+    assert params_hash(Params(anios=5, prop_mkt=[0.1] * 5)) == params_hash(Params(anios=5, prop_mkt=0.1))
+    assert params_hash(Params(regla_dos_div=True)) != params_hash(Params(regla_dos_div=False))
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from regimes import capacidad_antes_de, find_boundaries, regimen_antes_de
+from simulate_case import Params, cast_param, repeat_params, simulate_batch
+
+# =====================================================================
+# Fronteras de régimen (regimes.py) contra una grilla uniforme
+# =====================================================================
+
+ESPACIO = {"cuota_mensual": (100.0, 600.0), "prop_mkt": (0.0, 0.3)}
+BASE = Params(anios=5)
+
+
+def _grilla(clasificador, N):
+    # Etiquetas en la grilla uniforme (N + 1) x (N + 1) y puntos medios de aristas con cambio
+    lo = np.array([v[0] for v in ESPACIO.values()])
+    hi = np.array([v[1] for v in ESPACIO.values()])
+    I = np.stack(np.meshgrid(np.arange(N + 1), np.arange(N + 1), indexing="ij"), axis=-1).reshape(-1, 2)
+    X = lo + I / N * (hi - lo)
+    cols = repeat_params(BASE, len(I))
+    for j, k in enumerate(ESPACIO):
+        cols[k] = cast_param(k, X[:, j])
+    et = np.asarray(clasificador(simulate_batch(cols))).reshape(N + 1, N + 1)
+    medios = set()
+    for eje in range(2):
+        a = et.take(range(N), axis=eje) != et.take(range(1, N + 1), axis=eje)
+        for i, j in zip(*np.nonzero(a)):
+            p = np.array([i, j], dtype=float)
+            p[eje] += 0.5
+            medios.add(tuple(np.round(lo + p / N * (hi - lo), 9)))
+    return medios
+
+
+@pytest.mark.parametrize("clasificador", [capacidad_antes_de(5), regimen_antes_de(5)])
+def test_frontera_coincide_con_la_grilla(clasificador):
+    res = find_boundaries(ESPACIO, clasificador, base=BASE, n_inicial=4, niveles=4)
+    verdad = _grilla(clasificador, 4 * 2 ** 4)
+    encontrada = {tuple(np.round(p, 9)) for p in res.frontera}
+    assert verdad, "el caso de prueba tiene que tener frontera"
+    assert encontrada <= verdad
+    assert len(encontrada) >= 0.95 * len(verdad)
+    assert res.n_evals < res.n_grilla
+    assert len(res.puntos) == len(res.etiquetas) == res.n_evals
+
+
+def test_etiquetas_evaluadas_son_las_del_modelo():
+    clas = capacidad_antes_de(5)
+    res = find_boundaries(ESPACIO, clas, base=BASE, n_inicial=3, niveles=2, columns=["capacidad_binding"])
+    cols = repeat_params(BASE, len(res.puntos))
+    for j, k in enumerate(res.names):
+        cols[k] = cast_param(k, res.puntos[:, j])
+    np.testing.assert_array_equal(res.etiquetas, clas(simulate_batch(cols)))
+
+
+def test_curva_por_par_de_etiquetas():
+    res = find_boundaries(ESPACIO, regimen_antes_de(5), base=BASE, n_inicial=4, niveles=3)
+    total = sum(len(res.curva(a, b)) for a in range(4) for b in range(a + 1, 4))
+    assert total == len(res.frontera)
+    np.testing.assert_array_equal(res.curva(0, 1), res.curva(1, 0))
+
+
+def test_sin_frontera():
+    res = find_boundaries(ESPACIO, lambda out: np.zeros(len(out["anio"]), dtype=int), base=BASE,
+                          n_inicial=3, niveles=4)
+    assert len(res.frontera) == 0 and len(res.celdas) == 0
+    assert res.n_evals == 4 ** 2 + 3 ** 2          # esquinas + centros del nivel 0
+
+
+def test_errores():
+    with pytest.raises(ValueError):
+        find_boundaries({}, capacidad_antes_de(5))
+    with pytest.raises(ValueError):
+        find_boundaries({"no_existe": (0, 1)}, capacidad_antes_de(5))
+    with pytest.raises(ValueError):
+        find_boundaries(ESPACIO, capacidad_antes_de(5), n_inicial=0)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensitivity import _indices, sobol_indices
+from simulate_case import Params
+
+# =====================================================================
+# Índices de Sobol (sensitivity.py)
+# =====================================================================
+
+ESPACIO = {"cuota_mensual": (200.0, 400.0), "prop_mkt": (0.0, 0.2), "costo_docente_por_aula": (25_000, 40_000)}
+BASE = Params(anios=8)
+
+
+def test_estimadores_con_modelo_analitico():
+    # f = x1 + 2 x2 con x ~ U(0, 1): S1 = ST = (1/5, 4/5)
+    rng = np.random.default_rng(0)
+    n = 20_000
+    A, B = rng.random((n, 2)), rng.random((n, 2))
+    f = lambda X: X[:, 0] + 2 * X[:, 1]
+    AB = np.stack([f(np.where(np.arange(2) == i, B, A)) for i in range(2)], axis=1)
+    S1, ST = _indices(f(A), f(B), AB)
+    np.testing.assert_allclose(S1, [0.2, 0.8], atol=0.03)
+    np.testing.assert_allclose(ST, [0.2, 0.8], atol=0.03)
+
+
+def test_parametro_sin_efecto_da_cero():
+    # El costo docente no cambia la matrícula: su columna AB_i es idéntica a A
+    res = sobol_indices(ESPACIO, n=64, seed=1, base=BASE, n_boot=20)
+    fila = res.indices.set_index(["salida", "parametro"])
+    assert fila.loc[("alumnos_finales", "costo_docente_por_aula"), "ST"] == 0.0
+    assert fila.loc[("alumnos_finales", "costo_docente_por_aula"), "S1"] == 0.0
+    assert fila.loc[("resultado_acumulado", "costo_docente_por_aula"), "ST"] > 0.0
+    assert res.n_evals == 64 * 5
+    assert list(res.ranking("resultado_acumulado")["ST"]) == sorted(fila.loc["resultado_acumulado", "ST"], reverse=True)
+
+
+def test_bloques_y_workers_no_cambian_el_resultado():
+    ref = sobol_indices(ESPACIO, n=40, seed=3, base=BASE, n_boot=30)
+    chico = sobol_indices(ESPACIO, n=40, seed=3, base=BASE, n_boot=30, chunk_size=7)
+    pool = sobol_indices(ESPACIO, n=40, seed=3, base=BASE, n_boot=30, chunk_size=50, max_workers=2)
+    pd.testing.assert_frame_equal(ref.indices, chico.indices)
+    pd.testing.assert_frame_equal(ref.indices, pool.indices)
+
+
+def test_intervalos_contienen_al_estimador():
+    res = sobol_indices(ESPACIO, n=128, seed=2, base=BASE, n_boot=100)
+    idx = res.indices.dropna()
+    assert ((idx["ST_lo"] <= idx["ST"] + 1e-12) & (idx["ST"] <= idx["ST_hi"] + 1e-12)).mean() > 0.8
+
+
+def test_errores():
+    with pytest.raises(ValueError):
+        sobol_indices({})
+    with pytest.raises(ValueError):
+        sobol_indices({"no_existe": (0, 1)})
+    with pytest.raises(ValueError):
+        sobol_indices(ESPACIO, n=1)
@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from service import MAX_ANIOS, SimService, validar_params
+from simulate_case import Params, params_hash, simulate
+
+# =====================================================================
+# Servicio HTTP local (service.py) sobre 127.0.0.1
+# =====================================================================
+# Cada test levanta un SimService en un puerto libre y le habla HTTP crudo
+# con asyncio; los pedidos que no llegan a simular no arrancan el pool.
+
+
+async def _pedido(port: int, crudo: bytes):
+    r, w = await asyncio.open_connection("127.0.0.1", port)
+    w.write(crudo)
+    await w.drain()
+    resp = await r.read()
+    w.close()
+    cabecera, _, cuerpo = resp.partition(b"\r\n\r\n")
+    return int(cabecera.split(b" ", 2)[1]), json.loads(cuerpo)
+
+
+def _post(cuerpo: bytes, largo=None) -> bytes:
+    largo = len(cuerpo) if largo is None else largo
+    return f"POST /simulate HTTP/1.1\r\nContent-Length: {largo}\r\n\r\n".encode() + cuerpo
+
+
+def _con_servicio(prueba, **kwargs):
+    async def main():
+        svc = SimService(max_workers=1, **kwargs)
+        server = await svc.start("127.0.0.1", 0)
+        try:
+            return await prueba(svc, server.sockets[0].getsockname()[1])
+        finally:
+            await svc.close()
+    return asyncio.run(main())
+
+
+def test_pedido_valido():
+    par = {"anios": 6, "cuota_mensual": 350}
+
+    async def prueba(svc, port):
+        cuerpo = json.dumps({"params": par, "columns": ["anio", "resultado"]}).encode()
+        return await asyncio.gather(*(_pedido(port, _post(cuerpo)) for _ in range(3)))
+
+    res = _con_servicio(prueba, batch_window=0.05)
+    ref, ex = simulate(Params(**par), output="arrays")
+    for status, body in res:
+        assert status == 200
+        assert body["hash"] == params_hash(Params(**par))
+        assert body["data"]["anio"] == ref["anio"].tolist()
+        np.testing.assert_allclose(body["data"]["resultado"], ref["resultado"], rtol=1e-12)
+        assert np.array(body["G"]).shape == ex["G"].shape
+
+
+@pytest.mark.parametrize("crudo", [
+    _post(b"{no es json"),
+    _post(b"[1, 2]"),
+    _post(json.dumps({"params": {"cupo_maximo": "30"}}).encode()),
+    _post(json.dumps({"params": {"anios": MAX_ANIOS + 1}}).encode()),
+    _post(json.dumps({"params": {}, "columns": ["no_existe"]}).encode()),
+    _post(json.dumps({"params": {}, "timeout": "5"}).encode()),
+    _post(json.dumps({"params": {}, "timeout": 0}).encode()),
+    _post(b"{}", largo="abc"),
+    _post(b"{}", largo=-1),
+])
+def test_entrada_invalida_da_400(crudo):
+    async def prueba(svc, port):
+        return await _pedido(port, crudo), svc.contadores
+
+    (status, body), contadores = _con_servicio(prueba)
+    assert status == 400 and "error" in body
+    assert contadores["errores_400"] == 1 and contadores["errores_500"] == 0
+
+
+def test_timeout_da_504():
+    async def prueba(svc, port):
+        cuerpo = json.dumps({"params": {"anios": 5}, "timeout": 0.01}).encode()
+        return await _pedido(port, _post(cuerpo)), svc.contadores
+
+    # La ventana del micro-lote es más larga que el timeout del pedido
+    (status, body), contadores = _con_servicio(prueba, batch_window=1.0)
+    assert status == 504
+    assert contadores["timeouts_504"] == 1
+
+
+def test_metrics_y_rutas():
+    async def prueba(svc, port):
+        return (await _pedido(port, b"GET /metrics HTTP/1.1\r\n\r\n"),
+                await _pedido(port, b"GET /simulate HTTP/1.1\r\n\r\n"),
+                await _pedido(port, b"GET /otra HTTP/1.1\r\n\r\n"))
+
+    (s_met, met), (s_get, _), (s_404, _) = _con_servicio(prueba)
+    assert s_met == 200 and met["pedidos"] == 0 and "latencia_ms" in met
+    assert (s_get, s_404) == (405, 404)
+
+
+def test_validar_params():
+    assert validar_params({"cupo_maximo": 30.0, "regla_dos_div": False}) == Params(cupo_maximo=30.0, regla_dos_div=False)
+    for malo in ({"regla_dos_div": "false"}, {"cupo_maximo": 30.5}, {"cuota_mensual": True},
+                 {"cuota_mensual": ["a"] * 10}, {"zz": 1}, {"anios": 0}, {"anios": 5, "prop_mkt": [0.1] * 4}):
+        with pytest.raises(ValueError):
+            validar_params(malo)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from simulate_case import Params, params_hash, simulate_batch
+from store import G_COLUMNS, ResultStore
+
+# =====================================================================
+# Almacén columnar (store.py)
+# =====================================================================
+
+
+@pytest.fixture(params=["parquet", "arrow"])
+def store(tmp_path, request):
+    return ResultStore(str(tmp_path / "st"), format=request.param)
+
+
+def test_almacen_vacio(store):
+    assert store.hashes() == set()
+    assert store.count() == 0
+    assert len(store.query(["hash", "resultado"])) == 0
+    assert store.final_year([("calidad", ">", 0.5)]) == set()
+    assert len(store.load(["no-existe"])) == 0
+    # skip_existing sobre un almacén vacío escribe todo
+    assert store.append([Params(anios=5)], skip_existing=True) == 1
+
+
+def test_int_y_float_en_particiones_distintas(store):
+    assert store.append([Params(anios=5, cuota_mensual=300)]) == 1
+    assert store.append([Params(anios=5, cuota_mensual=310.5)]) == 1
+    assert store.append([Params(anios=5, cupo_maximo=30.0, trigger_auto_aula=1)]) == 1
+    df = store.query(["cuota_mensual", "cupo_maximo", "trigger_auto_aula"])
+    assert df["cuota_mensual"].dtype == float and df["cupo_maximo"].dtype.kind == "i"
+    assert df["trigger_auto_aula"].dtype == bool
+    assert sorted(df["cuota_mensual"].unique()) == [300.0, 310.5]
+    assert len(store.load(sorted(store.hashes()))) == 15
+
+
+def test_skip_existing_y_dedup(store):
+    ps = [Params(anios=5, cuota_mensual=c) for c in (250, 300, 300.0)]
+    assert store.append(ps) == 2                     # 300 y 300.0 son el mismo escenario
+    assert store.append(ps, skip_existing=True) == 0
+    assert store.hashes() == {params_hash(p) for p in ps}
+
+
+def test_filas_coinciden_con_simulate_batch(store):
+    ps = [Params(anios=6, cuota_mensual=c, prop_mkt=[0.05, 0.1] * 3) for c in (200.0, 350.0)]
+    store.append(ps)
+    out = simulate_batch(ps)
+    for i, p in enumerate(ps):
+        df = store.load([params_hash(p)])
+        np.testing.assert_allclose(df["resultado"], out["resultado"][i])
+        np.testing.assert_array_equal(df["alumnos_totales"], out["alumnos_totales"][i])
+        np.testing.assert_array_equal(df[G_COLUMNS].to_numpy(), out["G"][i])
+        np.testing.assert_allclose(df["prop_mkt"], [0.05, 0.1] * 3)   # calendario: valor del año
+
+
+def test_filtros_y_ultimo_anio(store):
+    ps = [Params(anios=5, calidad_base=c) for c in (0.3, 0.9)]
+    store.append(ps)
+    out = simulate_batch(ps)
+    alto = {params_hash(p) for i, p in enumerate(ps) if out["calidad"][i, -1] > 0.6}
+    assert store.final_year([("calidad", ">", 0.6)]) == alto
+    assert store.count([("anio", "==", 0)]) == 2
+
+
+def test_particion_vieja_con_tipos_inferidos(tmp_path):
+    # Particiones escritas antes del esquema fijo (cuota_mensual como int64) se leen casteadas
+    st = ResultStore(str(tmp_path / "st"))
+    st.append([Params(anios=5, cuota_mensual=310.5)])
+    t = st.query(as_table=True)
+    vieja = t.set_column(t.schema.get_field_index("cuota_mensual"), "cuota_mensual",
+                         pa.array(np.full(len(t), 300, dtype=np.int64)))
+    st._write(vieja)
+    assert sorted(st.query(["cuota_mensual"])["cuota_mensual"].unique()) == [300.0, 310.5]
@@ -0,0 +1,98 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+import surrogate
+from simulate_case import Params, simulate_batch
+from surrogate import SALIDAS, Surrogate, fit_surrogate
+
+# =====================================================================
+# Emulador de salidas escalares (surrogate.py)
+# =====================================================================
+
+BASE = Params(anios=8)
+CAJA = {"cuota_mensual": (250.0, 350.0), "prop_mkt": (0.05, 0.15), "calidad_base": (0.6, 0.8)}
+
+
+@pytest.fixture(scope="module")
+def sur():
+    return fit_surrogate(CAJA, n=3000, degree=3, base=BASE, seed=0)
+
+
+def _reales(pars):
+    out = simulate_batch(pars)
+    return {s: SALIDAS[s](out) for s in SALIDAS}
+
+
+def test_modelo_lineal_se_reproduce_exacto():
+    # Los costos entran lineales en el resultado y no tocan la matrícula
+    caja = {"costo_docente_por_aula": (25_000.0, 40_000.0), "sueldos_no_docentes": (40_000.0, 80_000.0)}
+    s = fit_surrogate(caja, n=200, degree=1, base=BASE, seed=1, salidas=["resultado_acumulado", "alumnos_finales"])
+    pars = [replace(BASE, costo_docente_por_aula=c, sueldos_no_docentes=w) for c, w in ((26_000, 45_000), (39_000, 79_000))]
+    pred, err = s.predict(pars)
+    real = _reales(pars)
+    np.testing.assert_allclose(pred["resultado_acumulado"], real["resultado_acumulado"], rtol=1e-8)
+    np.testing.assert_allclose(pred["alumnos_finales"], real["alumnos_finales"])
+    assert s.rmse["resultado_acumulado"] < 1e-6 * abs(real["resultado_acumulado"]).max()
+
+
+def test_intervalo_calibrado_cubre(sur):
+    rng = np.random.default_rng(7)
+    pars = [replace(BASE, **{k: rng.uniform(lo, hi) for k, (lo, hi) in CAJA.items()}) for _ in range(300)]
+    pred, err = sur.predict(pars)
+    real = _reales(pars)
+    for s in sur.salidas:
+        assert (err[s] == sur.q[s]).all()
+        cubre = np.mean(np.abs(pred[s] - real[s]) <= err[s])
+        assert cubre >= sur.conf - 0.1, (s, cubre)
+
+
+def test_fuera_de_region_corre_el_modelo(sur):
+    pars = [replace(BASE, cuota_mensual=500.0),                  # fuera de la caja
+            replace(BASE, cuota_mensual=300.0, cupo_optimo=20),  # campo no entrenado distinto de base
+            replace(BASE, cuota_mensual=300.0)]                  # dentro
+    pred, err = sur.predict(pars)
+    real = _reales(pars[:2])
+    for s in sur.salidas:
+        np.testing.assert_array_equal(pred[s][:2], real[s])
+        assert (err[s][:2] == 0).all() and err[s][2] == sur.q[s]
+    sin, err_sin = sur.predict(pars, fallback=False)
+    assert np.isnan(sin["resultado_acumulado"][:2]).all() and np.isnan(err_sin["resultado_acumulado"][:2]).all()
+    assert sin["resultado_acumulado"][2] == pred["resultado_acumulado"][2]
+
+
+def test_consulta_como_dict(sur):
+    pred, _ = sur.predict({"cuota_mensual": np.array([260.0, 340.0]), "prop_mkt": 0.1})
+    lista, _ = sur.predict([replace(BASE, cuota_mensual=c, prop_mkt=0.1) for c in (260.0, 340.0)])
+    for s in sur.salidas:
+        np.testing.assert_allclose(pred[s], lista[s])
+
+
+def test_guardar_y_cargar(sur, tmp_path):
+    ruta = str(tmp_path / "sur.npz")
+    sur.save(ruta)
+    otro = Surrogate.load(ruta)
+    X = np.array([[260.0, 0.07, 0.65], [340.0, 0.14, 0.79]])
+    for s, v in sur.predict_x(X).items():
+        np.testing.assert_array_equal(otro.predict_x(X)[s], v)
+    assert otro.q == sur.q and otro.base == sur.base and otro.names == sur.names
+
+
+def test_cargar_formato_o_salida_desconocidos(sur, tmp_path, monkeypatch):
+    ruta = str(tmp_path / "sur.npz")
+    sur.save(ruta)
+    monkeypatch.setattr(surrogate, "FORMAT_VERSION", 99)
+    with pytest.raises(ValueError):
+        Surrogate.load(ruta)
+    monkeypatch.undo()
+    monkeypatch.delitem(SALIDAS, "calidad_final")
+    with pytest.raises(ValueError):
+        Surrogate.load(ruta)
+
+
+def test_campos_no_soportados():
+    for caja in ({"regla_dos_div": (0, 1)}, {"anios": (5, 10)}, {"no_existe": (0, 1)}, {},
+                 {"cuota_mensual": (300.0, 200.0)}):
+        with pytest.raises(ValueError):
+            fit_surrogate(caja, n=50)
@@ -0,0 +1,72 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from simulate_case import Params, simulate_batch
+from sweep import Choice, LogUniform, Normal, Uniform, as_dist, design, run_sweep
+
+# =====================================================================
+# Barridos (sweep.py)
+# =====================================================================
+
+
+def test_diseno_cartesiano():
+    des = design({"cuota_mensual": Uniform(200, 400, 3), "regla_dos_div": [True, False],
+                  "cupo_maximo": [25, 30]})
+    assert len(des["cuota_mensual"]) == 12
+    combos = set(zip(des["cuota_mensual"].tolist(), des["regla_dos_div"].tolist(), des["cupo_maximo"].tolist()))
+    assert len(combos) == 12
+    assert des["regla_dos_div"].dtype == bool and des["cupo_maximo"].dtype.kind == "i"
+
+
+def test_lhs_un_punto_por_estrato():
+    n = 50
+    des = design({"prop_mkt": Uniform(0.0, 0.2), "calidad_base": Uniform(0.5, 1.0)}, method="lhs", n=n, seed=3)
+    for k, (lo, hi) in {"prop_mkt": (0.0, 0.2), "calidad_base": (0.5, 1.0)}.items():
+        estratos = np.floor((des[k] - lo) / (hi - lo) * n).astype(int)
+        assert sorted(estratos.tolist()) == list(range(n))
+
+
+def test_diseno_reproducible_con_semilla():
+    sp = {"cuota_mensual": LogUniform(100, 500), "prop_mkt": Normal(0.1, 0.05, low=0.0)}
+    a, b = design(sp, "random", n=200, seed=1), design(sp, "random", n=200, seed=1)
+    for k in sp:
+        np.testing.assert_array_equal(a[k], b[k])
+    assert a["prop_mkt"].min() >= 0.0
+    assert 100 <= a["cuota_mensual"].min() and a["cuota_mensual"].max() <= 500
+
+
+def test_as_dist():
+    assert as_dist([1, 2]) == Choice([1, 2])
+    assert as_dist(5) == Choice([5])
+    u = Uniform(0, 1)
+    assert as_dist(u) is u
+    np.testing.assert_array_equal(Choice([10, 20, 30]).ppf(np.array([0.0, 0.5, 0.999])), [10, 20, 30])
+
+
+def test_errores_de_diseno():
+    with pytest.raises(ValueError):
+        design({})
+    with pytest.raises(ValueError):
+        design({"no_existe": [1]})
+    with pytest.raises(ValueError):
+        design({"prop_mkt": Uniform(0, 1)}, method="lhs")
+    with pytest.raises(ValueError):
+        design({"prop_mkt": Uniform(0, 1)}, method="sobol", n=4)
+
+
+def test_barrido_coincide_con_simulate_batch():
+    base = Params(anios=8, calidad_base=0.6)
+    sp = {"cuota_mensual": Uniform(200, 400, 3), "prop_mkt": [0.05, 0.15], "anios": [5, 8]}
+    df = run_sweep(sp, base=base, max_workers=1, chunk_size=5)
+    des = design(sp)
+    assert df["escenario"].nunique() == 12
+    for i in range(12):
+        par = replace(base, **{k: des[k][i].item() for k in des})
+        ref = simulate_batch([par])
+        fila = df[df["escenario"] == i]
+        assert (fila["cuota_mensual"] == des["cuota_mensual"][i]).all()
+        assert fila["anio"].tolist() == ref["anio"][0].tolist()
+        np.testing.assert_array_equal(fila["alumnos_totales"], ref["alumnos_totales"][0])
+        np.testing.assert_allclose(fila["resultado"], ref["resultado"][0], rtol=1e-12)
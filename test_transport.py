@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+import sweep
+from simulate_case import simulate_batch
+from sweep import Uniform, iter_sweep, run_sweep
+from transport import SharedBatch, simulate_parallel
+
+# =====================================================================
+# Transporte por memoria compartida (transport.py y sweep con "shm")
+# =====================================================================
+
+ESPACIO = {"cuota_mensual": Uniform(150, 450, 7), "prop_mkt": Uniform(0.0, 0.2, 5), "anios": [5, 8]}
+
+
+def _segmentos():
+    return {f for f in os.listdir("/dev/shm") if f.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+def test_simulate_parallel_coincide_con_simulate_batch():
+    antes = _segmentos()
+    esc = {"anios": 12, "cuota_mensual": np.random.default_rng(1).uniform(150, 450, 301)}
+    ref = simulate_batch(esc)
+    for transport in ("shm", "pickle"):
+        out = simulate_parallel(esc, chunk_size=70, max_workers=2, transport=transport)
+        assert set(out) == set(ref)
+        for c in ref:
+            np.testing.assert_array_equal(out[c], ref[c], err_msg=f"{transport} {c}")
+        if isinstance(out, SharedBatch):
+            out.close()
+    assert _segmentos() == antes
+
+
+@pytest.mark.parametrize("columns", [None, ["resultado", "alumnos_totales"]])
+def test_transportes_del_barrido_coinciden(columns):
+    antes = _segmentos()
+    shm = run_sweep(ESPACIO, max_workers=2, chunk_size=13, columns=columns)
+    pickle = run_sweep(ESPACIO, max_workers=2, chunk_size=13, columns=columns, transport="pickle")
+    local = run_sweep(ESPACIO, max_workers=1, chunk_size=13, columns=columns)
+    assert shm.equals(pickle) and shm.equals(local)
+    assert _segmentos() == antes
+
+
+def test_iter_sweep_acota_los_segmentos_en_vuelo(monkeypatch):
+    # Cada bloque tiene su segmento y se libera al entregarlo: nunca hay más de
+    # 2 * workers vivos, por grande que sea el barrido
+    creados, original = [], sweep.shared_outputs
+
+    def shared_outputs(*args, **kwargs):
+        creados.append(original(*args, **kwargs))
+        return creados[-1]
+
+    monkeypatch.setattr(sweep, "shared_outputs", shared_outputs)
+    vivos = []
+    for _ in iter_sweep({"cuota_mensual": Uniform(150, 450, 40)}, max_workers=2, chunk_size=2):
+        vivos.append(sum(sb._owner for sb in creados))
+    assert len(creados) == 20
+    assert max(vivos) <= 4
+    assert not any(sb._owner for sb in creados)
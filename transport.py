@@ -0,0 +1,209 @@
+import os
+import pickle
+import time
+from collections.abc import Mapping as MappingABC
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from simulate_case import Params, params_to_arrays, simulate_batch
+
+# =====================================================================
+# Transporte de resultados por memoria compartida
+# =====================================================================
+# En una corrida multi-proceso, devolver cada bloque por pickle (columnas de
+# salida + G + Div) cuesta más que simularlo. Acá el proceso padre reserva un
+# solo segmento de `multiprocessing.shared_memory` con un buffer por columna,
+# forma (n_escenarios, anios) y G/Div de forma (n_escenarios, anios, N_GRADES).
+# Cada worker se engancha por nombre, simula su bloque de filas con
+# `simulate_batch` y escribe su tajada en el lugar; por el pipe sólo viaja la
+# cantidad de filas. El padre ve los buffers como vistas NumPy, sin copiar.
+#
+# Dtypes y formas salen de una corrida de prueba de un escenario. Al terminar el
+# pool, el padre borra el nombre del segmento (no quedan restos en /dev/shm);
+# la memoria vive mientras existan el SharedBatch o sus vistas.
+
+ALIGN = 64      # bytes; cada buffer arranca alineado
+
+
+def _layout(campos: Mapping[str, Tuple[Tuple[int, ...], Any]]) -> Tuple[Dict[str, Tuple[int, Tuple[int, ...], str]], int]:
+    # nombre -> (offset, forma, dtype) dentro del segmento
+    lay, off = {}, 0
+    for c, (forma, dtype) in campos.items():
+        dt = np.dtype(dtype)
+        lay[c] = (off, tuple(int(x) for x in forma), dt.str)
+        off += -(-int(np.prod(forma)) * dt.itemsize // ALIGN) * ALIGN
+    return lay, max(off, 1)
+
+
+def _attach(nombre: str) -> shared_memory.SharedMemory:
+    # El worker no es dueño del segmento: no lo registra en el resource_tracker
+    # (compartido con el padre; registrarlo o desregistrarlo pisa el del dueño)
+    try:
+        return shared_memory.SharedMemory(name=nombre, track=False)     # Python >= 3.13
+    except TypeError:
+        registrar = resource_tracker.register
+        resource_tracker.register = lambda *a, **k: None
+        try:
+            return shared_memory.SharedMemory(name=nombre)
+        finally:
+            resource_tracker.register = registrar
+
+
+class SharedBatch(MappingABC):
+    """Columnas de salida en memoria compartida, con la misma interfaz que el
+    dict de `simulate_batch` (out["resultado"], out["G"], ...)."""
+
+    def __init__(self, campos: Optional[Mapping[str, Tuple[Tuple[int, ...], Any]]] = None,
+                 spec: Optional[Dict[str, Any]] = None):
+        if spec is None:
+            self._layout, size = _layout(campos or {})
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._owner = True
+        else:
+            self._layout = spec["layout"]
+            self._shm = _attach(spec["name"])
+            self._owner = False
+        self._arrays = {
+            c: np.ndarray(forma, dtype=np.dtype(dt), buffer=self._shm.buf, offset=off)
+            for c, (off, forma, dt) in self._layout.items()
+        }
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """Lo que necesita un worker para engancharse (liviano, se pickea)."""
+        return {"name": self._shm.name, "layout": self._layout}
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    def __getitem__(self, c: str) -> np.ndarray:
+        return self._arrays[c]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._arrays)
+
+    def __len__(self) -> int:
+        return len(self._arrays)
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Copia a memoria propia (para soltar el segmento)."""
+        return {c: v.copy() for c, v in self._arrays.items()}
+
+    def unlink(self) -> None:
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._owner = False
+
+    def close(self) -> None:
+        # Si quedan vistas afuera, el mapeo sigue vivo hasta que se liberen
+        self._arrays = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "SharedBatch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.unlink()
+        self.close()
+
+
+def run_shared(spec: Dict[str, Any], r0: int, cols: Dict[str, np.ndarray],
+               columns: Optional[Sequence[str]], store: Optional[Any] = None) -> int:
+    """Tarea de worker: simula el bloque `cols` y lo escribe en las filas
+    [r0, r0 + n) del SharedBatch de `spec`; devuelve n. Con `store`
+    (ResultStore) además guarda el bloque completo, como sweep._run_chunk."""
+    out = simulate_batch(cols, columns=None if store is not None else columns)
+    if store is not None:
+        store.append(cols, out)
+    sb = SharedBatch(spec=spec)
+    try:
+        n = len(next(iter(cols.values())))
+        for c in sb:
+            sb[c][r0:r0 + n] = out[c]
+    finally:
+        sb.close()
+    return n
+
+
+def _run_pickled(cols: Dict[str, np.ndarray], columns: Optional[Sequence[str]]) -> Dict[str, np.ndarray]:
+    # Referencia: el bloque vuelve entero por pickle
+    return simulate_batch(cols, columns=columns)
+
+
+def _bloques(P: Dict[str, np.ndarray], n: int, chunk_size: int) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    for r0 in range(0, n, chunk_size):
+        yield r0, {k: v[r0:r0 + chunk_size] for k, v in P.items()}
+
+
+def shared_outputs(P: Mapping[str, np.ndarray], columns: Optional[Sequence[str]] = None,
+                   grados: bool = True) -> SharedBatch:
+    """Reserva los buffers compartidos para todos los escenarios de P (mismo
+    anios), con dtypes y formas de una corrida de prueba de un escenario.
+    grados=False deja afuera G y Div."""
+    n = len(next(iter(P.values())))
+    prueba = simulate_batch({k: v[:1] for k, v in P.items()}, columns=columns)
+    if not grados:
+        prueba.pop("G")
+        prueba.pop("Div")
+    return SharedBatch({c: ((n,) + v.shape[1:], v.dtype) for c, v in prueba.items()})
+
+
+def simulate_parallel(params: Union[Sequence[Params], Mapping[str, Any]],
+                      columns: Optional[Sequence[str]] = None, chunk_size: int = 2000,
+                      max_workers: Optional[int] = None, transport: str = "shm",
+                      stats: Optional[Dict[str, float]] = None) -> Mapping[str, np.ndarray]:
+    """`simulate_batch` repartido en bloques de `chunk_size` escenarios sobre un
+    ProcessPoolExecutor (todos con el mismo anios).
+
+    transport="shm": los workers escriben en memoria compartida y se devuelve un
+      SharedBatch (vistas sin copia; `to_dict()` para copiarlo).
+    transport="pickle": cada bloque vuelve por pickle y se concatena (referencia).
+    stats: si se pasa un dict, se completa con "ipc_bytes" (bytes de resultados
+      por el pipe, medidos con pickle) y "wall_time".
+    """
+    if transport not in ("shm", "pickle"):
+        raise ValueError(f"transport desconocido: {transport!r} (usar 'shm' o 'pickle')")
+    t0 = time.perf_counter()
+    P, n, _ = params_to_arrays(params)
+    workers = max_workers or os.cpu_count() or 1
+
+    if transport == "shm":
+        out = shared_outputs(P, columns)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futs = [ex.submit(run_shared, out.spec, r0, cols, columns)
+                        for r0, cols in _bloques(P, n, chunk_size)]
+                respuestas = [fut.result() for fut in futs]
+        finally:
+            out.unlink()
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            respuestas = list(ex.map(_run_pickled, (c for _, c in _bloques(P, n, chunk_size)),
+                                     (columns for _ in range(0, n, chunk_size))))
+        out = {c: np.concatenate([p[c] for p in respuestas]) for c in respuestas[0]}
+
+    if stats is not None:
+        stats["wall_time"] = time.perf_counter() - t0
+        stats["ipc_bytes"] = sum(len(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL)) for r in respuestas)
+    return out
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n = 40_000
+    esc = {"anios": 30, "cuota_mensual": rng.uniform(150, 450, n), "prop_mkt": rng.uniform(0.0, 0.2, n)}
+    for tr in ("pickle", "shm"):
+        st: Dict[str, float] = {}
+        out = simulate_parallel(esc, chunk_size=4000, max_workers=2, transport=tr, stats=st)
+        print(f"{tr:>6}: {st['wall_time']:.2f}s, IPC {st['ipc_bytes'] / 1e6:.1f} MB, "
+              f"resultado medio {out['resultado'].mean():.0f}")